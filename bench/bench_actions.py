@@ -0,0 +1,116 @@
+"""Batch executor overhead per action type.
+
+For each registered action, a batch of ``--count`` identical steps is
+compiled and executed the way /api/combo/batch does it, and the same
+handler is called directly in a loop. The difference is what validation,
+cancellation checks and per-action timing cost on top of the action itself.
+Also measures one input-scheduler round trip (submit a no-op, wait for it).
+
+    python bench/bench_actions.py [--count 200] [--output results.json]
+"""
+
+import argparse
+import sys
+import time
+
+import harness
+
+import actions
+import input_queue
+
+SAMPLES = {
+    "click": {"x": 100, "y": 100},
+    "double_click": {"x": 100, "y": 100},
+    "right_click": {"x": 100, "y": 100},
+    "move": {"x": 300, "y": 200},
+    "move_relative": {"dx": 5, "dy": 5},
+    "drag": {"start_x": 0, "start_y": 0, "end_x": 50, "end_y": 50, "duration": 0},
+    "scroll": {"clicks": 3},
+    "type": {"text": "hello world"},
+    "write_instant": {"text": "Grüße"},
+    "press": {"key": "enter"},
+    "hotkey": {"keys": ["ctrl", "s"]},
+    "key_down": {"key": "shift"},
+    "key_up": {"key": "shift"},
+    "sleep": {"ms": 0},
+    "screenshot": {"scale": 0.25, "quality": 50},
+    "focus": {"title": "Notepad"},
+}
+
+
+def per_action_us(fns, count, repeat=7):
+    """Best-of-``repeat`` time of each ``fn()`` divided by ``count``, in microseconds.
+
+    Runs are interleaved so drift (CPU frequency, other load) hits every fn alike.
+    """
+    best = [float("inf")] * len(fns)
+    for fn in fns:
+        fn()  # Warm up
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return [round(t / count * 1e6, 2) for t in best]
+
+
+def run(count=200):
+    harness.install_desktop()
+    results = []
+    print(f"{'action':<14} {'direct':>10} {'batch':>10} {'overhead':>10} {'compile':>10}  (us/action)")
+    for name, spec in actions.ACTIONS.items():
+        params = {"type": name, **SAMPLES.get(name, {})}
+        if actions.validate(params):
+            print(f"{name:<14} skipped: no sample parameters")
+            continue
+        batch = [dict(params) for _ in range(count)]
+        steps = actions.compile_batch(batch)
+
+        def direct():
+            for step in batch:
+                spec.handler(step)
+
+        direct_us, batch_us, compile_us = per_action_us(
+            [direct, lambda: list(actions.execute(steps)), lambda: actions.compile_batch(batch)], count
+        )
+        overhead = round(batch_us - direct_us, 2)
+        results.append({
+            "key": f"actions {name}",
+            "suite": "actions",
+            "action": name,
+            "count": count,
+            "direct_us": direct_us,
+            "batch_us": batch_us,
+            "overhead_us": overhead,
+            "compile_us": compile_us,
+        })
+        print(f"{name:<14} {direct_us:>10.2f} {batch_us:>10.2f} {overhead:>10.2f} {compile_us:>10.2f}")
+
+    # A thread outside the worker pays a queue hop per serialized input call
+    scheduler = input_queue.scheduler
+    hop_us, = per_action_us([lambda: [scheduler.run(time.perf_counter) for _ in range(count)]], count)
+    results.append({"key": "actions scheduler round trip", "suite": "actions", "hop_us": hop_us})
+    print(f"{'queue hop':<14} {hop_us:>10.2f}")
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument("--count", type=int, default=200, help="Actions per batch")
+
+
+def from_args(args):
+    return run(args.count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args()
+    results = from_args(args)
+    if args.output:
+        harness.write_results(args.output, results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
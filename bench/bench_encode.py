@@ -0,0 +1,105 @@
+"""Screenshot encode time per resolution and codec/quality.
+
+Encodes the synthetic desktop (flat colours, window chrome, text-like
+glyph rows) at each resolution with each codec setting on the calling
+thread, plus the full ``capture_encoded`` pipeline at 1080p.
+
+    python bench/bench_encode.py [--resolutions 1280x720,1920x1080]
+                                 [--codecs jpeg:85,png:1] [--repeat 10]
+                                 [--output results.json]
+"""
+
+import argparse
+import statistics
+import sys
+
+import harness
+
+import encoder
+import screenshot
+
+RESOLUTIONS = "1280x720,1920x1080,2560x1440,3840x2160"
+# codec:setting - quality for jpeg/webp, compress_level for png
+CODECS = "jpeg:50,jpeg:85,png:1,png:6,webp:80,raw"
+
+
+def parse_codecs(spec):
+    codecs = []
+    for item in spec.split(","):
+        codec, _, setting = item.partition(":")
+        codecs.append((encoder.normalize_codec(codec), int(setting) if setting else None))
+    return codecs
+
+
+def encode_options(codec, setting):
+    if codec == "png":
+        return {"codec": codec, "compress_level": setting}
+    return {"codec": codec, "quality": setting}
+
+
+def _result(key, durations, size, pixels, **fields):
+    median = statistics.median(durations)
+    return {
+        "key": key,
+        "suite": "encode",
+        **fields,
+        "ms": round(median * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+        "bytes": size,
+        "mpix_per_s": round(pixels / median / 1e6, 1),
+    }
+
+
+def run(resolutions=RESOLUTIONS, codecs=CODECS, repeat=10):
+    results = []
+    for resolution in resolutions.split(","):
+        width, height = (int(n) for n in resolution.lower().split("x"))
+        frame = screenshot.Frame(harness.desktop_frame(width, height))
+        for codec, setting in parse_codecs(codecs):
+            options = encode_options(codec, setting)
+            size = len(encoder.encode(frame, **options))
+            durations = harness.timed(lambda: encoder.encode(frame, **options), repeat)
+            label = f"{codec}:{setting}" if setting is not None else codec
+            result = _result(f"encode {width}x{height} {label}", durations, size, width * height,
+                             width=width, height=height, codec=codec, setting=setting)
+            results.append(result)
+            print(f"{width:>5}x{height:<5} {label:<8} {result['ms']:>9.2f} ms "
+                  f"{result['bytes'] / 1024:>9.0f} KiB {result['mpix_per_s']:>8.1f} Mpix/s")
+
+    # What GET /api/screenshot does: capture, encode on the worker pool, base64
+    harness.install_desktop()
+    screenshot.frame_cache.max_age = 0  # A fresh capture every time
+    for codec, setting in parse_codecs("jpeg:85,png:1"):
+        options = encode_options(codec, setting)
+        options["format"] = options.pop("codec")
+        durations = harness.timed(lambda: screenshot.capture_to_base64(**options), repeat)
+        label = f"{codec}:{setting}"
+        result = _result(f"pipeline 1920x1080 {label}", durations, None, 1920 * 1080,
+                         width=1920, height=1080, codec=codec, setting=setting)
+        results.append(result)
+        print(f"pipeline    {label:<8} {result['ms']:>9.2f} ms")
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument("--resolutions", default=RESOLUTIONS)
+    parser.add_argument("--codecs", default=CODECS, help="codec:quality (png: compress level)")
+    parser.add_argument("--repeat", type=int, default=10)
+
+
+def from_args(args):
+    return run(args.resolutions, args.codecs, args.repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args()
+    results = from_args(args)
+    if args.output:
+        harness.write_results(args.output, results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
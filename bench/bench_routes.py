@@ -0,0 +1,371 @@
+"""Requests/second and latency percentiles for every route in server.py.
+
+Routes are discovered from the Flask URL map, so new endpoints are
+benchmarked automatically (with an empty body unless CASES says otherwise).
+Each route is driven by ``--concurrency`` client threads for ``--duration``
+seconds. ``--transport http`` serves the app under waitress on a loopback
+port, as in production; ``wsgi`` calls the app in-process through Flask's
+test client, which isolates Flask and handler cost from sockets.
+``--format msgpack|cbor`` sends bodies and asks for responses in that format.
+
+    python bench/bench_routes.py [--concurrency 1,8] [--duration 1]
+                                 [--transport http|wsgi] [--routes REGEX]
+                                 [--format json|msgpack|cbor]
+                                 [--output results.json]
+"""
+
+import argparse
+import base64
+import http.client
+import io
+import re
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+import harness
+
+# Routes that stream or block for seconds; they aren't request/response shaped
+SKIP = {
+    ("GET", "/api/screenshot/stream"): "MJPEG stream until the client disconnects",
+    ("GET", "/api/events"): "server-sent event stream",
+    ("GET", "/api/debug/profile"): "samples for seconds and needs an API key",
+}
+
+BATCH = [
+    {"type": "move", "x": 100, "y": 100},
+    {"type": "click", "x": 100, "y": 100},
+    {"type": "type", "text": "hello"},
+    {"type": "press", "key": "enter"},
+    {"type": "hotkey", "keys": ["ctrl", "s"]},
+]
+
+# (method, rule) -> {"query", "json", "path", "setup"}; "setup(ctx)" runs once
+# before the route is driven and may return overrides for the other keys.
+CASES = {
+    ("GET", "/api/metrics"): {"query": {"format": "json"}},
+    ("GET", "/api/pixel"): {"query": {"x": 10, "y": 10}},
+    ("POST", "/api/mouse/move"): {"json": {"x": 300, "y": 200}},
+    ("POST", "/api/mouse/move_relative"): {"json": {"dx": 5, "dy": -5}},
+    ("POST", "/api/mouse/click"): {"json": {"x": 300, "y": 200}},
+    ("POST", "/api/mouse/double_click"): {"json": {"x": 300, "y": 200}},
+    ("POST", "/api/mouse/right_click"): {"json": {"x": 300, "y": 200}},
+    ("POST", "/api/mouse/drag"): {"json": {"start_x": 10, "start_y": 10, "end_x": 200, "end_y": 200, "duration": 0}},
+    ("POST", "/api/mouse/scroll"): {"json": {"clicks": -3}},
+    ("POST", "/api/keyboard/type"): {"json": {"text": "The quick brown fox"}},
+    ("POST", "/api/keyboard/press"): {"json": {"key": "enter"}},
+    ("POST", "/api/keyboard/hotkey"): {"json": {"keys": ["ctrl", "a"]}},
+    ("POST", "/api/keyboard/key_down"): {"json": {"key": "shift"}},
+    ("POST", "/api/keyboard/key_up"): {"json": {"key": "shift"}},
+    ("POST", "/api/keyboard/write_instant"): {"json": {"text": "Grüße 日本語"}},
+    ("GET", "/api/screenshot"): {"query": {"codec": "jpeg", "quality": 70}},
+    ("POST", "/api/screenshot/region"): {"json": {"x": 100, "y": 100, "width": 400, "height": 300}},
+    ("POST", "/api/screenshot/file"): {"setup": lambda ctx: {"json": {"path": f"{ctx['workdir']}/shot.png"}}},
+    ("POST", "/api/pixel/batch"): {"json": {"points": [[10, 10], [500, 300], [900, 700]]}},
+    ("POST", "/api/screen/templates"): {"setup": lambda ctx: {"json": {"name": "upload", "image": ctx["template"]}}},
+    ("DELETE", "/api/screen/templates/<name>"): {"path": {"name": "missing"}},
+    ("POST", "/api/screen/locate"): {"json": {"template": "bench"}},
+    ("POST", "/api/screen/wait"): {"json": {"condition": {"type": "pixel", "x": 5, "y": 5, "color": list(harness.BACKGROUND)}, "timeout": 1}},
+    ("POST", "/api/windows/focus"): {"json": {"title": "Notepad"}},
+    ("POST", "/api/windows/minimize"): {"json": {"title": "Calculator"}},
+    ("POST", "/api/windows/maximize"): {"json": {"title": "Calculator"}},
+    ("POST", "/api/windows/restore"): {"json": {"title": "Calculator"}},
+    ("POST", "/api/windows/close"): {"json": {"title": "Settings"}},
+    ("POST", "/api/windows/move"): {"setup": lambda ctx: {"json": {"hwnd": ctx["hwnd"], "x": 50, "y": 50}}},
+    ("POST", "/api/windows/resize"): {"setup": lambda ctx: {"json": {"hwnd": ctx["hwnd"], "width": 640, "height": 480}}},
+    ("GET", "/api/windows/find"): {"query": {"title": "code", "mode": "fuzzy"}},
+    ("POST", "/api/windows/wait"): {"json": {"title": "Notepad", "timeout": 1}},
+    ("POST", "/api/clipboard"): {"json": {"text": "benchmark"}},
+    ("GET", "/api/clipboard"): {"setup": lambda ctx: ctx["put_text"]("benchmark")},
+    ("GET", "/api/clipboard/image"): {"query": {"binary": 1}, "setup": lambda ctx: ctx["put_image"]()},
+    ("GET", "/api/clipboard/history/<int:entry_id>"): {"setup": lambda ctx: {"path": {"entry_id": ctx["put_text"]("history")["id"]}}},
+    ("POST", "/api/input/lease"): {"json": {"ttl": 5}},
+    ("POST", "/api/combo/click_and_type"): {"json": {"x": 300, "y": 200, "text": "hello"}},
+    ("POST", "/api/combo/batch"): {"json": {"actions": BATCH}},
+    ("GET", "/api/macros/<name>"): {"path": {"name": "bench"}},
+    ("DELETE", "/api/macros/<name>"): {"path": {"name": "missing"}},
+    ("POST", "/api/macros/<name>/run"): {"path": {"name": "bench"}, "json": {"params": {"text": "hi"}}},
+    ("POST", "/api/macros"): {"json": {"name": "upload", "actions": BATCH}},
+}
+
+
+def discover(app, pattern=None):
+    """(method, rule) pairs for every API route, in URL map order."""
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith("/api/"):
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if pattern and not re.search(pattern, f"{method} {rule.rule}"):
+                continue
+            routes.append((method, rule.rule))
+    return routes
+
+
+def build_path(rule, values):
+    def replace(match):
+        name = match.group(1).split(":")[-1]
+        return str(values.get(name, "bench"))
+    return re.sub(r"<([^>]+)>", replace, rule)
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+def prepare(server, workdir):
+    """Seed the state routes expect: templates, a macro, clipboard history.
+    Returns the context passed to CASES setup hooks."""
+    import win32clipboard
+    import win32con
+    import win32gui
+    from PIL import Image
+
+    frame = harness.install_desktop()
+    server.start_clipboard_history()
+    win32gui.populate()
+
+    buffer = io.BytesIO()
+    Image.fromarray(frame[40:140, 40:240]).save(buffer, format="PNG")
+    template = base64.b64encode(buffer.getvalue()).decode("ascii")
+    server.template_match.registry.add("bench", buffer.getvalue())
+    server.macro_library.save("bench", BATCH + [{"type": "type", "text": "$text"}], {"text": "hello"})
+
+    def put(fmt, data):
+        win32clipboard.OpenClipboard()
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(fmt, data)
+        finally:
+            win32clipboard.CloseClipboard()
+        server.clipboard.get_monitor().check()
+
+        return {}
+
+    def put_text(text):
+        put(win32con.CF_UNICODETEXT, text)
+        return {"id": server.clipboard_log.latest()["id"]}
+
+    def put_image():
+        return put(win32con.CF_DIB, harness.dib_bytes(frame[:600, :800]))
+
+    return {
+        "workdir": workdir,
+        "template": template,
+        "hwnd": next(iter(win32gui._windows)),
+        "put_text": put_text,
+        "put_image": put_image,
+    }
+
+
+# ============================================================
+# Transports
+# ============================================================
+
+class HttpTransport:
+    """Waitress (or werkzeug) on an ephemeral loopback port; keep-alive clients."""
+
+    name = "http"
+
+    def __init__(self, app, threads, mimetype):
+        self.mimetype = mimetype
+        self._stopping = threading.Event()
+        try:
+            from waitress.server import create_server
+            self._server = create_server(app, host="127.0.0.1", port=0, threads=threads,
+                                         connection_limit=1000, channel_timeout=30)
+            self.port = self._server.effective_port
+            self.server = "waitress"
+            run = self._run_waitress
+        except ImportError:
+            from werkzeug.serving import make_server
+            self._server = make_server("127.0.0.1", 0, app, threaded=True)
+            self.port = self._server.server_port
+            self.server = "werkzeug"
+            run = self._server.serve_forever
+        self._thread = threading.Thread(target=run, name="bench-server", daemon=True)
+        self._thread.start()
+
+    def _run_waitress(self):
+        # server.run() loops until its sockets are gone, so closing them from
+        # another thread pulls them out from under select(); poll one round at
+        # a time instead and stop between rounds.
+        server = self._server
+        while not self._stopping.is_set():
+            server.asyncore.loop(timeout=server.adj.asyncore_loop_timeout, map=server._map,
+                                 use_poll=server.adj.asyncore_use_poll, count=1)
+
+    def client(self, session):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        headers = {"X-Session-Id": session, "Content-Type": self.mimetype, "Accept": self.mimetype}
+
+        def send(method, path, body):
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        return send
+
+    def close(self):
+        """Stop the serving loop, wait for it, then close the sockets."""
+        if self.server == "waitress":
+            from waitress import wasyncore
+            self._stopping.set()
+            self._server.pull_trigger()  # Wake the loop out of select()
+            self._thread.join()
+            self._server.task_dispatcher.shutdown()
+            wasyncore.close_all(self._server._map)
+        else:
+            self._server.shutdown()  # Returns once serve_forever has exited
+            self._thread.join()
+            self._server.server_close()
+
+
+class WsgiTransport:
+    """Flask's test client: the full request pipeline, no sockets."""
+
+    name = "wsgi"
+    server = "flask-test-client"
+
+    def __init__(self, app, threads, mimetype):
+        self.app = app
+        self.mimetype = mimetype
+
+    def client(self, session):
+        client = self.app.test_client()
+        headers = {"X-Session-Id": session, "Content-Type": self.mimetype, "Accept": self.mimetype}
+
+        def send(method, path, body):
+            # Closing runs call_on_close hooks (the server's stream/wait slots)
+            with client.open(path, method=method, data=body, headers=headers) as response:
+                return response.status_code
+        return send
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {"http": HttpTransport, "wsgi": WsgiTransport}
+
+
+# ============================================================
+# Driver
+# ============================================================
+
+def drive(transport, method, path, body, concurrency, duration, warmup=0.2):
+    """Hammer one request from ``concurrency`` threads. Returns latency stats."""
+    latencies = [[] for _ in range(concurrency)]
+    statuses = [{} for _ in range(concurrency)]
+    window = {}
+    # The last worker to finish warming up opens the measurement window for all
+    start_line = threading.Barrier(
+        concurrency, action=lambda: window.update(start=time.perf_counter(),
+                                                  end=time.perf_counter() + duration)
+    )
+
+    def worker(i):
+        send = transport.client(f"bench-{i}")
+        warm_until = time.perf_counter() + warmup
+        while time.perf_counter() < warm_until:
+            send(method, path, body)
+        start_line.wait()
+        mine, codes = latencies[i], statuses[i]
+        while time.perf_counter() < window["end"]:
+            began = time.perf_counter()
+            status = send(method, path, body)
+            mine.append(time.perf_counter() - began)
+            codes[status] = codes.get(status, 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - window["start"]
+
+    status = {}
+    for codes in statuses:
+        for code, count in codes.items():
+            status[str(code)] = status.get(str(code), 0) + count
+    stats = harness.latency_stats([x for xs in latencies for x in xs], elapsed)
+    stats["errors"] = sum(n for code, n in status.items() if not code.startswith("2") and code != "304")
+    stats["status"] = status
+    return stats
+
+
+def run(transport_name="http", concurrency=(1, 8), duration=1.0, pattern=None, threads=None,
+        fmt="json"):
+    """Benchmark every route at each concurrency level. Returns result dicts."""
+    workdir = tempfile.mkdtemp(prefix="pcc-bench-")
+    server = harness.load_server(workdir)
+    if fmt not in server.serializers.FORMATS:
+        sys.exit(f"Format {fmt} is not available; install msgpack / cbor2")
+    wire = server.serializers.FORMATS[fmt]
+    context = prepare(server, workdir)
+    transport = TRANSPORTS[transport_name](server.app, threads or server.config.SERVER_THREADS, wire.mimetype)
+    # JSON keys stay as they were so results compare across commits
+    suffix = "" if fmt == "json" else f" fmt={fmt}"
+    results = []
+    try:
+        for method, rule in discover(server.app, pattern):
+            if (method, rule) in SKIP:
+                print(f"{method:<7} {rule:<42} skipped: {SKIP[(method, rule)]}")
+                continue
+            case = dict(CASES.get((method, rule), {}))
+            setup = case.pop("setup", None)
+            if setup:
+                case.update(setup(context))
+            path = build_path(rule, case.get("path", {}))
+            if case.get("query"):
+                path += "?" + urlencode(case["query"])
+            body = None if method == "GET" else wire.dumps(case.get("json", {}))
+            for level in concurrency:
+                stats = drive(transport, method, path, body, level, duration)
+                for i in range(level):  # A lease left behind would stall the next route
+                    server.input_queue.scheduler.release_lease(f"bench-{i}")
+                results.append({
+                    "key": f"routes {method} {rule} c={level}{suffix}",
+                    "suite": "routes",
+                    "route": f"{method} {rule}",
+                    "concurrency": level,
+                    "transport": transport.name,
+                    "format": fmt,
+                    **stats,
+                })
+                print(f"{method:<7} {rule:<42} c={level:<3} {stats['rps']:>9,.0f} rps  "
+                      f"p50 {stats['p50_ms']:>8.3f}  p99 {stats['p99_ms']:>8.3f} ms"
+                      + (f"  errors {stats['errors']}" if stats["errors"] else ""))
+    finally:
+        transport.close()
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated client thread counts")
+    parser.add_argument("--duration", type=float, default=1.0, help="Seconds per route and level")
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="http")
+    parser.add_argument("--threads", type=int, help="Server worker threads (default: SERVER_THREADS)")
+    parser.add_argument("--routes", help="Only routes whose 'METHOD /path' matches this regex")
+    parser.add_argument("--format", choices=("json", "msgpack", "cbor"), default="json",
+                        help="Request/response body format")
+
+
+def from_args(args):
+    levels = [int(n) for n in args.concurrency.split(",") if n]
+    return run(args.transport, levels, args.duration, args.routes, args.threads, args.format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--output", help="Write JSON results here")
+    args = parser.parse_args()
+    results = from_args(args)
+    if args.output:
+        harness.write_results(args.output, results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Typing throughput: batched SendInput engine vs. the legacy pyautogui path.
+
+By default nothing is injected. Both paths run the real
+``keyboard_control._type_chunk`` against the fakes in ``bench/fakes`` - the
+legacy branch (pyautogui.typewrite, clipboard copy plus ctrl+v for
+non-ASCII) and the engine branch (a recording injector) - and every OS call
+the fakes stand in for is charged ``--cost-us``: one per key down or up,
+one per clipboard copy, one per SendInput batch. Call counts come from the
+calls the code actually made, and the rates include its Python overhead.
+
+On Windows, ``--live`` instead types into the focused window for real
+(focus an empty Notepad within the countdown).
+
+    python bench/bench_typing.py [--chars 2000] [--cost-us 20] [--live]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import text_input  # noqa: E402
+
+SAMPLES = {
+    "ascii": "The quick brown fox jumps over the lazy dog. ",
+    "unicode": "Grüße, naïve café – 日本語のテキスト 🙂 ",
+}
+
+
+def sample(kind, chars):
+    text = SAMPLES[kind]
+    return (text * (chars // len(text) + 1))[:chars]
+
+
+@contextlib.contextmanager
+def charged(module, name, os_calls, cost, counter):
+    """Patch ``module.name`` to charge ``cost`` for each OS call ``os_calls(*args)`` it stands for."""
+    fn = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        calls = os_calls(*args)
+        counter[0] += calls
+        if cost:
+            time.sleep(cost * calls)
+        return fn(*args, **kwargs)
+
+    setattr(module, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, fn)
+
+
+def simulated_legacy(text, cost):
+    """Run the pre-engine branch of _type_chunk; return (seconds, OS calls)."""
+    import config
+    import keyboard_control
+    import pyautogui
+    import pyperclip
+
+    calls = [0]
+    config.TEXT_INPUT_ENGINE = "pyautogui"
+    text_input._engine = None
+    with charged(pyautogui, "typewrite", lambda message, *_: 2 * len(message), cost, calls), \
+            charged(pyautogui, "hotkey", lambda *keys: 2 * len(keys), cost, calls), \
+            charged(pyperclip, "copy", lambda *_: 1, cost, calls):
+        start = time.perf_counter()
+        keyboard_control._type_chunk.__wrapped__(text)
+        elapsed = time.perf_counter() - start
+    return elapsed, calls[0]
+
+
+def simulated_engine(text, cost):
+    """Run the engine branch of _type_chunk; return (seconds, OS calls)."""
+    import keyboard_control
+
+    injector = text_input.RecordingInjector(cost_per_call=cost)
+    text_input._engine = text_input.TypingEngine(injector, batch_delay=0)
+    try:
+        start = time.perf_counter()
+        keyboard_control._type_chunk.__wrapped__(text)
+        elapsed = time.perf_counter() - start
+    finally:
+        text_input._engine = None
+    assert injector.text() == text, "engine round-trip mismatch"
+    return elapsed, len(injector.batches)
+
+
+def live(text):
+    import pyautogui
+    pyautogui.PAUSE = 0
+    results = {}
+    for name, run in (
+        ("sendinput", lambda: text_input.TypingEngine(text_input.SendInputInjector()).type(text)),
+        ("pyautogui", lambda: pyautogui.typewrite(text)),
+    ):
+        print(f"Focus an empty text field: typing with {name} in 3s...")
+        time.sleep(3)
+        start = time.perf_counter()
+        run()
+        results[name] = len(text) / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chars", type=int, default=2000)
+    parser.add_argument("--cost-us", type=float, default=20.0, help="Simulated cost per OS call")
+    parser.add_argument("--live", action="store_true", help="Type for real (Windows only)")
+    args = parser.parse_args()
+    cost = args.cost_us / 1e6
+
+    if args.live:
+        # The simulation swaps in fake pyautogui/pywin32 modules, so the two never share a process
+        if sys.platform != "win32":
+            sys.exit("--live needs Windows")
+        text = sample("ascii", min(args.chars, 500))
+        for name, rate in live(text).items():
+            print(f"live     {name:<10} {rate:>12,.0f} chars/s")
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    import harness  # noqa: F401 - puts bench/fakes first on sys.path
+
+    print(f"{'text':<8} {'path':<10} {'os calls':>9} {'chars/s':>12}")
+    for kind in SAMPLES:
+        text = sample(kind, args.chars)
+        for name, run in (("legacy", simulated_legacy), ("engine", simulated_engine)):
+            elapsed, calls = run(text, cost)
+            print(f"{kind:<8} {name:<10} {calls:>9} {len(text) / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare two benchmark result files (from bench/run.py or a single suite).
+
+Results are matched by key. For every shared numeric metric the change is
+printed as a percentage; rps and Mpix/s are better when higher, times
+(*_ms, *_us) when lower. Changes beyond ``--threshold`` are flagged, and
+``--fail`` exits non-zero if any metric regressed that much (for CI).
+
+    python bench/compare.py BASE.json NEW.json [--threshold 10] [--metric p50_ms] [--fail]
+"""
+
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = ("rps", "mpix_per_s")
+LOWER_IS_BETTER_SUFFIXES = ("_ms", "_us")
+# Primary metric per suite, shown when --metric isn't given
+DEFAULT_METRICS = {
+    "routes": ("rps", "p50_ms", "p99_ms"),
+    "encode": ("ms",),
+    "actions": ("overhead_us", "batch_us", "hop_us"),
+}
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("meta", {}), {result["key"]: result for result in data["results"]}
+
+
+def direction(metric):
+    """+1 if higher is better, -1 if lower is better, 0 if it isn't a performance metric."""
+    if metric in HIGHER_IS_BETTER:
+        return 1
+    if metric == "ms" or metric.endswith(LOWER_IS_BETTER_SUFFIXES):
+        return -1
+    return 0
+
+
+def change(metric, old, new):
+    """Percent change, signed so that positive is an improvement."""
+    if not old:
+        return None
+    return direction(metric) * (new - old) / old * 100
+
+
+def compare(base, new, metrics=None, threshold=10.0):
+    """Yield (key, metric, old, new, improvement %, flag) for matching results."""
+    for key, result in new.items():
+        old = base.get(key)
+        if old is None:
+            continue
+        names = metrics or DEFAULT_METRICS.get(result.get("suite"), ())
+        for metric in names:
+            if metric not in result or metric not in old or not direction(metric):
+                continue
+            delta = change(metric, old[metric], result[metric])
+            flag = ""
+            if delta is not None and abs(delta) >= threshold:
+                flag = "faster" if delta > 0 else "SLOWER"
+            yield key, metric, old[metric], result[metric], delta, flag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change to flag")
+    parser.add_argument("--metric", action="append", help="Metric(s) to compare (default per suite)")
+    parser.add_argument("--changed", action="store_true", help="Only show flagged rows")
+    parser.add_argument("--fail", action="store_true", help="Exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    new_meta, new = load(args.new)
+    print(f"base: {base_meta.get('commit')} ({base_meta.get('time')})  "
+          f"new: {new_meta.get('commit')} ({new_meta.get('time')})")
+    if base_meta.get("platform") != new_meta.get("platform"):
+        print("warning: results come from different platforms")
+
+    regressions = 0
+    for key, metric, old, value, delta, flag in compare(base, new, args.metric, args.threshold):
+        regressions += flag == "SLOWER"
+        if args.changed and not flag:
+            continue
+        shown = f"{delta:+7.1f}%" if delta is not None else "      -"
+        print(f"{key:<58} {metric:<12} {old:>12,.3f} {value:>12,.3f} {shown}  {flag}")
+
+    only_base = sorted(set(base) - set(new))
+    only_new = sorted(set(new) - set(base))
+    if only_base:
+        print(f"\n{len(only_base)} result(s) only in base, e.g. {only_base[0]}")
+    if only_new:
+        print(f"{len(only_new)} result(s) only in new, e.g. {only_new[0]}")
+    print(f"\n{regressions} regression(s) beyond {args.threshold:g}%")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Fake pyautogui (benchmarks and tests): counts calls instead of touching the desktop.
+
+``hotkey("ctrl", "v")`` reads the clipboard the way a focused application
+would, so clipboard paste transactions complete as they do on Windows.
+"""
+
+import time
+from collections import Counter
+
+import numpy as np
+from PIL import Image
+
+import win32clipboard
+import win32con
+
+FAILSAFE = False
+PAUSE = 0
+
+WIDTH, HEIGHT = 1920, 1080
+calls = Counter()
+frame = np.zeros((HEIGHT, WIDTH, 3), np.uint8)  # What screenshot() returns
+_position = [0, 0]
+
+
+def size():
+    return WIDTH, HEIGHT
+
+
+def position():
+    return tuple(_position)
+
+
+def moveTo(x=None, y=None, duration=0.0, **kwargs):
+    calls["moveTo"] += 1
+    if x is not None:
+        _position[0] = x
+    if y is not None:
+        _position[1] = y
+
+
+def moveRel(dx=0, dy=0, duration=0.0, **kwargs):
+    calls["moveRel"] += 1
+    _position[0] += dx
+    _position[1] += dy
+
+
+def click(x=None, y=None, clicks=1, interval=0.0, button="left", **kwargs):
+    calls["click"] += 1
+    if x is not None and y is not None:
+        _position[:] = [x, y]
+
+
+def doubleClick(x=None, y=None, **kwargs):
+    click(x, y, clicks=2)
+
+
+def rightClick(x=None, y=None, **kwargs):
+    click(x, y, button="right")
+
+
+def middleClick(x=None, y=None, **kwargs):
+    click(x, y, button="middle")
+
+
+def mouseDown(x=None, y=None, button="left", **kwargs):
+    calls["mouseDown"] += 1
+
+
+def mouseUp(x=None, y=None, button="left", **kwargs):
+    calls["mouseUp"] += 1
+
+
+def dragTo(x=None, y=None, duration=0.0, button="left", **kwargs):
+    calls["dragTo"] += 1
+    if duration:
+        time.sleep(duration)
+    moveTo(x, y)
+
+
+def dragRel(dx=0, dy=0, duration=0.0, button="left", **kwargs):
+    calls["dragRel"] += 1
+    if duration:
+        time.sleep(duration)
+    moveRel(dx, dy)
+
+
+def scroll(clicks, x=None, y=None, **kwargs):
+    calls["scroll"] += 1
+
+
+def typewrite(message, interval=0.0, **kwargs):
+    calls["typewrite"] += 1
+    if interval:
+        time.sleep(interval * len(message))
+
+
+write = typewrite
+
+
+def press(keys, presses=1, interval=0.0, **kwargs):
+    calls["press"] += 1
+
+
+def keyDown(key, **kwargs):
+    calls["keyDown"] += 1
+
+
+def keyUp(key, **kwargs):
+    calls["keyUp"] += 1
+
+
+def hotkey(*keys, **kwargs):
+    calls["hotkey"] += 1
+    if [k.lower() for k in keys] == ["ctrl", "v"]:
+        _paste()
+
+
+def _paste():
+    """What the target application does on ctrl+v: read text off the clipboard."""
+    for _ in range(50):
+        try:
+            win32clipboard.OpenClipboard()
+            break
+        except Exception:
+            time.sleep(0.001)
+    else:
+        return
+    try:
+        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
+            win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+    finally:
+        win32clipboard.CloseClipboard()
+
+
+def screenshot(imageFilename=None, region=None):
+    calls["screenshot"] += 1
+    pixels = frame
+    if region:
+        x, y, width, height = region
+        pixels = frame[y:y + height, x:x + width]
+    return Image.fromarray(np.ascontiguousarray(pixels))
+
+
+def pixel(x, y):
+    calls["pixel"] += 1
+    return tuple(int(v) for v in frame[y, x])
+
+
+def locateOnScreen(image, **kwargs):
+    return None
+
+
+def center(box):
+    x, y, width, height = box
+    return x + width // 2, y + height // 2
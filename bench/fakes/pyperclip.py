@@ -0,0 +1,23 @@
+"""Fake pyperclip (benchmarks and tests), backed by the fake clipboard."""
+
+import win32clipboard
+import win32con
+
+
+def copy(text):
+    win32clipboard.OpenClipboard()
+    try:
+        win32clipboard.EmptyClipboard()
+        win32clipboard.SetClipboardText(text, win32con.CF_UNICODETEXT)
+    finally:
+        win32clipboard.CloseClipboard()
+
+
+def paste():
+    win32clipboard.OpenClipboard()
+    try:
+        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
+            return win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+        return ""
+    finally:
+        win32clipboard.CloseClipboard()
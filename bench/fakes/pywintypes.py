@@ -0,0 +1,9 @@
+"""Fake pywintypes (benchmarks and tests)."""
+
+
+class error(Exception):
+    def __init__(self, winerror=0, funcname="", strerror=""):
+        super().__init__(winerror, funcname, strerror)
+        self.winerror = winerror
+        self.funcname = funcname
+        self.strerror = strerror
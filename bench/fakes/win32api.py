@@ -0,0 +1,5 @@
+"""Fake win32api (benchmarks and tests)."""
+
+
+def GetModuleHandle(name=None):
+    return 0x400000
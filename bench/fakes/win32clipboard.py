@@ -0,0 +1,124 @@
+"""Fake win32clipboard (benchmarks and tests).
+
+One clipboard shared by every thread, with the Windows rules that matter to
+src/clipboard.py: one opener at a time, EmptyClipboard makes the opener the
+owner (sending WM_DESTROYCLIPBOARD to the previous one), sequence numbers,
+registered formats, and delayed rendering.
+"""
+
+import threading
+
+import pywintypes
+import win32con
+import win32gui
+import winmem
+
+WM_RENDERFORMAT = 0x0305
+WM_DESTROYCLIPBOARD = 0x0307
+
+_formats = {}  # format -> str, bytes, winmem handle, or None (delayed rendering)
+_registered = {}
+_state = {"opener": None, "hwnd": 0, "owner": 0, "sequence": 1}
+_lock = threading.Lock()
+
+
+def _require_open():
+    if _state["opener"] != threading.get_ident():
+        raise pywintypes.error(1418, "Clipboard", "Thread does not have a clipboard open.")
+
+
+def OpenClipboard(hwnd=None):
+    with _lock:
+        if _state["opener"] is not None and _state["opener"] != threading.get_ident():
+            raise pywintypes.error(5, "OpenClipboard", "Access is denied.")
+        _state["opener"] = threading.get_ident()
+        _state["hwnd"] = hwnd or 0
+
+
+def CloseClipboard():
+    with _lock:
+        _require_open()
+        _state["opener"] = None
+
+
+def EmptyClipboard():
+    _require_open()
+    previous = _state["owner"]
+    if previous:
+        win32gui.send_message(previous, WM_DESTROYCLIPBOARD)
+    for value in _formats.values():
+        if winmem.is_handle(value):
+            winmem.GlobalFree(value)
+    _formats.clear()
+    _state["owner"] = _state["hwnd"]
+    _state["sequence"] += 1
+
+
+def SetClipboardData(fmt, data):
+    # Owners answering WM_RENDERFORMAT write without opening, as on Windows
+    if _state["opener"] is None:
+        raise pywintypes.error(1418, "SetClipboardData", "Thread does not have a clipboard open.")
+    _formats[fmt] = data
+    if data is not None:
+        _state["sequence"] += 1
+    return data if winmem.is_handle(data) else 1
+
+
+def SetClipboardText(text, fmt=win32con.CF_TEXT):
+    return SetClipboardData(fmt, text)
+
+
+def _value(fmt):
+    _require_open()
+    if fmt not in _formats:
+        raise pywintypes.error(1168, "GetClipboardData", "Element not found.")
+    if _formats[fmt] is None and _state["owner"]:
+        win32gui.send_message(_state["owner"], WM_RENDERFORMAT, fmt)
+    value = _formats.get(fmt)
+    if value is None:
+        raise pywintypes.error(1168, "GetClipboardData", "Element not found.")
+    return value
+
+
+def GetClipboardData(fmt=win32con.CF_TEXT):
+    value = _value(fmt)
+    if winmem.is_handle(value):
+        value = winmem.read(value)
+        if fmt == win32con.CF_UNICODETEXT:
+            return value.decode("utf-16-le").split("\x00", 1)[0]
+    return value
+
+
+def GetClipboardDataHandle(fmt):
+    value = _value(fmt)
+    if winmem.is_handle(value):
+        return value
+    if isinstance(value, str):
+        value = (value + "\x00").encode("utf-16-le")
+    handle = _formats[fmt] = winmem.alloc(value)
+    return handle
+
+
+def IsClipboardFormatAvailable(fmt):
+    return fmt in _formats
+
+
+def EnumClipboardFormats(fmt=0):
+    _require_open()
+    formats = list(_formats)
+    if not fmt:
+        return formats[0] if formats else 0
+    try:
+        index = formats.index(fmt)
+    except ValueError:
+        return 0
+    return formats[index + 1] if index + 1 < len(formats) else 0
+
+
+def GetClipboardSequenceNumber():
+    return _state["sequence"]
+
+
+def RegisterClipboardFormat(name):
+    with _lock:
+        return _registered.setdefault(name, 0xC000 + len(_registered))
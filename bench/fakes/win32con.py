@@ -0,0 +1,15 @@
+"""Fake win32con (benchmarks and tests): the constants src/ uses."""
+
+SW_SHOWNORMAL = 1
+SW_SHOWMINIMIZED = 2
+SW_SHOWMAXIMIZED = 3
+SW_MAXIMIZE = 3
+SW_MINIMIZE = 6
+SW_RESTORE = 9
+
+WM_CLOSE = 0x0010
+
+CF_TEXT = 1
+CF_DIB = 8
+CF_UNICODETEXT = 13
+CF_DIBV5 = 17
@@ -0,0 +1,150 @@
+"""Fake win32gui (benchmarks and tests).
+
+A fixed desktop of top-level windows (see ``populate``), plus message-only
+windows created with RegisterClass/CreateWindow whose window procedure is
+called synchronously by ``send_message``.
+"""
+
+import itertools
+import threading
+
+import pywintypes
+import win32con
+
+_windows = {}  # hwnd -> {title, class_name, pid, tid, rect, show, visible}
+_procs = {}  # hwnd -> window procedure
+_classes = {}  # atom -> WNDCLASS
+_foreground = [0]
+_atoms = itertools.count(0xC000)
+_hwnds = itertools.count(0x20000, 2)
+_lock = threading.Lock()
+
+TITLES = [
+    "Untitled - Notepad", "Inbox - Outlook", "Calculator", "Task Manager",
+    "README.md - Visual Studio Code", "Command Prompt", "Downloads - File Explorer",
+    "Settings", "Spotify Premium", "Slack | general",
+]
+
+
+def populate(count=40):
+    """Replace the desktop with ``count`` visible, titled windows."""
+    with _lock:
+        _windows.clear()
+        for i in range(count):
+            hwnd = 0x10000 + i * 2
+            x, y = (i % 8) * 120, (i // 8) * 90
+            _windows[hwnd] = {
+                "title": f"{TITLES[i % len(TITLES)]} ({i})",
+                "class_name": f"FakeClass{i % 5}",
+                "pid": 1000 + i,
+                "tid": 5000 + i,
+                "rect": (x, y, x + 800, y + 600),
+                "show": win32con.SW_SHOWNORMAL,
+                "visible": True,
+            }
+        _foreground[0] = next(iter(_windows), 0)
+
+
+def window(hwnd):
+    try:
+        return _windows[hwnd]
+    except KeyError:
+        raise pywintypes.error(1400, "GetWindow", "Invalid window handle.") from None
+
+
+def send_message(hwnd, msg, wparam=0, lparam=0):
+    """Call a message-only window's procedure directly (SendMessage)."""
+    proc = _procs.get(hwnd)
+    return proc(hwnd, msg, wparam, lparam) if proc else 0
+
+
+# ------------------------------------------------------------ top-level windows
+
+def EnumWindows(callback, extra):
+    for hwnd in list(_windows):
+        if callback(hwnd, extra) is False:
+            break
+
+
+def IsWindowVisible(hwnd):
+    return hwnd in _windows and _windows[hwnd]["visible"]
+
+
+def IsIconic(hwnd):
+    return window(hwnd)["show"] == win32con.SW_SHOWMINIMIZED
+
+
+def GetWindowText(hwnd):
+    return window(hwnd)["title"]
+
+
+def GetClassName(hwnd):
+    return window(hwnd)["class_name"]
+
+
+def GetWindowRect(hwnd):
+    return window(hwnd)["rect"]
+
+
+def GetWindowPlacement(hwnd):
+    info = window(hwnd)
+    return (0, info["show"], (-1, -1), (-1, -1), info["rect"])
+
+
+def GetForegroundWindow():
+    return _foreground[0]
+
+
+def SetForegroundWindow(hwnd):
+    window(hwnd)
+    _foreground[0] = hwnd
+
+
+def ShowWindow(hwnd, command):
+    info = window(hwnd)
+    info["show"] = {
+        win32con.SW_MINIMIZE: win32con.SW_SHOWMINIMIZED,
+        win32con.SW_MAXIMIZE: win32con.SW_SHOWMAXIMIZED,
+        win32con.SW_RESTORE: win32con.SW_SHOWNORMAL,
+    }.get(command, command)
+    return True
+
+
+def MoveWindow(hwnd, x, y, width, height, repaint):
+    window(hwnd)["rect"] = (x, y, x + width, y + height)
+
+
+def PostMessage(hwnd, msg, wparam, lparam):
+    window(hwnd)  # WM_CLOSE is ignored so the desktop stays the same between runs
+
+
+# ------------------------------------------------------------ message-only windows
+
+class WNDCLASS:
+    def __init__(self):
+        self.lpfnWndProc = None
+        self.lpszClassName = ""
+        self.hInstance = 0
+
+
+def RegisterClass(wc):
+    atom = next(_atoms)
+    _classes[atom] = wc
+    return atom
+
+
+def CreateWindow(atom, title, style, x, y, width, height, parent, menu, instance, param):
+    hwnd = next(_hwnds)
+    _procs[hwnd] = _classes[atom].lpfnWndProc
+    return hwnd
+
+
+def DefWindowProc(hwnd, msg, wparam, lparam):
+    return 0
+
+
+def PumpMessages():
+    threading.Event().wait()  # Messages are delivered synchronously; just park the thread
+
+
+populate()
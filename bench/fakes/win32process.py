@@ -0,0 +1,8 @@
+"""Fake win32process (benchmarks and tests)."""
+
+import win32gui
+
+
+def GetWindowThreadProcessId(hwnd):
+    window = win32gui.window(hwnd)
+    return window["tid"], window["pid"]
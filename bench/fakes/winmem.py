@@ -0,0 +1,51 @@
+"""Fake kernel32 global memory (benchmarks and tests): handles map to ctypes buffers."""
+
+import ctypes
+import itertools
+import threading
+
+_blocks = {}  # handle -> ctypes buffer
+_handles = itertools.count(0x10000, 8)
+_lock = threading.Lock()
+
+
+def alloc(data):
+    """Allocate a block holding ``data``; returns its handle."""
+    handle = GlobalAlloc(0, max(1, len(data)))
+    ctypes.memmove(_blocks[handle], data, len(data))
+    return handle
+
+
+def read(handle):
+    buffer = _blocks[handle]
+    return ctypes.string_at(buffer, len(buffer))
+
+
+def is_handle(value):
+    return isinstance(value, int) and value in _blocks
+
+
+def GlobalAlloc(flags, size):
+    with _lock:
+        handle = next(_handles)
+        _blocks[handle] = ctypes.create_string_buffer(size)
+    return handle
+
+
+def GlobalLock(handle):
+    buffer = _blocks.get(handle)
+    return ctypes.addressof(buffer) if buffer is not None else None
+
+
+def GlobalUnlock(handle):
+    return True
+
+
+def GlobalSize(handle):
+    buffer = _blocks.get(handle)
+    return len(buffer) if buffer is not None else 0
+
+
+def GlobalFree(handle):
+    with _lock:
+        _blocks.pop(handle, None)
@@ -0,0 +1,175 @@
+"""Shared setup for the benchmark suites.
+
+Importing this module puts ``bench/fakes`` first on ``sys.path``, so
+pyautogui, pyperclip and the pywin32 modules resolve to in-memory fakes on
+any OS - including Windows, so a benchmark never moves the real mouse or
+touches the real clipboard. Screen capture uses the synthetic backend with a
+deterministic desktop image, so results depend only on the code and the
+machine, and can be compared across commits with ``bench/compare.py``.
+"""
+
+import json
+import logging
+import os
+import platform
+import struct
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+SRC = os.path.join(ROOT, "src")
+FAKES = os.path.join(BENCH_DIR, "fakes")
+
+sys.path[:0] = [FAKES, SRC]
+
+import numpy as np  # noqa: E402
+
+import config  # noqa: E402
+
+BACKGROUND = (32, 96, 160)  # Desktop colour; nothing is drawn at (0..39, 0..39)
+
+config.CAPTURE_BACKEND = "synthetic"
+config.WINDOW_EVENTS = False  # No SetWinEventHook; the polling source reads the fake desktop
+config.API_KEY = None
+logging.getLogger().setLevel(logging.ERROR)
+
+import clipboard  # noqa: E402
+import window_manager  # noqa: E402
+import winmem  # noqa: E402
+
+# Direct ctypes calls into kernel32 that the fake modules can't intercept
+clipboard._kernel32 = winmem
+window_manager._process_name = lambda pid: f"app{pid % 7}.exe"
+
+
+# ============================================================
+# Synthetic Desktop
+# ============================================================
+
+def desktop_frame(width=1920, height=1080, seed=0):
+    """A deterministic desktop-like RGB frame: flat background, windows with
+    title bars and rows of glyph-sized blocks standing in for text.
+
+    Flat areas with sharp edges compress like a real screen, unlike noise.
+    """
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 3), np.uint8)
+    frame[:] = BACKGROUND
+    frame[height - 40:] = (24, 24, 28)  # Taskbar
+    for _ in range(max(2, width * height // 400_000)):
+        w = int(rng.integers(width // 5, width // 2))
+        h = int(rng.integers(height // 5, height // 2))
+        x = int(rng.integers(40, max(41, width - w)))
+        y = int(rng.integers(40, max(41, height - 40 - h)))
+        frame[y:y + h, x:x + w] = (250, 250, 250)
+        frame[y:y + 30, x:x + w] = rng.integers(60, 200, 3)  # Title bar
+        cells = (w - 24) // 8
+        gaps = np.arange(cells * 8) % 8 < 6
+        for row in range(y + 44, y + h - 16, 18):
+            line = np.repeat(rng.random(cells) < 0.8, 8) & gaps
+            frame[row:row + 10, x + 12:x + 12 + cells * 8][:, line] = (30, 30, 30)
+    return frame
+
+
+def install_desktop(width=1920, height=1080, seed=0):
+    """Serve ``desktop_frame`` from the synthetic capture backend and the fake pyautogui."""
+    import pyautogui
+    import screenshot
+    frame = desktop_frame(width, height, seed)
+    backend = screenshot.SyntheticBackend(width, height)
+    backend.set_frame(frame)
+    screenshot.set_backend(backend)
+    pyautogui.frame = frame
+    pyautogui.WIDTH, pyautogui.HEIGHT = width, height
+    return frame
+
+
+def dib_bytes(frame):
+    """Pack an RGB frame as a bottom-up 32-bit CF_DIB, as Windows puts it on the clipboard."""
+    height, width = frame.shape[:2]
+    header = struct.pack("<IiiHHIIiiII", 40, width, height, 1, 32, 0, 0, 0, 0, 0, 0)
+    bgra = np.empty((height, width, 4), np.uint8)
+    bgra[..., :3] = frame[::-1, :, ::-1]
+    bgra[..., 3] = 255
+    return header + bgra.tobytes()
+
+
+# ============================================================
+# Server
+# ============================================================
+
+def load_server(workdir):
+    """Import the Flask app against the fakes, with its log file and macros
+    under ``workdir`` and console logging off. Returns the ``server`` module."""
+    config.LOG_FILE = os.path.join(workdir, "server.log")
+    config.LOG_CONSOLE_LEVEL = "CRITICAL"
+    import server
+    server.macro_library = server.macros.MacroLibrary(os.path.join(workdir, "macros"))
+    return server
+
+
+# ============================================================
+# Statistics & Results
+# ============================================================
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))]
+
+
+def latency_stats(latencies, elapsed=None):
+    """Summarize latencies (seconds) as ms percentiles, plus rps over ``elapsed``."""
+    ordered = sorted(latencies)
+    stats = {"count": len(ordered)}
+    if elapsed:
+        stats["rps"] = round(len(ordered) / elapsed, 1)
+    stats["mean_ms"] = round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0
+    for q in (0.5, 0.9, 0.99):
+        stats[f"p{q * 100:g}_ms"] = round(percentile(ordered, q) * 1000, 3)
+    stats["max_ms"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+    return stats
+
+
+def timed(fn, repeat, warmup=1):
+    """Call ``fn`` ``warmup`` + ``repeat`` times; returns the timed durations (seconds)."""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def metadata(args=None):
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "args": vars(args) if args is not None else {},
+    }
+
+
+def write_results(path, results, args=None):
+    """Write ``{"meta", "results"}``; every result has a unique "key" for compare.py."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadata(args), "results": results}, f, indent=2)
+        f.write("\n")
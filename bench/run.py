@@ -0,0 +1,62 @@
+"""Run the benchmark suites and write one JSON results file.
+
+Runs on any OS: pyautogui and pywin32 are replaced by the in-memory fakes in
+bench/fakes, and screenshots come from a deterministic synthetic desktop.
+Compare two result files with bench/compare.py.
+
+    python bench/run.py [--suites routes,encode,actions] [--quick]
+                        [--output bench-<commit>.json] [suite options...]
+"""
+
+import argparse
+import sys
+
+import harness
+
+import bench_actions
+import bench_encode
+import bench_routes
+
+SUITES = {
+    "routes": bench_routes,
+    "encode": bench_encode,
+    "actions": bench_actions,
+}
+
+# Short settings for a smoke run; explicit options still win
+QUICK = {
+    "duration": 0.3,
+    "concurrency": "1,4",
+    "resolutions": "1920x1080",
+    "repeat": 3,
+    "count": 50,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES), help="Comma-separated suites to run")
+    parser.add_argument("--quick", action="store_true", help="Short durations and fewer cases")
+    parser.add_argument("--output", help="JSON results file (default: bench-<commit>.json)")
+    for name, suite in SUITES.items():
+        suite.add_arguments(parser.add_argument_group(name))
+    args = parser.parse_args()
+    if args.quick:
+        for option, value in QUICK.items():
+            if f"--{option}" not in sys.argv:
+                setattr(args, option, value)
+
+    results = []
+    for name in args.suites.split(","):
+        if name not in SUITES:
+            sys.exit(f"Unknown suite: {name} (choose from {', '.join(SUITES)})")
+        print(f"\n== {name} ==")
+        results.extend(SUITES[name].from_args(args))
+
+    output = args.output or f"bench-{harness.metadata()['commit'] or 'local'}.json"
+    harness.write_results(output, results, args)
+    print(f"\n{len(results)} results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,8 @@ pyinstaller --onefile --noconsole --name pc-control-server ^
     --hidden-import win32clipboard ^
     --hidden-import win32api ^
     --hidden-import pywintypes ^
+    --hidden-import mss ^
+    --hidden-import waitress ^
     src\server.py
 if errorlevel 1 (
     echo ERROR: PyInstaller build failed!
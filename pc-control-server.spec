@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('src', 'src')],
-    hiddenimports=['win32gui', 'win32con', 'win32process', 'win32clipboard', 'win32api', 'pywintypes', 'pyperclip'],
+    hiddenimports=['win32gui', 'win32con', 'win32process', 'win32clipboard', 'win32api', 'pywintypes', 'pyperclip', 'mss', 'waitress'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,267 @@
+"""Actions module - action registry and batch executor shared by single routes and batches.
+
+Each action is a handler taking the action's parameter dict and returning a
+result dict. Batches are validated and compiled into (index, handler, params)
+steps before anything runs, so a bad step never leaves a batch half-executed.
+"""
+
+import time
+
+import config
+import input_queue
+import keyboard_control
+import metrics
+import mouse_control
+import screenshot
+import window_manager
+
+ACTIONS = {}
+
+_NUMBER = (int, float)
+FIELD_TYPES = {
+    "x": _NUMBER, "y": _NUMBER, "dx": _NUMBER, "dy": _NUMBER,
+    "start_x": _NUMBER, "start_y": _NUMBER, "end_x": _NUMBER, "end_y": _NUMBER,
+    "duration": _NUMBER, "interval": _NUMBER, "ms": _NUMBER, "scale": _NUMBER,
+    "clicks": int, "quality": int, "hwnd": int,
+    "button": str, "key": str, "text": str, "title": str, "codec": str,
+    "keys": list,
+}
+
+
+class Action:
+    """A registered action handler and its validation rules.
+
+    ``check`` is an optional callable run on well-typed params that returns
+    an error string (or None) for value rules the field types can't express.
+    """
+
+    __slots__ = ("name", "handler", "required", "check")
+
+    def __init__(self, name, handler, required=(), check=None):
+        self.name = name
+        self.handler = handler
+        self.required = required
+        self.check = check
+
+
+class BatchError(Exception):
+    """Raised when a batch fails validation; ``errors`` lists every bad step."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid action(s)")
+        self.errors = errors
+
+
+def action(name, required=(), check=None):
+    """Decorator registering a handler under ``name``."""
+    def register(handler):
+        ACTIONS[name] = Action(name, handler, required, check)
+        return handler
+    return register
+
+
+# ============================================================
+# Mouse Actions
+# ============================================================
+
+@action("click")
+def _click(p):
+    return mouse_control.click(p.get("x"), p.get("y"), p.get("button", "left"), p.get("clicks", 1))
+
+
+@action("double_click")
+def _double_click(p):
+    return mouse_control.double_click(p.get("x"), p.get("y"))
+
+
+@action("right_click")
+def _right_click(p):
+    return mouse_control.right_click(p.get("x"), p.get("y"))
+
+
+@action("move")
+def _move(p):
+    return mouse_control.move_to(p.get("x", 0), p.get("y", 0), p.get("duration", 0))
+
+
+@action("move_relative")
+def _move_relative(p):
+    return mouse_control.move_relative(p.get("dx", 0), p.get("dy", 0), p.get("duration", 0))
+
+
+@action("drag")
+def _drag(p):
+    def drag():
+        # Move to start first
+        mouse_control.move_to(p.get("start_x", 0), p.get("start_y", 0))
+        return mouse_control.drag_to(
+            p.get("end_x", 0), p.get("end_y", 0), p.get("duration", 0.2), p.get("button", "left")
+        )
+    # One queue entry so no other input lands between the move and the drag
+    return input_queue.scheduler.run(drag)
+
+
+@action("scroll")
+def _scroll(p):
+    return mouse_control.scroll(p.get("clicks", 0), p.get("x"), p.get("y"))
+
+
+@action("mouse_down")
+def _mouse_down(p):
+    return mouse_control.mouse_down(p.get("button", "left"), p.get("x"), p.get("y"))
+
+
+@action("mouse_up")
+def _mouse_up(p):
+    return mouse_control.mouse_up(p.get("button", "left"), p.get("x"), p.get("y"))
+
+
+# ============================================================
+# Keyboard Actions
+# ============================================================
+
+@action("type")
+def _type(p):
+    return keyboard_control.type_text(p.get("text", ""), p.get("interval", 0))
+
+
+@action("write_instant")
+def _write_instant(p):
+    return keyboard_control.write_instant(p.get("text", ""))
+
+
+@action("press", required=("key",))
+def _press(p):
+    return keyboard_control.press_key(p.get("key", ""))
+
+
+@action("hotkey", required=("keys",))
+def _hotkey(p):
+    return keyboard_control.hotkey(*p.get("keys", []))
+
+
+@action("key_down", required=("key",))
+def _key_down(p):
+    return keyboard_control.key_down(p.get("key", ""))
+
+
+@action("key_up", required=("key",))
+def _key_up(p):
+    return keyboard_control.key_up(p.get("key", ""))
+
+
+# ============================================================
+# Other Actions
+# ============================================================
+
+def _check_sleep(p):
+    # A sleep holds the batch (and any lease) for its whole length
+    ms = p.get("ms", 100)
+    if ms is not None and not 0 <= ms <= config.ACTION_SLEEP_MAX_MS:
+        return f"Field 'ms' must be between 0 and {config.ACTION_SLEEP_MAX_MS} for sleep"
+    return None
+
+
+@action("sleep", check=_check_sleep)
+def _sleep(p):
+    ms = p.get("ms", 100)
+    time.sleep(ms / 1000)
+    return {"success": True, "slept_ms": ms}
+
+
+@action("screenshot")
+def _screenshot(p):
+    # Raw bytes: the response serializer sends base64 in JSON, native binary otherwise
+    image_data = screenshot.capture_to_bytes(
+        format=p.get("codec", config.SCREENSHOT_FORMAT),
+        quality=p.get("quality", config.SCREENSHOT_QUALITY),
+        scale=p.get("scale", 1.0),
+    )
+    return {"success": True, "image": image_data}
+
+
+@action("focus")
+def _focus(p):
+    return window_manager.focus_window(hwnd=p.get("hwnd"), title=p.get("title"))
+
+
+# ============================================================
+# Validation & Execution
+# ============================================================
+
+def validate(params):
+    """Return an error string for one action dict, or None if it is valid."""
+    if not isinstance(params, dict):
+        return "Action must be an object"
+    action_type = params.get("type", "")
+    spec = ACTIONS.get(action_type)
+    if spec is None:
+        return f"Unknown action type: {action_type}"
+    for field in spec.required:
+        if field not in params:
+            return f"Missing field '{field}' for {action_type}"
+    for field, value in params.items():
+        expected = FIELD_TYPES.get(field)
+        if expected and value is not None and (
+            not isinstance(value, expected) or isinstance(value, bool)
+        ):
+            return f"Field '{field}' has wrong type for {action_type}"
+    if spec.check:
+        return spec.check(params)
+    return None
+
+
+def compile_batch(actions):
+    """Validate every action up front and return (index, handler, params) steps.
+
+    Raises BatchError listing all invalid actions.
+    """
+    if not isinstance(actions, list):
+        raise BatchError([{"index": None, "error": "actions must be a list"}])
+    errors = []
+    steps = []
+    for index, params in enumerate(actions):
+        error = validate(params)
+        if error:
+            errors.append({"index": index, "error": error})
+        elif not errors:
+            steps.append((index, ACTIONS[params["type"]].handler, params))
+    if errors:
+        raise BatchError(errors)
+    return steps
+
+
+_timers = {}  # action type -> histogram
+
+
+def _timer(action_type):
+    histogram = _timers.get(action_type)
+    if histogram is None:
+        histogram = _timers[action_type] = metrics.registry.histogram(
+            "pcc_action_duration_seconds", "Batch action execution time", action=action_type
+        )
+    return histogram
+
+
+def execute(steps, stop_on_error=False, errors_only=False):
+    """Run compiled steps in order, yielding one result dict per reported step."""
+    for index, handler, params in steps:
+        if input_queue.scheduler.cancelled():
+            yield {"index": index, "success": False, "error": "Cancelled"}
+            break
+        start = time.perf_counter()
+        try:
+            result = handler(params)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        _timer(params.get("type", "")).record(time.perf_counter() - start)
+        failed = result.get("success") is False
+        if failed or not errors_only:
+            yield {"index": index, **result}
+        if failed and stop_on_error:
+            break
+
+
+def run(name, params):
+    """Run a single registered action (used by the single-action routes)."""
+    return ACTIONS[name].handler(params)
@@ -1,13 +1,29 @@
 """Clipboard module - handles clipboard get/set operations."""
 
+import win32api
 import win32clipboard
 import win32con
-import io
-from PIL import Image
+import win32gui
+import ctypes
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import config
+import dib
+import encoder
+
+logger = logging.getLogger(__name__)
 
 
 def get_text():
     """Get current clipboard text content."""
+    # Served from the monitor's last read when the clipboard hasn't changed since
+    cached = cached_summary()
+    if cached is not None and cached["kind"] in ("text", "empty"):
+        return {"success": True, "text": cached.get("payload", "")}
     try:
         win32clipboard.OpenClipboard()
         if win32clipboard.IsClipboardFormatAvailable(win32con.CF_UNICODETEXT):
@@ -54,34 +70,502 @@ def clear():
             pass
 
 
-def get_image():
-    """Get clipboard image as base64 PNG (if available)."""
-    import base64
+def _open(hwnd=None, timeout=None):
+    """OpenClipboard, retrying while another process holds it open."""
+    deadline = time.monotonic() + (timeout or config.CLIPBOARD_OPEN_TIMEOUT_MS / 1000)
+    while True:
+        try:
+            win32clipboard.OpenClipboard(hwnd)
+            return
+        except Exception:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.002)
+
+
+_image_cache = OrderedDict()  # (sequence, options) -> encoded result
+_image_lock = threading.Lock()
+_last_image = (None, None)  # (sequence, Frame) of the most recently read image
+
+
+def read_image():
+    """Return (sequence, Frame) for the clipboard image, or (sequence, None) if there is none.
+
+    The DIB is parsed once per clipboard sequence number.
+    """
+    global _last_image
+    sequence = sequence_number()
+    with _image_lock:
+        cached_sequence, frame = _last_image
+    if cached_sequence == sequence:
+        return sequence, frame
+
+    _open()
     try:
-        win32clipboard.OpenClipboard()
-        if win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
-            data = win32clipboard.GetClipboardData(win32con.CF_DIB)
-            # Parse DIB header to get dimensions
-            # This is a simplified approach - use PIL for robust parsing
-            buffer = io.BytesIO()
-            # Create BMP from DIB by adding BMP header
-            bmp_header = b'BM' + (len(data) + 14).to_bytes(4, 'little') + b'\x00\x00\x00\x00\x36\x00\x00\x00'
-            buffer.write(bmp_header)
-            buffer.write(data)
-            buffer.seek(0)
-            image = Image.open(buffer)
-            
-            # Convert to PNG base64
-            png_buffer = io.BytesIO()
-            image.save(png_buffer, format="PNG")
-            png_buffer.seek(0)
-            b64 = base64.b64encode(png_buffer.getvalue()).decode("utf-8")
-            return {"success": True, "image": b64, "format": "png"}
-        return {"success": False, "error": "No image in clipboard"}
+        # Nobody can write while we hold the clipboard open, so this matches the data
+        sequence = sequence_number()
+        if not win32clipboard.IsClipboardFormatAvailable(win32con.CF_DIB):
+            return sequence, None
+        data = win32clipboard.GetClipboardData(win32con.CF_DIB)
+    finally:
+        win32clipboard.CloseClipboard()
+
+    # Parse after releasing the clipboard so other apps aren't blocked
+    frame = dib.parse(data)
+    with _image_lock:
+        _last_image = (sequence, frame)
+    return sequence, frame
+
+
+def encode_image(format="png", quality=None, compress_level=None, scale=1.0,
+                 max_width=None, max_height=None):
+    """Encode the clipboard image, cached per clipboard sequence number and options.
+
+    Returns {"success", "data" (bytes), "format", "width", "height", "sequence"}.
+    """
+    try:
+        codec = encoder.normalize_codec(format)
+        sequence, frame = read_image()
+        if frame is None:
+            return {"success": False, "error": "No image in clipboard"}
+        key = (sequence, codec, quality, compress_level, scale, max_width, max_height)
+        with _image_lock:
+            result = _image_cache.get(key)
+            if result is not None:
+                _image_cache.move_to_end(key)
+                return result
+
+        data = encoder.encode_image(
+            frame, codec=codec, quality=quality, compress_level=compress_level,
+            scale=scale, max_width=max_width, max_height=max_height,
+        )
+        width, height = encoder.output_size((frame.width, frame.height), scale, max_width, max_height)
+        result = {
+            "success": True, "data": data, "format": codec,
+            "width": width, "height": height, "sequence": sequence,
+        }
+        with _image_lock:
+            _image_cache[key] = result
+            while len(_image_cache) > config.CLIPBOARD_IMAGE_CACHE_SIZE:
+                _image_cache.popitem(last=False)
+        return result
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+def get_image(format="png", quality=None, compress_level=None, scale=1.0,
+              max_width=None, max_height=None):
+    """Get clipboard image bytes (PNG by default, if available); JSON responses carry them as base64."""
+    result = encode_image(format, quality, compress_level, scale, max_width, max_height)
+    if not result["success"]:
+        return result
+    return {
+        "success": True,
+        "image": result["data"],
+        "format": result["format"],
+        "width": result["width"],
+        "height": result["height"],
+    }
+
+
+# ============================================================
+# Change Monitor
+# ============================================================
+
+def sequence_number():
+    """Clipboard sequence number; changes on every write and needs no OpenClipboard."""
+    return win32clipboard.GetClipboardSequenceNumber()
+
+
+def summarize():
+    """Describe the current content: formats, kind, size and a SHA-1 hash.
+
+    Text is included under "payload" so subscribers that asked for full
+    content can get it without another round trip; "content" holds the raw
+    bytes (UTF-8 text or the DIB) for the history.
+    """
+    formats = []
+    data = None
+    kind = "empty"
+    win32clipboard.OpenClipboard()
+    try:
+        fmt = win32clipboard.EnumClipboardFormats(0)
+        while fmt:
+            formats.append(fmt)
+            fmt = win32clipboard.EnumClipboardFormats(fmt)
+        if _exclude_format() in formats:
+            kind = "excluded"  # Transient content (e.g. a paste in flight); don't read it
+        elif win32con.CF_UNICODETEXT in formats:
+            data = win32clipboard.GetClipboardData(win32con.CF_UNICODETEXT)
+            kind = "text"
+        elif win32con.CF_DIB in formats:
+            data = win32clipboard.GetClipboardData(win32con.CF_DIB)
+            kind = "image"
+        elif formats:
+            kind = "other"
     finally:
+        win32clipboard.CloseClipboard()
+
+    summary = {"kind": kind, "formats": formats}
+    if data is not None:
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        summary["hash"] = hashlib.sha1(raw).hexdigest()
+        summary["size"] = len(raw)
+        summary["content"] = raw
+        if kind == "text":
+            summary["payload"] = data
+    return summary
+
+
+class ClipboardMonitor:
+    """Watches the clipboard sequence number on a background thread and calls
+    listeners with a content summary whenever it changes."""
+
+    def __init__(self, interval=None, sequence=sequence_number, summarize=summarize):
+        self.interval = interval or config.CLIPBOARD_POLL_INTERVAL_MS / 1000
+        self.sequence = None
+        self.last = None
+        self._get_sequence = sequence
+        self._summarize = summarize
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        """Call ``callback(summary)`` after each clipboard change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
         try:
-            win32clipboard.CloseClipboard()
-        except:
+            self._listeners.remove(callback)
+        except ValueError:
             pass
+
+    def check(self):
+        """Publish a summary if the sequence number moved. Returns True if it did."""
+        sequence = self._get_sequence()
+        if sequence == self.sequence:
+            return False
+        summary = None
+        for _ in range(5):
+            try:
+                summary = self._summarize()
+                break
+            except Exception:
+                time.sleep(0.01)  # Writer still holds the clipboard open
+        if summary is None:
+            return False  # Retry on the next tick
+        self.sequence = sequence
+        if summary["kind"] == "excluded":
+            return False
+        if self.last is not None and summary.get("hash") == self.last.get("hash") \
+                and summary["kind"] == self.last["kind"]:
+            self.last["sequence"] = sequence
+            return False  # Rewritten with identical content
+        summary["sequence"] = sequence
+        self.last = summary
+        for callback in list(self._listeners):
+            try:
+                callback(summary)
+            except Exception:
+                logger.exception("Clipboard listener failed")
+        return True
+
+    def start(self):
+        # Prime with the current content so only later changes are reported
+        self.sequence = self._get_sequence()
+        try:
+            self.last = self._summarize()
+            self.last["sequence"] = self.sequence
+        except Exception:
+            self.last = None
+        self._thread = threading.Thread(target=self._run, name="clipboard-monitor", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Clipboard monitor check failed")
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def cached_summary():
+    """The monitor's summary of the current content, or None if it may be stale."""
+    monitor = _monitor
+    if monitor is None or monitor.last is None:
+        return None
+    try:
+        if sequence_number() != monitor.sequence or monitor.last.get("sequence") != monitor.sequence:
+            return None
+    except Exception:
+        return None
+    return monitor.last
+
+
+def get_monitor():
+    """Return the shared clipboard monitor, starting it on first use."""
+    global _monitor
+    if _monitor is None:
+        with _monitor_lock:
+            if _monitor is None:
+                _monitor = ClipboardMonitor().start()
+    return _monitor
+
+
+# ============================================================
+# Paste Transactions
+# ============================================================
+
+WM_RENDERFORMAT = 0x0305
+WM_RENDERALLFORMATS = 0x0306
+WM_DESTROYCLIPBOARD = 0x0307
+HWND_MESSAGE = -3
+GMEM_MOVEABLE = 0x0002
+
+# Formats Windows synthesizes from another saved format; they come back on their own
+_SYNTHESIZED_FORMATS = {
+    1,    # CF_TEXT (from CF_UNICODETEXT)
+    7,    # CF_OEMTEXT
+    16,   # CF_LOCALE
+    17,   # CF_DIBV5 (from CF_DIB)
+    2,    # CF_BITMAP (from CF_DIB, which Windows synthesizes for bitmap-only content)
+    9,    # CF_PALETTE (goes with the bitmap)
+}
+# Formats backed by GDI handles or owned by the source window; they can't be
+# copied as raw memory and are NOT restored. Content that exists only in
+# these (a metafile-only copy from an old drawing app) is lost by a paste
+# and reported in ``unrestored_formats``.
+_UNRESTORABLE_FORMATS = {
+    3,    # CF_METAFILEPICT
+    14,   # CF_ENHMETAFILE
+    0x80, # CF_OWNERDISPLAY
+    0x82, # CF_DSPBITMAP
+    0x83, # CF_DSPMETAFILEPICT
+    0x8E, # CF_DSPENHMETAFILE
+}
+_SKIP_FORMATS = _SYNTHESIZED_FORMATS | _UNRESTORABLE_FORMATS
+
+_kernel32 = ctypes.windll.kernel32 if hasattr(ctypes, "windll") else None
+if _kernel32 is not None:
+    _kernel32.GlobalLock.restype = ctypes.c_void_p
+    _kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+    _kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+    _kernel32.GlobalSize.restype = ctypes.c_size_t
+    _kernel32.GlobalSize.argtypes = [ctypes.c_void_p]
+    _kernel32.GlobalAlloc.restype = ctypes.c_void_p
+    _kernel32.GlobalAlloc.argtypes = [ctypes.c_uint, ctypes.c_size_t]
+
+
+def _exclude_format():
+    # Honored by Windows clipboard history and well-behaved clipboard managers
+    return win32clipboard.RegisterClipboardFormat("ExcludeClipboardContentFromMonitorProcessing")
+
+
+def _read_raw(fmt):
+    handle = win32clipboard.GetClipboardDataHandle(fmt)
+    size = _kernel32.GlobalSize(handle)
+    pointer = _kernel32.GlobalLock(handle)
+    if not pointer:
+        return None
+    try:
+        return ctypes.string_at(pointer, size)
+    finally:
+        _kernel32.GlobalUnlock(handle)
+
+
+def _write_raw(fmt, data):
+    handle = _kernel32.GlobalAlloc(GMEM_MOVEABLE, max(1, len(data)))
+    pointer = _kernel32.GlobalLock(handle)
+    ctypes.memmove(pointer, data, len(data))
+    _kernel32.GlobalUnlock(handle)
+    win32clipboard.SetClipboardData(fmt, handle)  # Clipboard takes ownership of the handle
+
+
+def save_all(unrestorable=None):
+    """Snapshot every copyable format as raw bytes. Returns [(format, bytes)].
+
+    Formats present that can't be snapshotted are appended to ``unrestorable``.
+    """
+    saved = []
+    _open()
+    try:
+        fmt = win32clipboard.EnumClipboardFormats(0)
+        while fmt:
+            if fmt in _UNRESTORABLE_FORMATS and unrestorable is not None:
+                unrestorable.append(fmt)
+            if fmt not in _SKIP_FORMATS:
+                try:
+                    data = _read_raw(fmt)
+                except Exception:
+                    data = None  # Delayed-render format whose owner failed to render
+                if data is not None:
+                    saved.append((fmt, data))
+            fmt = win32clipboard.EnumClipboardFormats(fmt)
+    finally:
+        win32clipboard.CloseClipboard()
+    return saved
+
+
+class ClipboardOwner:
+    """Hidden message-only window that owns the clipboard during a paste.
+
+    Text is offered with delayed rendering, so Windows tells us (via
+    WM_RENDERFORMAT) the moment the target application actually reads it,
+    and WM_DESTROYCLIPBOARD tells us if someone else replaced the content.
+    """
+
+    CLASS_NAME = "PcControlClipboardOwner"
+
+    def __init__(self):
+        self.hwnd = None
+        self.rendered = threading.Event()
+        self.lost = threading.Event()
+        self.settled = threading.Event()  # Set by either of the above
+        self._text = None
+        self._offering = False
+        self._ready = threading.Event()
+        thread = threading.Thread(target=self._run, name="clipboard-owner", daemon=True)
+        thread.start()
+        if not self._ready.wait(2) or not self.hwnd:
+            raise OSError("Could not create clipboard owner window")
+
+    def _run(self):
+        wc = win32gui.WNDCLASS()
+        wc.lpfnWndProc = self._wndproc
+        wc.lpszClassName = self.CLASS_NAME
+        wc.hInstance = win32api.GetModuleHandle(None)
+        try:
+            atom = win32gui.RegisterClass(wc)
+            self.hwnd = win32gui.CreateWindow(
+                atom, "", 0, 0, 0, 0, 0, HWND_MESSAGE, 0, wc.hInstance, None
+            )
+        finally:
+            self._ready.set()
+        win32gui.PumpMessages()
+
+    def _wndproc(self, hwnd, msg, wparam, lparam):
+        if msg == WM_RENDERFORMAT:
+            # Inside WM_RENDERFORMAT the requester has the clipboard open already
+            if wparam == win32con.CF_UNICODETEXT and self._text is not None:
+                win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, self._text)
+            self.rendered.set()
+            self.settled.set()
+            return 0
+        if msg == WM_RENDERALLFORMATS:
+            if self._offering and self._text is not None:
+                win32clipboard.OpenClipboard(hwnd)
+                win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, self._text)
+                win32clipboard.CloseClipboard()
+            return 0
+        if msg == WM_DESTROYCLIPBOARD:
+            if self._offering:
+                self.lost.set()
+                self.settled.set()
+            return 0
+        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+    def offer(self, text):
+        """Take the clipboard and promise ``text``, rendered only when read."""
+        self.rendered.clear()
+        self.lost.clear()
+        self.settled.clear()
+        self._offering = False
+        self._text = text
+        _open(self.hwnd)
+        try:
+            win32clipboard.EmptyClipboard()
+            self._offering = True
+            win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, None)
+            _write_raw(_exclude_format(), b"\x00")
+            _write_raw(win32clipboard.RegisterClipboardFormat("CanIncludeInClipboardHistory"),
+                       (0).to_bytes(4, "little"))
+        finally:
+            win32clipboard.CloseClipboard()
+
+    def restore(self, saved, timeout=None):
+        """Put a ``save_all`` snapshot back, unless someone else took the
+        clipboard or the offer never emptied it.
+
+        Waits up to ``timeout`` (CLIPBOARD_RESTORE_TIMEOUT_MS) for a slow reader
+        to close the clipboard. If that still fails the error propagates and
+        the offered text stays renderable rather than an empty promise.
+        """
+        if not self._offering or self.lost.is_set():
+            self._offering = False
+            self._text = None
+            return False
+        # Succeeds only once the reader has closed the clipboard
+        _open(self.hwnd, timeout or config.CLIPBOARD_RESTORE_TIMEOUT_MS / 1000)
+        try:
+            if self.lost.is_set():
+                self._offering = False
+                self._text = None
+                return False
+            self._offering = False
+            win32clipboard.EmptyClipboard()
+            for fmt, data in saved:
+                _write_raw(fmt, data)
+            self._text = None
+        finally:
+            win32clipboard.CloseClipboard()
+        return True
+
+
+_owner = None
+_owner_lock = threading.Lock()
+
+
+def get_owner():
+    global _owner
+    if _owner is None:
+        with _owner_lock:
+            if _owner is None:
+                _owner = ClipboardOwner()
+    return _owner
+
+
+def paste_text(text, send_paste, timeout=None):
+    """Paste ``text`` through the clipboard and put the previous content back.
+
+    Every format is saved first; ``send_paste`` (e.g. a ctrl+v hotkey) runs
+    once the text is offered. Restoring waits for the target to read the
+    text - signalled by WM_RENDERFORMAT - instead of a fixed sleep, and is
+    skipped if another program replaced the clipboard in the meantime. The
+    restore runs even if ``send_paste`` raises (e.g. pyautogui's failsafe).
+    """
+    timeout = (timeout or config.WRITE_INSTANT_TIMEOUT_MS) / 1000
+    start = time.perf_counter()
+    owner = get_owner()
+    unrestorable = []
+    saved = save_all(unrestorable)
+    pasted = None
+    try:
+        owner.offer(text)
+        # Anything that read the offer before our paste (a clipboard manager) used up the signal
+        early = owner.rendered.is_set()
+        send_paste()
+        if early:
+            time.sleep(config.WRITE_INSTANT_FALLBACK_MS / 1000)
+        else:
+            owner.settled.wait(timeout)
+            pasted = owner.rendered.is_set()
+    finally:
+        restored = owner.restore(saved)
+    result = {
+        "success": True,
+        "pasted": pasted,
+        "restored": restored,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    if unrestorable:
+        result["unrestored_formats"] = unrestorable
+    return result
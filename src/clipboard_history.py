@@ -0,0 +1,180 @@
+"""Clipboard history module - ring buffer of recent clipboard contents.
+
+Entries (metadata only) live in a bounded ring; content is stored once per
+SHA-1 hash, so copying the same text ten times costs one blob. Blobs are
+kept in memory up to a byte cap with LRU eviction. When a spill file is
+configured, evicted blobs move to a fixed-size memory-mapped ring file
+instead of being dropped, and are read back from there on demand.
+"""
+
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SpillStore:
+    """Fixed-size memory-mapped ring file holding evicted blobs by hash."""
+
+    def __init__(self, path, capacity):
+        self.path = path
+        self.capacity = capacity
+        self._index = {}  # hash -> (offset, length)
+        self._offset = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.truncate(capacity)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+
+    def put(self, digest, data):
+        if len(data) > self.capacity or digest in self._index:
+            return digest in self._index
+        if self._offset + len(data) > self.capacity:
+            self._offset = 0
+        start, end = self._offset, self._offset + len(data)
+        # Forget whatever the new blob overwrites
+        for key, (offset, length) in list(self._index.items()):
+            if offset < end and start < offset + length:
+                del self._index[key]
+        self._map[start:end] = data
+        self._index[digest] = (start, len(data))
+        self._offset = end
+        return True
+
+    def get(self, digest):
+        location = self._index.get(digest)
+        if location is None:
+            return None
+        offset, length = location
+        return self._map[offset:offset + length]
+
+    def __contains__(self, digest):
+        return digest in self._index
+
+    def used(self):
+        return sum(length for _, length in self._index.values())
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class ClipboardHistory:
+    """Bounded clipboard history with content-addressed, deduplicated storage."""
+
+    def __init__(self, max_entries=100, max_bytes=64 * 1024 * 1024, spill=None):
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self._entries = deque(maxlen=max_entries)
+        self._blobs = OrderedDict()  # hash -> bytes, least recently used first
+        self._bytes = 0
+        self._ids = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    # -------------------------------------------------------- recording
+
+    def record(self, summary):
+        """Add a clipboard monitor summary; its raw bytes are under "content"."""
+        content = summary.get("content")
+        digest = summary.get("hash")
+        with self._lock:
+            if self._entries and digest and self._entries[-1]["hash"] == digest:
+                return None  # Same content written again
+            self._ids += 1
+            entry = {
+                "id": self._ids,
+                "time": time.time(),
+                "sequence": summary.get("sequence"),
+                "kind": summary.get("kind"),
+                "formats": summary.get("formats", []),
+                "hash": digest,
+                "size": summary.get("size", 0),
+            }
+            self._entries.append(entry)
+            if digest and content is not None:
+                self._store(digest, bytes(content))
+            return entry
+
+    def _store(self, digest, data):
+        if digest in self._blobs:
+            self._blobs.move_to_end(digest)
+            return
+        if len(data) > self.max_bytes:
+            # Larger than the whole memory budget: never hold it in memory
+            self.evicted += 1
+            if self.spill is not None:
+                self.spill.put(digest, data)
+            return
+        self._blobs[digest] = data
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            old_digest, old = self._blobs.popitem(last=False)
+            self._bytes -= len(old)
+            self.evicted += 1
+            if self.spill is not None:
+                self.spill.put(old_digest, old)
+
+    # -------------------------------------------------------- reading
+
+    def content(self, digest):
+        """Return the stored bytes for ``digest`` (memory, then spill), or None."""
+        with self._lock:
+            data = self._blobs.get(digest)
+            if data is not None:
+                self._blobs.move_to_end(digest)
+                return data
+            if self.spill is not None:
+                return self.spill.get(digest)
+        return None
+
+    def available(self, digest):
+        return digest in self._blobs or (self.spill is not None and digest in self.spill)
+
+    def get(self, entry_id):
+        with self._lock:
+            for entry in reversed(self._entries):
+                if entry["id"] == entry_id:
+                    return dict(entry, available=self.available(entry["hash"]))
+        return None
+
+    def query(self, start=None, end=None, limit=50, kind=None):
+        """Entries with ``start <= id <= end`` (newest first), optionally one ``kind``.
+
+        Negative ``start`` counts back from the newest entry (-10 = last ten).
+        """
+        with self._lock:
+            entries = list(self._entries)
+            newest = self._ids
+        if start is not None and start < 0:
+            start = newest + start + 1
+        results = []
+        for entry in reversed(entries):
+            if end is not None and entry["id"] > end:
+                continue
+            if start is not None and entry["id"] < start:
+                break
+            if kind and entry["kind"] != kind:
+                continue
+            results.append(dict(entry, available=self.available(entry["hash"])))
+            if limit and len(results) >= limit:
+                break
+        return results
+
+    def latest(self):
+        with self._lock:
+            return dict(self._entries[-1]) if self._entries else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._entries.maxlen,
+                "blobs": len(self._blobs),
+                "memory_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evicted": self.evicted,
+                "spill_bytes": self.spill.used() if self.spill is not None else None,
+            }
@@ -4,14 +4,84 @@
 HOST = "127.0.0.1"  # Localhost only - no external access
 PORT = 5000
 API_KEY = None  # Set to a string to enable authentication (e.g., "my-secret-key")
+INPUT_STREAM_PORT = 5001  # Persistent TCP input channel (0 = disabled)
+INPUT_STREAM_MAX_LINE = 1024 * 1024  # Longest command line (bytes); longer closes the connection
+SERVER_MODE = "waitress"  # "waitress" (production, falls back if missing) or "dev" (Flask dev server)
+SERVER_THREADS = 16  # Waitress worker threads; each open stream or blocking wait holds one
+SERVER_LONG_REQUESTS = 8  # Open streams/waits at once (503 beyond); the other threads stay free for short calls
+SERVER_CONNECTION_LIMIT = 100  # Waitress max simultaneous connections before it stops accepting
+SERVER_CHANNEL_TIMEOUT = 120  # Seconds before an idle connection is closed
 
-# Logging
-LOG_LEVEL = "INFO"
-LOG_FILE = "logs/server.log"
+# Input scheduling (see input_queue.py)
+INPUT_BULK_EVERY = 8  # Let one bulk call through after this many consecutive interactive calls
+INPUT_LEASE_TTL_S = 30  # Default exclusive-input lease length
+INPUT_LEASE_MAX_TTL_S = 300  # Longest lease a client may ask for (renew to keep it longer)
+ACTION_SLEEP_MAX_MS = 60000  # Longest "sleep" step a batch or macro may contain
+INPUT_TYPE_CHUNK = 256  # Characters typed per queue entry (0 = whole text at once)
+TEXT_INPUT_ENGINE = "sendinput"  # "sendinput" (batched Unicode events) or "pyautogui" (legacy path)
+TEXT_INPUT_BATCH = 512  # Key events per SendInput call (2 per character)
+TEXT_INPUT_BATCH_DELAY_MS = 0  # Pause between batches, for apps that drop events under load
+
+# Profiling (/api/debug/profile and ?profile=1; disabled unless API_KEY is set)
+PROFILE_MAX_SECONDS = 60  # Longest sampling run a request may ask for
+
+# Logging (records are queued and written as JSON lines by a background thread)
+LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR; lower-level calls cost almost nothing
+LOG_FILE = "logs/server.log"  # Relative to the base directory
+LOG_CONSOLE_LEVEL = "INFO"
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotate the file at this size
+LOG_BACKUP_COUNT = 3
+LOG_QUEUE_SIZE = 10000  # Records waiting for the writer; beyond this they are dropped, never blocking
+LOG_FLUSH_RECORDS = 256  # Flush at least every N records while a burst drains
+LOG_REQUESTS = True  # One record per request with request_id, method, route, status and duration_ms
+
+# Serialization (Accept / Content-Type: application/json, application/msgpack, application/cbor)
+JSON_LIBRARY = "auto"  # "auto" (orjson if installed), "orjson" or "json" (stdlib)
 
 # Screenshot settings
+CAPTURE_BACKEND = "pyautogui"  # "pyautogui", "mss" (raw BGRA, fastest) or "synthetic" (tests)
 SCREENSHOT_FORMAT = "JPEG"
 SCREENSHOT_QUALITY = 85
+PNG_COMPRESS_LEVEL = 1  # 0-9; low levels encode several times faster than PIL's default 6
+ENCODER_WORKERS = 4  # Threads encoding images in parallel (PIL releases the GIL)
+FRAME_CACHE_MAX_AGE_MS = 30  # Share one capture between requests this close together (0 = off)
+
+# Screen stream settings (dirty-rectangle streaming)
+STREAM_FPS = 10
+STREAM_TILE_SIZE = 64  # Pixels per tile edge for change detection
+STREAM_KEYFRAME_INTERVAL = 30  # Send a full frame every N frames
+
+# Template matching
+TEMPLATE_CACHE_SIZE = 32  # Max decoded templates kept in memory (LRU)
+TEMPLATE_COARSE_FACTOR = 4  # Downscale factor for the coarse search pass
+
+# Screen waits (adaptive polling)
+WAIT_MIN_INTERVAL_MS = 15  # Poll interval right after the screen changes
+WAIT_MAX_INTERVAL_MS = 200  # Poll interval ceiling while the screen is static
+WAIT_MAX_TIMEOUT_S = 120  # Longest timeout /api/screen/wait and /api/windows/wait accept
+
+# Window registry
+WINDOW_EVENTS = True  # Keep the window snapshot current via SetWinEventHook
+WINDOW_POLL_INTERVAL_MS = 250  # Re-enumeration interval when event hooks are unavailable
+WINDOW_RESYNC_INTERVAL_MS = 5000  # Safety-net re-enumeration while hooks are active
+
+# Event stream (/api/events)
+EVENT_QUEUE_SIZE = 256  # Max queued events per subscriber before the drop policy applies
+EVENT_DROP_POLICY = "drop_oldest"  # drop_oldest, drop_newest or disconnect
+EVENT_HEARTBEAT_S = 15  # Keepalive comment interval on idle streams
+CLIPBOARD_POLL_INTERVAL_MS = 100  # Clipboard sequence number check interval
+
+# Clipboard paste (write_instant)
+WRITE_INSTANT_TIMEOUT_MS = 1000  # Max wait for the target app to read the pasted text
+WRITE_INSTANT_FALLBACK_MS = 50  # Fixed wait when a clipboard manager consumed the read signal
+CLIPBOARD_OPEN_TIMEOUT_MS = 500  # Retry OpenClipboard this long while another app holds it
+CLIPBOARD_RESTORE_TIMEOUT_MS = 5000  # Restoring after a paste waits this long for a slow reader
+CLIPBOARD_IMAGE_CACHE_SIZE = 8  # Encoded clipboard images kept per sequence number/options
+
+# Clipboard history (/api/clipboard/history)
+CLIPBOARD_HISTORY_SIZE = 100  # Entries kept (0 = history disabled)
+CLIPBOARD_HISTORY_MAX_MB = 64  # In-memory content cap; least recently used content is evicted
+CLIPBOARD_HISTORY_SPILL_MB = 0  # Size of the mmap spill file for evicted content (0 = drop it)
 
 # pyautogui settings
 FAILSAFE = False  # Disable failsafe (moving mouse to corner won't stop)
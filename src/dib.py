@@ -0,0 +1,98 @@
+"""DIB module - decodes clipboard device-independent bitmaps (CF_DIB).
+
+The header is parsed properly (BITMAPINFOHEADER through BITMAPV5HEADER,
+BI_RGB / BI_BITFIELDS, palettes, top-down and bottom-up rows) instead of
+assuming pixels start at a fixed offset. The common 24/32-bit layouts are
+wrapped as NumPy views of the clipboard bytes - bottom-up rows become a
+negative-stride view - so nothing is copied before encoding.
+"""
+
+import struct
+
+import numpy as np
+
+from screenshot import Frame
+
+BI_RGB = 0
+BI_BITFIELDS = 3
+BI_ALPHABITFIELDS = 6
+
+_HEADER = struct.Struct("<IiiHHIIiiII")
+
+
+class DibError(ValueError):
+    """Raised for DIB data that can't be decoded."""
+
+
+def _masks(data, size, compression, bitcount):
+    """Return (red, green, blue) channel masks and the number of bytes they occupy."""
+    if compression in (BI_BITFIELDS, BI_ALPHABITFIELDS):
+        count = 4 if compression == BI_ALPHABITFIELDS else 3
+        if size >= 52:  # V2+ headers carry the masks inside the header
+            return struct.unpack_from("<III", data, 40), 0
+        return struct.unpack_from("<III", data, size), count * 4
+    if bitcount == 16:
+        return (0x7C00, 0x03E0, 0x001F), 0  # BI_RGB 16-bit is 5-5-5
+    return (0xFF0000, 0x00FF00, 0x0000FF), 0
+
+
+def _channel(values, mask):
+    """Extract one masked channel from packed pixels, scaled to 0-255."""
+    if not mask:
+        return np.zeros(values.shape, np.uint8)
+    shift = (mask & -mask).bit_length() - 1
+    top = mask >> shift
+    channel = (values >> shift) & top
+    return (channel * 255 // top).astype(np.uint8) if top != 255 else channel.astype(np.uint8)
+
+
+def parse(data):
+    """Decode DIB bytes into a screenshot Frame (RGB or BGRA view of ``data`` when possible)."""
+    if len(data) < _HEADER.size:
+        raise DibError("DIB data too short")
+    (size, width, height, planes, bitcount, compression,
+     _image_size, _xppm, _yppm, colors_used, _important) = _HEADER.unpack_from(data)
+    if size < 40 or width <= 0 or height == 0:
+        raise DibError("Unsupported DIB header")
+    if compression not in (BI_RGB, BI_BITFIELDS, BI_ALPHABITFIELDS):
+        raise DibError(f"Unsupported DIB compression: {compression}")
+
+    top_down = height < 0
+    height = abs(height)
+    masks, mask_bytes = _masks(data, size, compression, bitcount)
+    palette_size = colors_used or (1 << bitcount if bitcount <= 8 else 0)
+    offset = size + mask_bytes + palette_size * 4
+    stride = (width * bitcount + 31) // 32 * 4
+    if len(data) < offset + stride * height:
+        raise DibError("DIB pixel data truncated")
+
+    rows = np.frombuffer(data, np.uint8, stride * height, offset).reshape(height, stride)
+    if not top_down:
+        rows = rows[::-1]  # View with negative stride, no copy
+
+    if bitcount == 32 and masks == (0xFF0000, 0x00FF00, 0x0000FF):
+        return Frame(rows.reshape(height, stride // 4, 4)[:, :width], "BGRA")
+    if bitcount == 24 and masks == (0xFF0000, 0x00FF00, 0x0000FF):
+        return Frame(rows[:, :width * 3].reshape(height, width, 3)[..., ::-1], "RGB")
+
+    if bitcount in (16, 32):
+        dtype = np.dtype("<u2" if bitcount == 16 else "<u4")
+        values = np.ascontiguousarray(rows).view(dtype)[:, :width].astype(np.uint32)
+        pixels = np.stack([_channel(values, mask) for mask in masks], axis=-1)
+        return Frame(pixels, "RGB")
+
+    if bitcount in (1, 2, 4, 8):
+        palette = np.frombuffer(data, np.uint8, palette_size * 4, size + mask_bytes)
+        palette = palette.reshape(palette_size, 4)[:, 2::-1]  # RGBQUAD -> RGB
+        if bitcount == 8:
+            indices = rows[:, :width]
+        else:
+            bits = np.unpackbits(rows, axis=1)
+            per_pixel = bits[:, :width * bitcount].reshape(height, width, bitcount)
+            weights = (1 << np.arange(bitcount - 1, -1, -1)).astype(np.uint8)
+            indices = (per_pixel * weights).sum(axis=2)
+        indices = np.minimum(indices, palette_size - 1)
+        return Frame(palette[indices], "RGB")
+
+    raise DibError(f"Unsupported DIB bit depth: {bitcount}")
+
@@ -0,0 +1,119 @@
+"""Encoder module - image encoding on a worker pool with selectable codecs."""
+
+import base64
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import config
+
+CODECS = {"jpeg": "JPEG", "png": "PNG", "webp": "WEBP"}
+MIME_TYPES = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "raw": "application/octet-stream",
+}
+
+# PIL releases the GIL while encoding, so threads encode in parallel
+_pool = ThreadPoolExecutor(max_workers=config.ENCODER_WORKERS, thread_name_prefix="encoder")
+
+
+def normalize_codec(codec):
+    """Map "JPEG"/"jpg"/"png"/... to a codec key, raising ValueError if unsupported."""
+    codec = (codec or "jpeg").lower()
+    if codec == "jpg":
+        codec = "jpeg"
+    if codec not in MIME_TYPES:
+        raise ValueError(f"Unsupported codec: {codec}")
+    return codec
+
+
+def to_image(source):
+    """Accept a PIL image, screenshot Frame or HxWx3 array and return a PIL image."""
+    if isinstance(source, Image.Image):
+        return source
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(np.ascontiguousarray(source))
+    return source.image()
+
+
+def _factor(size, scale=1.0, max_width=None, max_height=None):
+    width, height = size
+    factor = min(scale or 1.0, 1.0)
+    if max_width:
+        factor = min(factor, max_width / width)
+    if max_height:
+        factor = min(factor, max_height / height)
+    return factor
+
+
+def output_size(size, scale=1.0, max_width=None, max_height=None):
+    """Return the (width, height) ``resize`` produces for an image of ``size``."""
+    factor = _factor(size, scale, max_width, max_height)
+    if factor >= 1.0:
+        return size
+    reduce_by = round(1 / factor)
+    if abs(1 / factor - reduce_by) < 1e-6 and reduce_by > 1:
+        return -(-size[0] // reduce_by), -(-size[1] // reduce_by)
+    return max(1, round(size[0] * factor)), max(1, round(size[1] * factor))
+
+
+def resize(image, scale=1.0, max_width=None, max_height=None):
+    """Downscale by ``scale`` and/or to fit within max dimensions (never upscales)."""
+    factor = _factor(image.size, scale, max_width, max_height)
+    if factor >= 1.0:
+        return image
+
+    reduce_by = round(1 / factor)
+    if abs(1 / factor - reduce_by) < 1e-6 and reduce_by > 1:
+        return image.reduce(reduce_by)
+    return image.resize(output_size(image.size, scale, max_width, max_height), Image.BILINEAR)
+
+
+def encode(source, codec="jpeg", quality=None, compress_level=None, scale=1.0,
+           max_width=None, max_height=None):
+    """Encode an image to bytes on the calling thread.
+
+    ``codec`` is jpeg, png, webp or raw (packed RGB pixels, no container).
+    """
+    codec = normalize_codec(codec)
+    image = resize(to_image(source), scale, max_width, max_height)
+    if codec == "raw":
+        # Always 3 bytes per pixel: clients size the buffer from X-Image-Mode: RGB
+        return (image if image.mode == "RGB" else image.convert("RGB")).tobytes()
+    if image.mode not in ("RGB", "L") and codec == "jpeg":
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    if codec == "jpeg":
+        image.save(buffer, format="JPEG", quality=quality or config.SCREENSHOT_QUALITY)
+    elif codec == "webp":
+        image.save(buffer, format="WEBP", quality=quality or config.SCREENSHOT_QUALITY, method=0)
+    else:
+        level = config.PNG_COMPRESS_LEVEL if compress_level is None else compress_level
+        image.save(buffer, format="PNG", compress_level=level)
+    return buffer.getvalue()
+
+
+def submit(source, **options):
+    """Queue an encode on the worker pool. Returns a Future of bytes."""
+    return _pool.submit(encode, source, **options)
+
+
+def encode_image(source, **options):
+    """Encode on the worker pool and wait for the result."""
+    return submit(source, **options).result()
+
+
+def encode_many(sources, **options):
+    """Encode several images in parallel, preserving order."""
+    futures = [submit(source, **options) for source in sources]
+    return [future.result() for future in futures]
+
+
+def encode_base64(source, **options):
+    """Encode on the worker pool and return a base64 string."""
+    return base64.b64encode(encode_image(source, **options)).decode("ascii")
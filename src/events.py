@@ -0,0 +1,210 @@
+"""Events module - fan-out event bus behind the ``/api/events`` SSE stream.
+
+Publishers (the window registry, the clipboard monitor) call ``bus.publish``;
+each subscriber owns a bounded queue, so a slow client never blocks a
+publisher or other clients. When a queue is full its drop policy decides
+what happens:
+
+    drop_oldest   discard the oldest queued event (default)
+    drop_newest   discard the incoming event
+    disconnect    close the subscription; the client reconnects and resyncs
+
+Dropped counts are reported to the client in a ``dropped`` event.
+"""
+
+import collections
+import itertools
+import json
+import threading
+import time
+
+import config
+
+DROP_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+# Registry event -> published topic
+WINDOW_TOPICS = {
+    "foreground": "focus",
+    "create": "window.open",
+    "show": "window.open",
+    "destroy": "window.close",
+    "move": "window.move",
+    "minimize": "window.move",
+    "restore": "window.move",
+    "name": "window.title",
+}
+
+
+class Subscription:
+    """One subscriber's bounded event queue."""
+
+    def __init__(self, topics=None, maxsize=None, policy=None, payload=False):
+        policy = policy or config.EVENT_DROP_POLICY
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.topics = tuple(topics) if topics else None
+        self.maxsize = max(1, maxsize or config.EVENT_QUEUE_SIZE)
+        self.policy = policy
+        self.payload = payload
+        self.dropped = 0
+        self.closed = False
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+
+    def wants(self, topic):
+        """Topics match exactly or by prefix ("window" matches "window.open")."""
+        if self.topics is None:
+            return True
+        return any(topic == t or topic.startswith(t + ".") for t in self.topics)
+
+    def put(self, event):
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    return
+                if self.policy == "disconnect":
+                    self.closed = True
+                    self._cond.notify()
+                    return
+                self._queue.popleft()
+            self._queue.append(event)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the next event, or None on timeout / close."""
+        with self._cond:
+            if not self._queue and not self.closed:
+                self._cond.wait(timeout)
+            if self._queue:
+                return self._queue.popleft()
+            return None
+
+    def take_dropped(self):
+        with self._cond:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+
+    def __len__(self):
+        return len(self._queue)
+
+
+class EventBus:
+    """Fans published events out to every matching subscription."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, topics=None, maxsize=None, policy=None, payload=False):
+        subscription = Subscription(topics, maxsize, policy, payload)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            try:
+                self._subscribers.remove(subscription)
+            except ValueError:
+                pass
+
+    def publish(self, topic, data):
+        """Queue ``data`` for every subscriber of ``topic``. Never blocks."""
+        event = {"id": next(self._ids), "topic": topic, "time": time.time(), "data": data}
+        self.published += 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.wants(topic):
+                subscription.put(event)
+        return event
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "published": self.published,
+            "subscribers": [
+                {
+                    "topics": list(s.topics) if s.topics else None,
+                    "queued": len(s),
+                    "maxsize": s.maxsize,
+                    "policy": s.policy,
+                    "dropped": s.dropped,
+                }
+                for s in subscribers
+            ],
+        }
+
+
+def format_sse(topic, data, event_id=None):
+    """Render one Server-Sent Events message (no id for out-of-band notices)."""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {topic}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def stream(bus, subscription, heartbeat=None):
+    """Yield SSE messages for a subscription until the client goes away.
+
+    Full payloads (clipboard text) are only sent to subscriptions that asked
+    for them; everyone else gets hashes and sizes.
+    """
+    heartbeat = heartbeat or config.EVENT_HEARTBEAT_S
+    try:
+        yield "retry: 1000\n\n"
+        while True:
+            event = subscription.get(heartbeat)
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield format_sse("dropped", {"count": dropped})
+            if event is None:
+                if subscription.closed:
+                    yield format_sse("overflow", {"policy": subscription.policy})
+                    return
+                yield ": keepalive\n\n"
+                continue
+            data = event["data"]
+            if not subscription.payload and isinstance(data, dict) and "payload" in data:
+                data = {k: v for k, v in data.items() if k != "payload"}
+            yield format_sse(event["topic"], data, event["id"])
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def window_publisher(bus):
+    """Return a window registry listener that publishes focus/window events."""
+    def on_window_event(event, hwnd, info):
+        topic = WINDOW_TOPICS.get(event)
+        if topic is None:
+            return
+        data = {"hwnd": hwnd}
+        if info is not None:
+            data.update(
+                title=info.get("title"),
+                process=info.get("process"),
+                pid=info.get("pid"),
+                rect=info.get("rect"),
+            )
+        bus.publish(topic, data)
+    return on_window_event
+
+
+def clipboard_publisher(bus):
+    """Return a clipboard monitor listener that publishes clipboard changes."""
+    def on_clipboard_change(summary):
+        bus.publish("clipboard", {k: v for k, v in summary.items() if k != "content"})
+    return on_clipboard_change
+
+
+bus = EventBus()
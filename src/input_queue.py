@@ -0,0 +1,345 @@
+"""Input queue module - schedules every input-injecting call on one ordered thread.
+
+pyautogui calls are not safe to interleave: two requests typing at once can
+mix their keystrokes or leave a modifier held. Functions decorated with
+``@serialized`` are executed one at a time on a single worker thread, while
+the request threads that submitted them only wait for the result. Read-only
+work (screenshots, window queries) never goes through the queue and stays
+parallel.
+
+Calls are attributed to the session and priority class of the submitting
+thread (see ``context``):
+
+- ``interactive`` work always runs before ``bulk`` work, except that one
+  bulk call is let through after ``INPUT_BULK_EVERY`` interactive calls so
+  batch jobs never starve.
+- Within a class, sessions take turns (round robin), so one client's long
+  batch can't hold up another client's in the same class.
+- A session may take a lease; while it is held only that session's input
+  runs and everyone else's waits in the queue.
+- ``cancel(session)`` drops the session's queued calls and stops work that
+  was already in flight (e.g. a batch) before its next step.
+"""
+
+import collections
+import contextlib
+import functools
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+
+import config
+
+PRIORITIES = ("interactive", "bulk")
+DEFAULT_SESSION = "default"
+SESSION_IDLE_S = 600  # Idle sessions are forgotten after this long
+
+
+class InputCancelled(Exception):
+    """Raised for input calls cancelled before they ran."""
+
+
+class _Item:
+    __slots__ = ("id", "future", "fn", "args", "kwargs", "session", "priority", "queued_at")
+
+    def __init__(self, item_id, fn, args, kwargs, session, priority):
+        self.id = item_id
+        self.future = Future()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.session = session
+        self.priority = priority
+        self.queued_at = time.perf_counter()
+
+
+class _Session:
+    """Per-session counters and cancellation generation."""
+
+    def __init__(self, name):
+        self.name = name
+        self.generation = 0
+        self.executed = 0
+        self.cancelled = 0
+        self.last_seen = time.monotonic()
+
+
+class _Context(threading.local):
+    session = DEFAULT_SESSION
+    priority = "interactive"
+    generation = None
+
+
+class InputScheduler:
+    """A single worker thread draining per-session, per-priority queues."""
+
+    def __init__(self, name="input", bulk_every=None):
+        self.name = name
+        self.bulk_every = bulk_every or config.INPUT_BULK_EVERY
+        self.executed = 0
+        self.busy_time = 0.0
+        self.lease = None  # (session, expires_at monotonic)
+        self._queues = {p: collections.OrderedDict() for p in PRIORITIES}
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._interactive_streak = 0
+        self._waits = {p: collections.deque(maxlen=1024) for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._context = _Context()
+        self._thread = None
+
+    # -------------------------------------------------------- context
+
+    def enter(self, session=None, priority=None):
+        """Attribute this thread's following input calls to ``session``/``priority``."""
+        priority = priority or "interactive"
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        session = session or DEFAULT_SESSION
+        ctx = self._context
+        ctx.session = session
+        ctx.priority = priority
+        ctx.generation = self._session(session).generation
+
+    def leave(self):
+        ctx = self._context
+        ctx.session = DEFAULT_SESSION
+        ctx.priority = "interactive"
+        ctx.generation = None
+
+    @contextlib.contextmanager
+    def context(self, session=None, priority=None):
+        """Context manager form of enter/leave."""
+        self.enter(session, priority)
+        try:
+            yield
+        finally:
+            self.leave()
+
+    def _session(self, name):
+        with self._cond:
+            session = self._sessions.get(name)
+            if session is None:
+                self._prune()
+                session = self._sessions[name] = _Session(name)
+            session.last_seen = time.monotonic()
+            return session
+
+    def _prune(self):
+        """Forget sessions that have been idle for a while and have nothing queued."""
+        cutoff = time.monotonic() - SESSION_IDLE_S
+        for name in [n for n, st in self._sessions.items() if st.last_seen < cutoff]:
+            if not any(name in self._queues[p] for p in PRIORITIES):
+                del self._sessions[name]
+
+    # -------------------------------------------------------- submit / run
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._cond:
+                if self._thread is None:
+                    thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    thread.start()
+                    self._thread = thread
+
+    def in_worker(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` under the calling thread's context. Returns a Future."""
+        self._ensure_started()
+        ctx = self._context
+        session = self._session(ctx.session)
+        with self._cond:
+            if ctx.generation is not None and ctx.generation != session.generation:
+                raise InputCancelled(f"Input for session '{session.name}' was cancelled")
+            item = _Item(next(self._ids), fn, args, kwargs, session.name, ctx.priority)
+            queue = self._queues[item.priority].get(item.session)
+            if queue is None:
+                queue = self._queues[item.priority][item.session] = collections.deque()
+            queue.append(item)
+            self._cond.notify()
+        return item.future
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn`` on the worker and wait for its result.
+
+        Calls made from the worker itself (e.g. ``drag_to`` inside a
+        scheduled drag action) run inline so they cannot deadlock.
+        """
+        if self.in_worker():
+            return fn(*args, **kwargs)
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result()
+        except Exception as e:
+            if future.cancelled():
+                raise InputCancelled("Input was cancelled before it ran") from e
+            raise
+
+    def cancelled(self):
+        """True if the calling thread's session was cancelled since it entered."""
+        ctx = self._context
+        if ctx.generation is None:
+            return False
+        session = self._sessions.get(ctx.session)
+        return session is not None and session.generation != ctx.generation
+
+    def cancel(self, session):
+        """Cancel the queued calls of ``session`` and stop its in-flight work.
+
+        Batches and macros already running see ``cancelled()`` and their
+        next input call raises InputCancelled. Returns the number of queued
+        calls dropped.
+        """
+        cancelled = []
+        with self._cond:
+            for priority in PRIORITIES:
+                queue = self._queues[priority].pop(session, None)
+                if queue:
+                    cancelled.extend(queue)
+            state = self._sessions.get(session)
+            if state is not None:
+                state.generation += 1
+                state.cancelled += len(cancelled)
+        for item in cancelled:
+            item.future.cancel()
+        return len(cancelled)
+
+    # -------------------------------------------------------- leases
+
+    def acquire_lease(self, session, ttl=None):
+        """Give ``session`` exclusive input for ``ttl`` seconds (renewable).
+
+        Returns the expiry in seconds from now, or None if another session holds it.
+        Raises ValueError unless 0 < ttl <= INPUT_LEASE_MAX_TTL_S.
+        """
+        try:
+            ttl = float(ttl if ttl is not None else config.INPUT_LEASE_TTL_S)
+        except (TypeError, ValueError):
+            raise ValueError(f"ttl must be a number, got {ttl!r}") from None
+        if not 0 < ttl <= config.INPUT_LEASE_MAX_TTL_S:
+            raise ValueError(f"ttl must be > 0 and <= {config.INPUT_LEASE_MAX_TTL_S} seconds")
+        with self._cond:
+            lease = self._active_lease()
+            if lease is not None and lease[0] != session:
+                return None
+            self.lease = (session, time.monotonic() + ttl)
+            self._cond.notify()
+        return ttl
+
+    def release_lease(self, session):
+        with self._cond:
+            lease = self._active_lease()
+            if lease is None or lease[0] != session:
+                return False
+            self.lease = None
+            self._cond.notify()
+        return True
+
+    def _active_lease(self):
+        if self.lease is not None and self.lease[1] <= time.monotonic():
+            self.lease = None
+        return self.lease
+
+    # -------------------------------------------------------- worker
+
+    def _pick(self):
+        """Pop the next item to run, or return (None, wait_seconds)."""
+        lease = self._active_lease()
+        if lease is not None:
+            holder = lease[0]
+            for priority in PRIORITIES:
+                queue = self._queues[priority].get(holder)
+                if queue:
+                    return self._pop(priority, holder), None
+            return None, lease[1] - time.monotonic()
+
+        interactive, bulk = self._queues["interactive"], self._queues["bulk"]
+        if bulk and (not interactive or self._interactive_streak >= self.bulk_every):
+            priority = "bulk"
+        elif interactive:
+            priority = "interactive"
+        else:
+            return None, None
+        return self._pop(priority, next(iter(self._queues[priority]))), None
+
+    def _pop(self, priority, session):
+        queues = self._queues[priority]
+        queue = queues.pop(session)
+        item = queue.popleft()
+        if queue:
+            queues[session] = queue  # Re-inserted at the end: round robin
+        self._interactive_streak = self._interactive_streak + 1 if priority == "interactive" else 0
+        return item
+
+    def _run(self):
+        while True:
+            with self._cond:
+                item, timeout = self._pick()
+                while item is None:
+                    self._cond.wait(timeout)
+                    item, timeout = self._pick()
+            if not item.future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            self._waits[item.priority].append(start - item.queued_at)
+            try:
+                item.future.set_result(item.fn(*item.args, **item.kwargs))
+            except BaseException as e:
+                item.future.set_exception(e)
+            self.busy_time += time.perf_counter() - start
+            self.executed += 1
+            session = self._sessions.get(item.session)
+            if session is not None:
+                session.executed += 1
+
+    # -------------------------------------------------------- introspection
+
+    def pending(self):
+        with self._cond:
+            return sum(len(q) for queues in self._queues.values() for q in queues.values())
+
+    def stats(self):
+        with self._cond:
+            lease = self._active_lease()
+            sessions = {}
+            for name, session in self._sessions.items():
+                queued = {p: len(self._queues[p].get(name, ())) for p in PRIORITIES}
+                sessions[name] = {
+                    "queued": queued,
+                    "executed": session.executed,
+                    "cancelled": session.cancelled,
+                    "idle_s": round(time.monotonic() - session.last_seen, 1),
+                }
+            waits = {p: sorted(self._waits[p]) for p in PRIORITIES}
+        latency = {}
+        for priority, samples in waits.items():
+            if samples:
+                latency[priority] = {
+                    "samples": len(samples),
+                    "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+                    "p95_ms": round(samples[int(len(samples) * 0.95)] * 1000, 2),
+                    "max_ms": round(samples[-1] * 1000, 2),
+                }
+        return {
+            "pending": sum(sum(s["queued"].values()) for s in sessions.values()),
+            "executed": self.executed,
+            "busy_ms": round(self.busy_time * 1000, 1),
+            "lease": {"session": lease[0], "expires_in_s": round(lease[1] - time.monotonic(), 2)}
+            if lease else None,
+            "wait_latency": latency,
+            "sessions": sessions,
+        }
+
+
+scheduler = InputScheduler()
+
+
+def serialized(fn):
+    """Decorator: route every call of ``fn`` through the shared input scheduler."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return scheduler.run(fn, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,223 @@
+"""Input stream module - persistent low-latency TCP channel for mouse/keyboard input.
+
+One connection carries newline-terminated text commands, for example::
+
+    auth my-secret-key        (required first when config.API_KEY is set)
+    m 100 200                 move to (100, 200)
+    r -5 3                    move relative
+    c 100 200 left 1          click [x y] [button] [clicks]
+    dc 100 200                double click
+    rc 100 200                right click
+    d left / u left           mouse button down / up at current position
+    s -3 [x y]                scroll
+    k enter                   press key
+    kd shift / ku shift       key down / up
+    h ctrl+shift+s            hotkey
+    t any text here           type text (rest of the line)
+    w some text               paste text via clipboard
+    ping                      replies "pong"
+    ack on | ack off          acknowledge every command (default off)
+
+Prefix a command with ``@<seq> `` to get ``ok <seq>`` back once it has run.
+Errors are always reported as ``err <seq|-> <message>``. Consecutive absolute
+moves that arrive in the same read are coalesced to the last one, unless
+``ack on`` is in effect or the moves carry a ``@seq``.
+"""
+
+import logging
+import socket
+import socketserver
+import threading
+
+import config
+import input_queue
+import keyboard_control
+import mouse_control
+
+logger = logging.getLogger(__name__)
+
+
+def _point(args):
+    """Optional (x, y) from the first two args; a lone coordinate is an error."""
+    if len(args) >= 2:
+        return int(args[0]), int(args[1])
+    if args:
+        raise ValueError("need both x and y")
+    return None, None
+
+
+def _xy(args):
+    x, y = _point(args)
+    if x is None:
+        raise ValueError("need x and y")
+    return x, y
+
+
+def _key(args):
+    if not args:
+        raise ValueError("need a key")
+    return args[0]
+
+
+def _click(args, rest):
+    x, y = _point(args)
+    button = args[2] if len(args) > 2 else "left"
+    clicks = int(args[3]) if len(args) > 3 else 1
+    mouse_control.click(x, y, button, clicks)
+
+
+def _scroll(args, rest):
+    if not args:
+        raise ValueError("need scroll clicks")
+    x, y = _point(args[1:])
+    mouse_control.scroll(int(args[0]), x, y)
+
+
+COMMANDS = {
+    "m": lambda args, rest: mouse_control.move_to(*_xy(args)),
+    "r": lambda args, rest: mouse_control.move_relative(*_xy(args)),
+    "c": _click,
+    "dc": lambda args, rest: mouse_control.double_click(*_point(args)),
+    "rc": lambda args, rest: mouse_control.right_click(*_point(args)),
+    "d": lambda args, rest: mouse_control.mouse_down(args[0] if args else "left"),
+    "u": lambda args, rest: mouse_control.mouse_up(args[0] if args else "left"),
+    "s": _scroll,
+    "k": lambda args, rest: keyboard_control.press_key(_key(args)),
+    "kd": lambda args, rest: keyboard_control.key_down(_key(args)),
+    "ku": lambda args, rest: keyboard_control.key_up(_key(args)),
+    "h": lambda args, rest: keyboard_control.hotkey(*_key(args).split("+")),
+    "t": lambda args, rest: keyboard_control.type_text(rest),
+    "w": lambda args, rest: keyboard_control.write_instant(rest),
+}
+
+
+def parse(line):
+    """Split a command line into (seq, op, args, rest). ``seq`` is None without an ``@`` prefix."""
+    seq = None
+    if line.startswith("@"):
+        seq, _, line = line.partition(" ")
+        seq = seq[1:]
+    op, _, rest = line.partition(" ")
+    return seq, op, rest.split(), rest
+
+
+def superseded(line, following):
+    """True if ``line`` is an absolute move immediately replaced by another one.
+
+    Sequenced (``@seq``) moves never match, so they always run and get their ``ok``.
+    """
+    return following is not None and line.startswith("m ") and following.startswith("m ")
+
+
+class InputStreamHandler(socketserver.BaseRequestHandler):
+    """Serves one persistent input connection."""
+
+    def setup(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Each connection is its own interactive input session
+        input_queue.scheduler.enter("tcp:%s:%s" % self.client_address[:2], "interactive")
+        self.authed = not config.API_KEY
+        self.ack_all = False
+        self.count = 0
+
+    def finish(self):
+        input_queue.scheduler.leave()
+
+    def reply(self, text):
+        self.request.sendall(text.encode("utf-8") + b"\n")
+
+    def handle(self):
+        peer = "%s:%s" % self.client_address[:2]
+        logger.info("Input stream connected: %s", peer)
+        buffer = b""
+        try:
+            while True:
+                data = self.request.recv(65536)
+                if not data:
+                    break
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                if not self.run_lines(lines):
+                    return
+                if len(buffer) > config.INPUT_STREAM_MAX_LINE:
+                    self.reply(f"err - Line longer than {config.INPUT_STREAM_MAX_LINE} bytes")
+                    return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            logger.info("Input stream closed: %s (%d commands)", peer, self.count)
+
+    def run_lines(self, raw_lines):
+        """Decode and run complete lines in order. Returns False to close."""
+        lines = []
+        for raw in raw_lines:
+            try:
+                line = raw.decode("utf-8").rstrip("\r")
+            except UnicodeDecodeError:
+                lines.append(None)  # Rejected in its place, after what came before
+                continue
+            if line:
+                lines.append(line)
+
+        for index, line in enumerate(lines):
+            if line is None:
+                self.reply("err - Invalid UTF-8")
+                continue
+            following = lines[index + 1] if index + 1 < len(lines) else None
+            # With ack on every command gets its reply, so nothing is merged away
+            if not self.ack_all and superseded(line, following):
+                continue
+            if not self.execute(line):
+                return False
+        return True
+
+    def execute(self, line):
+        """Run one command. Returns False if the connection should be closed."""
+        seq, op, args, rest = parse(line)
+
+        if not self.authed:
+            if op == "auth" and rest == config.API_KEY:
+                self.authed = True
+                self.reply("ok auth")
+                return True
+            self.reply("err - Unauthorized")
+            return False
+
+        if op == "ping":
+            self.reply("pong")
+            return True
+        if op == "ack":
+            self.ack_all = rest.strip() == "on"
+            self.reply(f"ok {seq or 'ack'}")
+            return True
+
+        handler = COMMANDS.get(op)
+        if handler is None:
+            self.reply(f"err {seq or '-'} Unknown command: {op}")
+            return True
+        try:
+            handler(args, rest)
+            self.count += 1
+        except Exception as e:
+            self.reply(f"err {seq or '-'} {e}")
+            return True
+        if seq is not None:
+            self.reply(f"ok {seq}")
+        elif self.ack_all:
+            self.reply("ok")
+        return True
+
+
+class InputStreamServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start(host=None, port=None):
+    """Start the input stream server on a background thread. Returns the server."""
+    server = InputStreamServer(
+        (host or config.HOST, port or config.INPUT_STREAM_PORT), InputStreamHandler
+    )
+    thread = threading.Thread(target=server.serve_forever, name="input-stream", daemon=True)
+    thread.start()
+    return server
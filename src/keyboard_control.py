@@ -3,15 +3,36 @@
 import pyautogui
 import pyperclip
 
+import clipboard
+import config
+import text_input
+from input_queue import serialized
+
 
 def type_text(text, interval=0):
-    """Type string character by character."""
-    pyautogui.typewrite(text, interval=interval) if text.isascii() else _type_unicode(text, interval)
+    """Type string character by character.
+
+    Long text is queued in chunks so other sessions' input can run between them.
+    """
+    size = config.INPUT_TYPE_CHUNK or len(text) or 1
+    for start in range(0, len(text), size):
+        _type_chunk(text[start:start + size], interval)
     return {"success": True}
 
 
+@serialized
+def _type_chunk(text, interval=0):
+    engine = text_input.get_engine()
+    if engine is not None:
+        engine.type(text, interval)
+    elif text.isascii():
+        pyautogui.typewrite(text, interval=interval)
+    else:
+        _type_unicode(text, interval)
+
+
 def _type_unicode(text, interval=0):
-    """Handle unicode text by using clipboard paste."""
+    """Handle unicode text by using clipboard paste (fallback without SendInput)."""
     import time
     for char in text:
         if char.isascii():
@@ -23,37 +44,35 @@ def _type_unicode(text, interval=0):
             time.sleep(interval)
 
 
+@serialized
 def press_key(key):
     """Press and release a single key."""
     pyautogui.press(key)
     return {"success": True}
 
 
+@serialized
 def hotkey(*keys):
     """Press key combination (e.g., ctrl+c)."""
     pyautogui.hotkey(*keys)
     return {"success": True}
 
 
+@serialized
 def key_down(key):
     """Hold key down."""
     pyautogui.keyDown(key)
     return {"success": True}
 
 
+@serialized
 def key_up(key):
     """Release key."""
     pyautogui.keyUp(key)
     return {"success": True}
 
 
+@serialized
 def write_instant(text):
-    """Paste text via clipboard (faster for long text)."""
-    old_clipboard = pyperclip.paste()
-    pyperclip.copy(text)
-    pyautogui.hotkey("ctrl", "v")
-    # Restore old clipboard after a brief delay
-    import time
-    time.sleep(0.05)
-    pyperclip.copy(old_clipboard)
-    return {"success": True}
+    """Paste text via clipboard (faster for long text), then restore the clipboard."""
+    return clipboard.paste_text(text, lambda: pyautogui.hotkey("ctrl", "v"))
@@ -0,0 +1,192 @@
+"""Log pipeline module - keeps log formatting and disk I/O off request threads.
+
+Loggers on request threads only stamp the record with the current request
+id and put it on a queue (dropping, never blocking, once it is full). A
+listener thread formats records - %-style arguments are merged there, so
+pass values that won't change afterwards - and writes them as JSON lines
+to a rotating file. The file is flushed once per drained burst
+instead of once per record.
+"""
+
+import atexit
+import contextvars
+import datetime
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_ids = itertools.count(1)
+_prefix = f"{int(time.time()) & 0xFFFFFF:06x}"
+
+# LogRecord attributes that aren't "extra" fields
+_STANDARD = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message", "asctime", "request_id",
+}
+_traceback_formatter = logging.Formatter()
+
+_handler = None
+_listener = None
+
+
+def new_request_id():
+    """Short id, unique within this process and unlikely to repeat across restarts."""
+    return f"{_prefix}-{next(_ids):x}"
+
+
+def set_request_id(value):
+    """Attach ``value`` to every record logged from this thread (None to clear)."""
+    _request_id.set(value)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, msg, request_id, then any extras."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _BatchedFlush:
+    """Handler mixin: emit() no longer flushes per record; the listener calls flush_batch()."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchedFileHandler(_BatchedFlush, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class BatchedStreamHandler(_BatchedFlush, logging.StreamHandler):
+    pass
+
+
+class RequestQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without formatting them; drops (and counts) records
+    once ``maxsize`` are waiting."""
+
+    def __init__(self, log_queue, maxsize=10000):
+        super().__init__(log_queue)
+        self.maxsize = maxsize
+        self.dropped = 0
+
+    def prepare(self, record):
+        # No copy: the root logger has no other handler that could see the change
+        record.request_id = _request_id.get()
+        if record.exc_info:
+            # Traceback objects pin frames alive; render them now (rare)
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # SimpleQueue is several times cheaper than Queue; the bound is approximate
+        if self.queue.qsize() >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+class BatchingListener(logging.handlers.QueueListener):
+    """Writes queued records on a background thread, flushing when the queue
+    drains or every ``flush_every`` records, whichever comes first."""
+
+    def __init__(self, log_queue, *handlers, flush_every=256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_every = flush_every
+        self.written = 0
+        self._unflushed = 0
+
+    def handle(self, record):
+        super().handle(record)
+        self.written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        self._unflushed = 0
+        for handler in self.handlers:
+            handler.flush_batch()
+
+
+def configure(path, level="INFO", console_level="INFO", max_bytes=5 * 1024 * 1024,
+              backups=3, queue_size=10000, flush_every=256):
+    """Route the root logger through the queue to a JSON-lines file and the console."""
+    global _handler, _listener
+    stop()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    file_handler = BatchedFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = BatchedStreamHandler()
+    console_handler.setFormatter(logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S",
+    ))
+    console_handler.setLevel(console_level)
+
+    log_queue = queue.SimpleQueue()
+    _handler = RequestQueueHandler(log_queue, queue_size)
+    _listener = BatchingListener(log_queue, file_handler, console_handler, flush_every=flush_every)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    # Records below the level are rejected before a LogRecord is even created
+    root.setLevel(level)
+    _listener.start()
+    return _listener
+
+
+def stop():
+    """Drain the queue, flush and close the handlers."""
+    global _handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.flush_batch()
+        handler.close()
+    _handler = _listener = None
+
+
+def stats():
+    if _listener is None:
+        return {"running": False}
+    return {
+        "running": True,
+        "queued": _listener.queue.qsize(),
+        "written": _listener.written,
+        "dropped": _handler.dropped,
+    }
+
+
+atexit.register(stop)
@@ -0,0 +1,208 @@
+"""Macros module - named, parameterized action sequences stored on disk.
+
+A macro is a batch whose values may reference parameters::
+
+    {"name": "login",
+     "params": {"user": "admin", "delay": 100},
+     "actions": [
+        {"type": "click", "x": "${x}", "y": 200},
+        {"type": "type", "text": "Hello ${user}"},
+        {"type": "sleep", "ms": "${delay}"}]}
+
+A value that is exactly ``${name}`` is replaced by the parameter value as-is
+(keeping its type); placeholders inside longer strings are interpolated.
+Params listed with a default are optional at run time. Macros are validated
+and compiled once when saved, so a run only substitutes the bound fields.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+
+import actions
+
+NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+PLACEHOLDER = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class MacroError(Exception):
+    """Raised for invalid macro definitions or run parameters."""
+
+
+def _compile_value(value):
+    """Return (binder, names) for a value with placeholders, or (None, set()) if static."""
+    if isinstance(value, str):
+        names = set(PLACEHOLDER.findall(value))
+        if not names:
+            return None, names
+        whole = PLACEHOLDER.fullmatch(value)
+        if whole:
+            name = whole.group(1)
+            return (lambda params: params[name]), names
+        return (lambda params: PLACEHOLDER.sub(lambda m: str(params[m.group(1)]), value)), names
+
+    if isinstance(value, list):
+        binders = [_compile_value(item) for item in value]
+        names = set().union(*(n for _, n in binders)) if binders else set()
+        if not names:
+            return None, names
+        parts = [(b, item) for (b, _), item in zip(binders, value)]
+        return (lambda params: [b(params) if b else item for b, item in parts]), names
+
+    return None, set()
+
+
+class Macro:
+    """A validated macro with its actions pre-compiled into executor steps."""
+
+    def __init__(self, name, action_list, params=None):
+        if not isinstance(name, str) or not NAME_PATTERN.match(name):
+            raise MacroError("Macro name must be 1-64 characters of letters, digits, _ . -")
+        if params is not None and not isinstance(params, dict):
+            raise MacroError("params must be an object of parameter defaults")
+        self.name = name
+        self.actions = action_list
+        self.defaults = params or {}
+        self.steps = []
+        used = set()
+        errors = []
+
+        for index, params_dict in enumerate(action_list if isinstance(action_list, list) else []):
+            if not isinstance(params_dict, dict):
+                errors.append({"index": index, "error": "Action must be an object"})
+                continue
+            bindings = []
+            probe = {}
+            for field, value in params_dict.items():
+                binder, names = _compile_value(value)
+                used |= names
+                if binder is None:
+                    probe[field] = value
+                elif field == "type":
+                    errors.append({"index": index, "error": "Action type cannot be a parameter"})
+                    break
+                else:
+                    bindings.append((field, binder))
+                    # Validate against defaults when available; None skips the type check
+                    probe[field] = binder(self.defaults) if names <= self.defaults.keys() else None
+            else:
+                error = actions.validate(probe)
+                if error:
+                    errors.append({"index": index, "error": error})
+                    continue
+                handler = actions.ACTIONS[params_dict["type"]].handler
+                self.steps.append((index, handler, params_dict, bindings))
+
+        if not isinstance(action_list, list) or not action_list:
+            errors.append({"index": None, "error": "actions must be a non-empty list"})
+        if errors:
+            raise actions.BatchError(errors)
+        self.required = sorted(used - self.defaults.keys())
+        self.param_names = sorted(used)
+
+    def bind(self, values=None):
+        """Return executor steps with parameter values substituted."""
+        values = values or {}
+        if not isinstance(values, dict):
+            raise MacroError("params must be an object")
+        missing = [name for name in self.required if name not in values]
+        if missing:
+            raise MacroError(f"Missing parameter(s): {', '.join(missing)}")
+        params = {**self.defaults, **values}
+
+        steps = []
+        for index, handler, template, bindings in self.steps:
+            if bindings:
+                bound = dict(template)
+                for field, binder in bindings:
+                    bound[field] = binder(params)
+                error = actions.validate(bound)
+                if error:
+                    raise MacroError(f"Action {index}: {error}")
+                steps.append((index, handler, bound))
+            else:
+                steps.append((index, handler, template))
+        return steps
+
+    def to_dict(self):
+        return {"name": self.name, "params": self.defaults, "actions": self.actions}
+
+    def info(self):
+        return {
+            "name": self.name,
+            "params": self.param_names,
+            "required": self.required,
+            "count": len(self.steps),
+        }
+
+
+class MacroLibrary:
+    """Compiled macros in memory, persisted as one JSON file each in ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._macros = {}
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def load(self):
+        """Load and compile every macro on disk. Returns a list of load errors."""
+        errors = []
+        if not os.path.isdir(self.directory):
+            return errors
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    data = json.load(f)
+                macro = Macro(data.get("name"), data.get("actions"), data.get("params"))
+                with self._lock:
+                    self._macros[macro.name] = macro
+            except Exception as e:
+                errors.append(f"{filename}: {e}")
+        return errors
+
+    def save(self, name, action_list, params=None):
+        """Compile and persist a macro (replacing any existing one)."""
+        macro = Macro(name, action_list, params)
+        os.makedirs(self.directory, exist_ok=True)
+        # A unique temp file per save, so concurrent saves of one name can't collide
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(macro.to_dict(), f, indent=2)
+            # Replace under the lock so the file and the in-memory macro agree
+            with self._lock:
+                os.replace(tmp, self._path(name))
+                self._macros[name] = macro
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except FileNotFoundError:
+                pass
+            raise
+        return macro
+
+    def get(self, name):
+        with self._lock:
+            return self._macros.get(name)
+
+    def delete(self, name):
+        with self._lock:
+            macro = self._macros.pop(name, None)
+        if macro is None:
+            return False
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def list(self):
+        with self._lock:
+            return [m.info() for m in sorted(self._macros.values(), key=lambda m: m.name)]
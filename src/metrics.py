@@ -0,0 +1,199 @@
+"""Metrics module - low-overhead latency histograms with Prometheus text export.
+
+Histograms use HDR-style log-linear buckets over microseconds: 8 linear
+sub-buckets per power of two, so any recorded value is within ~12% of its
+bucket bound from 1 us to hours, in a few hundred buckets. Each thread
+records into its own shard (a plain list it alone writes to), so recording
+takes no lock; shards are merged only when metrics are read.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+SUB_BITS = 3
+SUB_COUNT = 1 << SUB_BITS
+MAX_BUCKETS = (64 - SUB_BITS) * SUB_COUNT
+
+# Bucket bounds (seconds) exposed to Prometheus; the fine HDR buckets are folded into these
+EXPORT_BOUNDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def bucket_index(value):
+    """HDR bucket index for a non-negative integer ``value``."""
+    if value < SUB_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BITS - 1
+    return ((shift + 1) << SUB_BITS) | ((value >> shift) & (SUB_COUNT - 1))
+
+
+def bucket_upper(index):
+    """Largest value that falls in bucket ``index``."""
+    if index < SUB_COUNT:
+        return index
+    shift = (index >> SUB_BITS) - 1
+    return (((index & (SUB_COUNT - 1)) | SUB_COUNT) + 1 << shift) - 1
+
+
+class Histogram:
+    """Latency histogram recorded in microseconds into per-thread shards."""
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        ident = threading.get_ident()
+        shard = self._shards.get(ident)
+        if shard is None:
+            with self._lock:
+                shard = self._shards[ident] = [[0] * MAX_BUCKETS, 0, 0]  # counts, total_us, n
+        return shard
+
+    def record(self, seconds):
+        micros = int(seconds * 1_000_000)
+        shard = self._shards.get(threading.get_ident()) or self._shard()
+        shard[0][bucket_index(micros if micros > 0 else 0)] += 1
+        shard[1] += micros
+        shard[2] += 1
+
+    def snapshot(self):
+        """Merge shards into (counts, total_us, count)."""
+        counts = [0] * MAX_BUCKETS
+        total = count = 0
+        with self._lock:
+            shards = list(self._shards.values())
+        for shard_counts, shard_total, shard_n in shards:
+            for i, c in enumerate(shard_counts):
+                if c:
+                    counts[i] += c
+            total += shard_total
+            count += shard_n
+        return counts, total, count
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        counts, total, count = self.snapshot()
+        result = {"count": count, "mean_ms": round(total / count / 1000, 3) if count else 0.0}
+        for q in quantiles:
+            result[f"p{q * 100:g}_ms"] = round(quantile(counts, count, q) / 1000, 3)
+        return result
+
+
+def quantile(counts, count, q):
+    """Value (us) at quantile ``q`` from merged bucket counts (bucket upper bound)."""
+    if not count:
+        return 0
+    rank = max(1, int(q * count + 0.5))
+    seen = 0
+    for index, c in enumerate(counts):
+        seen += c
+        if seen >= rank:
+            return bucket_upper(index)
+    return bucket_upper(len(counts) - 1)
+
+
+class Registry:
+    """Named histogram families plus callback gauges and counters."""
+
+    def __init__(self):
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._help = {}
+        self._callbacks = []  # (name, type, help, fn returning {labels: value} or a number)
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text="", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(name, key[1])
+                    self._help.setdefault(name, help_text)
+        return histogram
+
+    def observe(self, name, seconds, help_text="", **labels):
+        self.histogram(name, help_text, **labels).record(seconds)
+
+    def gauge(self, name, help_text, fn):
+        self._callbacks.append((name, "gauge", help_text, fn))
+
+    def counter(self, name, help_text, fn):
+        """Export ``fn()`` as a counter; it must only ever grow (or reset to 0)."""
+        self._callbacks.append((name, "counter", help_text, fn))
+
+    @contextmanager
+    def timer(self, name, help_text="", **labels):
+        histogram = self.histogram(name, help_text, **labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.record(time.perf_counter() - start)
+
+    def summaries(self):
+        """{name: [{labels..., count, mean_ms, p50_ms, ...}]} for JSON output."""
+        with self._lock:
+            histograms = list(self._histograms.values())
+        result = {}
+        for histogram in histograms:
+            result.setdefault(histogram.name, []).append(
+                {**dict(histogram.labels), **histogram.summary()}
+            )
+        return result
+
+    def prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.values(), key=lambda h: (h.name, h.labels))
+        lines = []
+        current = None
+        for histogram in histograms:
+            if histogram.name != current:
+                current = histogram.name
+                lines.append(f"# HELP {current} {self._help.get(current) or current}")
+                lines.append(f"# TYPE {current} histogram")
+            counts, total, count = histogram.snapshot()
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in histogram.labels)
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            index = 0
+            for bound in EXPORT_BOUNDS:
+                limit = int(bound * 1_000_000)
+                while index < len(counts) and bucket_upper(index) <= limit:
+                    cumulative += counts[index]
+                    index += 1
+                lines.append(f'{current}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{current}_bucket{{{prefix}le="+Inf"}} {count}')
+            braces = f"{{{labels}}}" if labels else ""
+            lines.append(f"{current}_sum{braces} {total / 1_000_000:.6f}")
+            lines.append(f"{current}_count{braces} {count}")
+
+        for name, kind, help_text, fn in self._callbacks:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for labels, v in value.items():
+                    label_text = ",".join(f'{k}="{_escape(lv)}"' for k, lv in labels)
+                    lines.append(f"{name}{{{label_text}}} {v}")
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+timer = registry.timer
+observe = registry.observe
@@ -2,13 +2,17 @@
 
 import pyautogui
 
+from input_queue import serialized
 
+
+@serialized
 def move_to(x, y, duration=0):
     """Move mouse to absolute coordinates."""
     pyautogui.moveTo(x, y, duration=duration)
     return {"success": True, "x": x, "y": y}
 
 
+@serialized
 def move_relative(dx, dy, duration=0):
     """Move mouse relative to current position."""
     pyautogui.moveRel(dx, dy, duration=duration)
@@ -16,42 +20,63 @@ def move_relative(dx, dy, duration=0):
     return {"success": True, "x": pos[0], "y": pos[1]}
 
 
+@serialized
 def click(x=None, y=None, button="left", clicks=1):
     """Click at position. If x,y not provided, clicks at current position."""
     pyautogui.click(x=x, y=y, button=button, clicks=clicks)
     return {"success": True}
 
 
+@serialized
 def double_click(x=None, y=None):
     """Double click at position."""
     pyautogui.doubleClick(x=x, y=y)
     return {"success": True}
 
 
+@serialized
 def right_click(x=None, y=None):
     """Right click at position."""
     pyautogui.rightClick(x=x, y=y)
     return {"success": True}
 
 
+@serialized
 def middle_click(x=None, y=None):
     """Middle click at position."""
     pyautogui.middleClick(x=x, y=y)
     return {"success": True}
 
 
+@serialized
+def mouse_down(button="left", x=None, y=None):
+    """Press and hold a mouse button."""
+    pyautogui.mouseDown(x=x, y=y, button=button)
+    return {"success": True}
+
+
+@serialized
+def mouse_up(button="left", x=None, y=None):
+    """Release a mouse button."""
+    pyautogui.mouseUp(x=x, y=y, button=button)
+    return {"success": True}
+
+
+@serialized
 def drag_to(x, y, duration=0.2, button="left"):
     """Drag from current position to target."""
     pyautogui.dragTo(x, y, duration=duration, button=button)
     return {"success": True}
 
 
+@serialized
 def drag_relative(dx, dy, duration=0.2, button="left"):
     """Drag relative to current position."""
     pyautogui.dragRel(dx, dy, duration=duration, button=button)
     return {"success": True}
 
 
+@serialized
 def scroll(clicks, x=None, y=None):
     """Scroll wheel. Positive = up, negative = down."""
     pyautogui.scroll(clicks, x=x, y=y)
@@ -0,0 +1,100 @@
+"""Profiler module - on-demand profiling that works inside the frozen EXE.
+
+``sample`` is a wall-clock sampling profiler: it walks ``sys._current_frames``
+for every thread at a fixed interval and counts identical stacks, producing
+collapsed-stack output (``thread;outer;...;inner count``) that flamegraph.pl,
+speedscope and similar tools read directly. ``RequestProfile`` wraps cProfile
+for a single request on the calling thread.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+# Leaf functions of threads that are parked waiting for work
+IDLE_FUNCTIONS = {
+    "wait", "select", "poll", "accept", "readinto", "_wait_for_tstate_lock", "PumpMessages",
+}
+
+_sampling = threading.Lock()
+_profiling = threading.Lock()
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def sample(seconds, interval=0.005, include_idle=False):
+    """Sample all threads for ``seconds``. Returns (Counter of collapsed stacks, sample count).
+
+    Raises RuntimeError if a sampling run is already in progress.
+    """
+    if not _sampling.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        me = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not include_idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = [names.get(ident, f"thread-{ident}")] + _stack(frame)
+                stacks[";".join(stack)] += 1
+            samples += 1
+            time.sleep(interval)
+        return stacks, samples
+    finally:
+        _sampling.release()
+
+
+def collapsed(stacks):
+    """Render stacks in collapsed format, most frequent first."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class RequestProfile:
+    """cProfile for one request on the current thread (one at a time)."""
+
+    def __init__(self):
+        if not _profiling.acquire(blocking=False):
+            raise RuntimeError("Another request is being profiled")
+        self._profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        try:
+            self._profile.enable()
+        except ValueError as e:  # Another profiler (e.g. a debugger) is active
+            _profiling.release()
+            raise RuntimeError(str(e)) from e
+
+    def stop(self, sort="cumulative", limit=60):
+        """Disable profiling and return pstats text."""
+        try:
+            self._profile.disable()
+        finally:
+            _profiling.release()
+        elapsed = (time.perf_counter() - self.started) * 1000
+        out = io.StringIO()
+        out.write(f"Request profiled for {elapsed:.1f} ms\n")
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
@@ -0,0 +1,164 @@
+"""Screen stream module - frame-diff (dirty rectangle) encoding for live screenshots."""
+
+import time
+
+import numpy as np
+
+import config
+import encoder
+import screenshot
+
+BOUNDARY = "frame"
+
+
+def grab_frame(region=None):
+    """Capture the screen (or a region) as an HxWx3 RGB uint8 array."""
+    return screenshot.capture_array(region)
+
+
+def dirty_tiles(previous, current, tile_size, threshold=0):
+    """Return a (rows, cols) bool grid of tiles that differ between two frames."""
+    if threshold:
+        diff = np.abs(previous.astype(np.int16) - current).max(axis=2) > threshold
+    else:
+        diff = (previous != current).any(axis=2)
+
+    height, width = diff.shape
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    pad_h = rows * tile_size - height
+    pad_w = cols * tile_size - width
+    if pad_h or pad_w:
+        diff = np.pad(diff, ((0, pad_h), (0, pad_w)))
+    return diff.reshape(rows, tile_size, cols, tile_size).any(axis=(1, 3))
+
+
+def tiles_to_rects(tiles, tile_size, width, height):
+    """Merge dirty tiles into (x, y, w, h) rectangles clipped to the frame.
+
+    Horizontal runs of dirty tiles are merged per row, then identical runs in
+    consecutive rows are merged vertically.
+    """
+    open_runs = {}
+    rects = []
+    for row in range(tiles.shape[0]):
+        runs = set()
+        cols = np.flatnonzero(tiles[row])
+        if cols.size:
+            breaks = np.flatnonzero(np.diff(cols) != 1)
+            starts = np.concatenate(([cols[0]], cols[breaks + 1]))
+            ends = np.concatenate((cols[breaks], [cols[-1]]))
+            runs = {(int(s), int(e)) for s, e in zip(starts, ends)}
+
+        for run in list(open_runs):
+            if run not in runs:
+                rects.append((run, open_runs.pop(run), row))
+        for run in runs:
+            open_runs.setdefault(run, row)
+    for run, start_row in open_runs.items():
+        rects.append((run, start_row, tiles.shape[0]))
+
+    result = []
+    for (col_start, col_end), row_start, row_end in rects:
+        x = col_start * tile_size
+        y = row_start * tile_size
+        w = min((col_end + 1) * tile_size, width) - x
+        h = min(row_end * tile_size, height) - y
+        result.append((x, y, w, h))
+    result.sort(key=lambda r: (r[1], r[0]))
+    return result
+
+
+class FrameDiffEncoder:
+    """Keeps the previous frame and encodes only the tiles that changed.
+
+    Every ``keyframe_interval`` frames (and whenever the frame size changes or
+    more than ``max_dirty_ratio`` of the tiles are dirty) a full keyframe is
+    sent instead of a delta.
+    """
+
+    def __init__(self, tile_size=None, keyframe_interval=None, quality=None,
+                 threshold=0, max_dirty_ratio=0.6):
+        self.tile_size = tile_size or config.STREAM_TILE_SIZE
+        self.keyframe_interval = keyframe_interval or config.STREAM_KEYFRAME_INTERVAL
+        self.quality = quality or config.SCREENSHOT_QUALITY
+        self.threshold = threshold
+        self.max_dirty_ratio = max_dirty_ratio
+        self.previous = None
+        self.seq = 0
+        self.since_keyframe = 0
+
+    def force_keyframe(self):
+        """Make the next encoded frame a keyframe."""
+        self.previous = None
+
+    def encode(self, frame):
+        """Encode a frame. Return (kind, [((x, y, w, h), jpeg_bytes), ...]).
+
+        ``kind`` is "key" or "delta"; a delta with no rects means nothing changed.
+        """
+        height, width = frame.shape[:2]
+        self.seq += 1
+        keyframe = (
+            self.previous is None
+            or self.previous.shape != frame.shape
+            or self.since_keyframe >= self.keyframe_interval
+        )
+
+        if not keyframe:
+            tiles = dirty_tiles(self.previous, frame, self.tile_size, self.threshold)
+            if tiles.mean() > self.max_dirty_ratio:
+                keyframe = True
+
+        self.previous = frame
+        if keyframe:
+            self.since_keyframe = 0
+            kind, rects = "key", [(0, 0, width, height)]
+        else:
+            self.since_keyframe += 1
+            kind, rects = "delta", tiles_to_rects(tiles, self.tile_size, width, height)
+
+        # Dirty rectangles are encoded in parallel on the encoder pool
+        encoded = encoder.encode_many(
+            [frame[y:y + h, x:x + w] for x, y, w, h in rects],
+            codec="jpeg", quality=self.quality,
+        )
+        return kind, list(zip(rects, encoded))
+
+
+def stream_frames(source=None, fps=None, max_frames=0, diff_encoder=None):
+    """Yield multipart/x-mixed-replace chunks for a live dirty-rectangle stream.
+
+    ``source`` is any callable returning an HxWx3 uint8 RGB array (defaults to
+    a full-screen grab), so the stream can be driven by synthetic frames.
+    Each dirty rectangle is sent as its own JPEG part with headers describing
+    where it goes; unchanged frames send nothing. ``diff_encoder`` is the
+    FrameDiffEncoder holding the stream's state (a fresh one by default).
+    """
+    source = source or grab_frame
+    diff_encoder = diff_encoder or FrameDiffEncoder()
+    interval = 1.0 / (fps or config.STREAM_FPS)
+    sent = 0
+
+    while not max_frames or sent < max_frames:
+        started = time.perf_counter()
+        frame = source()
+        kind, parts = diff_encoder.encode(frame)
+        height, width = frame.shape[:2]
+        for index, ((x, y, w, h), data) in enumerate(parts):
+            headers = (
+                f"--{BOUNDARY}\r\n"
+                f"Content-Type: image/jpeg\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"X-Frame-Seq: {diff_encoder.seq}\r\n"
+                f"X-Frame-Kind: {kind}\r\n"
+                f"X-Frame-Size: {width},{height}\r\n"
+                f"X-Rect: {x},{y},{w},{h}\r\n"
+                f"X-Rect-Index: {index + 1}/{len(parts)}\r\n\r\n"
+            )
+            yield headers.encode("ascii") + data + b"\r\n"
+        sent += 1
+
+        remaining = interval - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
@@ -0,0 +1,252 @@
+"""Screen wait module - server-side waits for on-screen conditions."""
+
+import abc
+import time
+
+import numpy as np
+import pyautogui
+
+import config
+import screenshot
+import template_match
+
+
+# ============================================================
+# Conditions
+# ============================================================
+
+class Condition(abc.ABC):
+    """Base class: evaluated against the RGB pixels of ``region`` on each poll."""
+
+    region = None
+    small = False  # Poll with capture_small (the region alone) instead of the shared full frame
+
+    @abc.abstractmethod
+    def evaluate(self, pixels, now, changed):
+        """Return True once the condition holds. ``changed`` is False if the
+        pixels are identical to the previous poll."""
+
+    def sleep_hint(self, now):
+        """Longest useful sleep before the next poll, or None for no limit."""
+        return None
+
+    def result(self):
+        return {}
+
+
+class PixelCondition(Condition):
+    """Pixel at (x, y) matches (or, with ``match=False``, stops matching) a color."""
+
+    small = True
+
+    def __init__(self, x, y, color, tolerance=0, match=True):
+        x, y = int(x), int(y)
+        width, height = pyautogui.size()
+        if not (0 <= x < width and 0 <= y < height):
+            raise ValueError(f"Point ({x}, {y}) is outside the {width}x{height} screen")
+        self.region = (x, y, 1, 1)
+        self.color = np.array(screenshot.parse_color(color), dtype=np.int16)
+        self.tolerance = tolerance
+        self.match = match
+        self.current = None
+        self.state = False
+
+    def evaluate(self, pixels, now, changed):
+        if changed:
+            self.current = pixels[0, 0]
+            matches = np.abs(self.current.astype(np.int16) - self.color).max() <= self.tolerance
+            self.state = bool(matches) == self.match
+        return self.state
+
+    def result(self):
+        r, g, b = (int(v) for v in self.current)
+        return {"color": {"r": r, "g": g, "b": b}}
+
+
+class ChangedCondition(Condition):
+    """Region differs from how it looked when the wait started."""
+
+    def __init__(self, region=None, threshold=0, min_fraction=0.0):
+        self.region = region
+        self.threshold = threshold
+        self.min_fraction = min_fraction
+        self.baseline = None
+        self.fraction = 0.0
+
+    def evaluate(self, pixels, now, changed):
+        if self.baseline is None:
+            self.baseline = pixels
+            return False
+        if not changed:
+            return False
+        diff = np.abs(pixels.astype(np.int16) - self.baseline).max(axis=2) > self.threshold
+        self.fraction = float(diff.mean())
+        return bool(diff.any()) and self.fraction >= self.min_fraction
+
+    def result(self):
+        return {"changed_fraction": round(self.fraction, 6)}
+
+
+class StableCondition(Condition):
+    """Region has not changed for ``duration_ms``."""
+
+    def __init__(self, region=None, duration_ms=500, threshold=0):
+        self.region = region
+        self.duration = duration_ms / 1000
+        self.threshold = threshold
+        self.reference = None
+        self.last_change = None
+
+    def evaluate(self, pixels, now, changed):
+        if self.reference is None:
+            self.reference, self.last_change = pixels, now
+        elif changed:
+            diff = np.abs(pixels.astype(np.int16) - self.reference).max()
+            if diff > self.threshold:
+                self.reference, self.last_change = pixels, now
+        return now - self.last_change >= self.duration
+
+    def sleep_hint(self, now):
+        if self.last_change is None:
+            return None
+        return max(self.last_change + self.duration - now, 0)
+
+    def result(self):
+        return {"stable_ms": round(self.duration * 1000)}
+
+
+class TemplateCondition(Condition):
+    """Template appears (or, with ``appear=False``, disappears) inside region."""
+
+    def __init__(self, template, region=None, confidence=0.9, appear=True, coarse=True):
+        self.template = template
+        self.region = region
+        self.confidence = confidence
+        self.appear = appear
+        self.coarse = coarse
+        self.match = None
+
+    def evaluate(self, pixels, now, changed):
+        if changed:
+            gray = template_match.to_gray(pixels)
+            found = template_match.search(
+                gray, self.template.gray, self.confidence, 1, self.coarse
+            )
+            self.match = found[0] if found else None
+        return (self.match is not None) == self.appear
+
+    def result(self):
+        if self.match is None:
+            return {"found": False}
+        y, x, score = self.match
+        offset_x, offset_y = (self.region[0], self.region[1]) if self.region else (0, 0)
+        return {
+            "found": True,
+            "x": offset_x + x + self.template.width // 2,
+            "y": offset_y + y + self.template.height // 2,
+            "confidence": round(score, 4),
+        }
+
+
+def _non_negative(spec, field, default):
+    """``spec[field]`` as a finite number >= 0; ValueError otherwise."""
+    value = spec.get(field, default)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number") from None
+    if not 0 <= value < float("inf"):
+        raise ValueError(f"{field} must be >= 0")
+    return value
+
+
+def build_condition(spec):
+    """Build a Condition from a JSON spec dict. Raises ValueError (or KeyError) for bad specs."""
+    if not isinstance(spec, dict):
+        raise ValueError("condition must be an object")
+    kind = spec.get("type", "")
+    region = screenshot.parse_region(spec.get("region"))
+
+    if kind == "pixel":
+        return PixelCondition(
+            spec["x"], spec["y"], spec["color"],
+            _non_negative(spec, "tolerance", 0), spec.get("match", True),
+        )
+    if kind == "changed":
+        return ChangedCondition(
+            region, _non_negative(spec, "threshold", 0), _non_negative(spec, "min_fraction", 0.0)
+        )
+    if kind == "stable":
+        return StableCondition(
+            region, _non_negative(spec, "duration_ms", 500), _non_negative(spec, "threshold", 0)
+        )
+    if kind in ("template_appears", "template_disappears"):
+        if spec.get("template"):
+            template = template_match.registry.get(spec["template"])
+            if template is None:
+                raise ValueError(f"Unknown template: {spec['template']}")
+        elif spec.get("image"):
+            template = template_match.registry.from_base64(spec["image"])
+        else:
+            template = template_match.registry.from_path(spec["path"])
+        return TemplateCondition(
+            template, region, spec.get("confidence", 0.9),
+            appear=kind == "template_appears", coarse=spec.get("coarse", True),
+        )
+    raise ValueError(f"Unknown condition type: {kind}")
+
+
+# ============================================================
+# Wait Loop
+# ============================================================
+
+def wait_for(condition, timeout=10, min_interval_ms=None, max_interval_ms=None):
+    """Poll until ``condition`` holds or ``timeout`` seconds pass.
+
+    The poll interval starts at ``min_interval_ms`` and backs off towards
+    ``max_interval_ms`` while the screen is static, dropping back to the
+    minimum as soon as the watched pixels change.
+    """
+    if min_interval_ms is None:
+        min_interval_ms = config.WAIT_MIN_INTERVAL_MS
+    if max_interval_ms is None:
+        max_interval_ms = config.WAIT_MAX_INTERVAL_MS
+    min_interval = min_interval_ms / 1000
+    max_interval = max_interval_ms / 1000
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = min_interval
+    previous = None
+    polls = 0
+
+    while True:
+        if condition.small:
+            pixels = screenshot.capture_small(condition.region).rgb()
+        else:
+            pixels = screenshot.capture_frame(condition.region).rgb()
+        now = time.monotonic()
+        changed = previous is None or not np.array_equal(previous, pixels)
+        previous = pixels
+        polls += 1
+
+        if condition.evaluate(pixels, now, changed):
+            return {
+                "success": True,
+                "elapsed_ms": round((now - start) * 1000, 1),
+                "polls": polls,
+                **condition.result(),
+            }
+        if now >= deadline:
+            return {
+                "success": False,
+                "error": f"Condition not met within {timeout}s",
+                "polls": polls,
+                **condition.result(),
+            }
+
+        interval = min_interval if changed else min(interval * 1.5, max_interval)
+        delay = min(interval, deadline - now)
+        hint = condition.sleep_hint(now)
+        if hint is not None:
+            delay = min(delay, max(hint, min_interval))
+        time.sleep(delay)
@@ -1,38 +1,403 @@
 """Screenshot module - handles screen capture operations."""
 
+import abc
 import base64
-import io
+import threading
+import time
 
+import numpy as np
 import pyautogui
 from PIL import Image
 
+import config
+import encoder
+import metrics
+
+STAGE_METRIC = "pcc_stage_duration_seconds"
+STAGE_HELP = "Time spent in request sub-stages (capture, encode, serialize)"
+
+# ============================================================
+# Frames
+# ============================================================
+
+class Frame:
+    """A captured frame: an HxWxC uint8 pixel array in "RGB" or "BGRA" layout.
+
+    Backends hand over their native buffer wrapped without copying; conversion
+    to RGB or PIL only happens when a caller asks for it.
+    """
+
+    __slots__ = ("pixels", "mode", "_image")
+
+    def __init__(self, pixels, mode="RGB", image=None):
+        self.pixels = pixels
+        self.mode = mode
+        self._image = image
+
+    @classmethod
+    def from_image(cls, image):
+        """Wrap a PIL image (converted to RGB if needed)."""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return cls(np.asarray(image), "RGB", image)
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+    def rgb(self):
+        """Return an HxWx3 RGB array (a view for BGRA frames, no copy)."""
+        if self.mode == "BGRA":
+            return self.pixels[..., 2::-1]
+        return self.pixels
+
+    def image(self):
+        """Return the frame as a PIL RGB image."""
+        if self._image is None:
+            if self.mode == "BGRA":
+                pixels = np.ascontiguousarray(self.pixels)
+                self._image = Image.frombuffer(
+                    "RGB", (self.width, self.height), pixels, "raw", "BGRX", 0, 1
+                )
+            else:
+                self._image = Image.fromarray(np.ascontiguousarray(self.pixels))
+        return self._image
+
+    def crop(self, x, y, width, height):
+        """Return a view of a sub-rectangle as a new Frame."""
+        return Frame(self.pixels[y:y + height, x:x + width], self.mode)
+
+    def pixel(self, x, y):
+        """Return (r, g, b) at frame coordinate."""
+        value = self.pixels[y, x]
+        if self.mode == "BGRA":
+            return int(value[2]), int(value[1]), int(value[0])
+        return int(value[0]), int(value[1]), int(value[2])
+
+
+# ============================================================
+# Capture Backends
+# ============================================================
+
+class CaptureBackend(abc.ABC):
+    """Base class for screen capture backends."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def grab(self, region=None):
+        """Capture the full screen or an (x, y, width, height) region as a Frame."""
+
+    def get_pixel(self, x, y):
+        """Return (r, g, b) at screen coordinate."""
+        return self.grab((x, y, 1, 1)).pixel(0, 0)
+
+    def size(self):
+        """Return the (width, height) a full-screen grab would have."""
+        width, height = pyautogui.size()
+        return width, height
+
+
+class PyAutoGuiBackend(CaptureBackend):
+    """Capture through pyautogui (PIL images, always available)."""
+
+    name = "pyautogui"
+
+    def grab(self, region=None):
+        if region:
+            return Frame.from_image(pyautogui.screenshot(region=tuple(region)))
+        return Frame.from_image(pyautogui.screenshot())
+
+    def get_pixel(self, x, y):
+        pixel = pyautogui.pixel(x, y)
+        return int(pixel[0]), int(pixel[1]), int(pixel[2])
+
+
+class MssBackend(CaptureBackend):
+    """Capture raw BGRA buffers through mss without a PIL round-trip."""
+
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self._mss = mss
+        # mss instances hold per-thread device contexts on Windows
+        self._local = threading.local()
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = self._mss.mss()
+        return sct
+
+    def grab(self, region=None):
+        sct = self._sct()
+        if region:
+            x, y, width, height = region
+            monitor = {"left": x, "top": y, "width": width, "height": height}
+        else:
+            monitor = sct.monitors[1]
+        shot = sct.grab(monitor)
+        pixels = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        return Frame(pixels, "BGRA")
+
+    def size(self):
+        monitor = self._sct().monitors[1]
+        return monitor["width"], monitor["height"]
+
+
+class SyntheticBackend(CaptureBackend):
+    """In-memory frame source for tests and benchmarks (no display needed)."""
+
+    name = "synthetic"
+
+    def __init__(self, width=1920, height=1080, color=(0, 0, 0)):
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[:] = color
+        self.grabs = 0
+        self._lock = threading.Lock()
+
+    def set_frame(self, pixels):
+        """Replace the whole frame with an HxWx3 RGB array."""
+        with self._lock:
+            self.pixels = np.array(pixels, dtype=np.uint8)
+
+    def fill(self, x, y, width, height, color):
+        """Paint a solid rectangle into the frame."""
+        with self._lock:
+            self.pixels[y:y + height, x:x + width] = color
+
+    def grab(self, region=None):
+        with self._lock:
+            self.grabs += 1
+            if region:
+                x, y, width, height = region
+                return Frame(self.pixels[y:y + height, x:x + width].copy())
+            return Frame(self.pixels.copy())
+
+    def get_pixel(self, x, y):
+        with self._lock:
+            self.grabs += 1
+            value = self.pixels[y, x]
+        return int(value[0]), int(value[1]), int(value[2])
+
+    def size(self):
+        with self._lock:
+            return self.pixels.shape[1], self.pixels.shape[0]
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGuiBackend,
+    "mss": MssBackend,
+    "synthetic": SyntheticBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the active capture backend, creating it from config on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = BACKENDS[config.CAPTURE_BACKEND]()
+    return _backend
+
+
+def set_backend(backend):
+    """Switch capture backend by name or instance. Returns the new backend."""
+    global _backend
+    if isinstance(backend, str):
+        backend = BACKENDS[backend]()
+    with _backend_lock:
+        _backend = backend
+    frame_cache.invalidate()
+    return backend
+
+
+# ============================================================
+# Frame Cache
+# ============================================================
+
+class _Capture:
+    """One in-flight grab, shared by its leader and the callers waiting on it."""
+
+    __slots__ = ("done", "frame", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.frame = None
+        self.error = None
+
+
+class FrameCache:
+    """Shares one full-screen capture between callers for ``max_age`` seconds.
+
+    Callers that miss while a capture is already in flight wait for that
+    capture instead of starting their own (single-flight), and get its
+    frame - or its exception, never an older frame.
+    """
+
+    def __init__(self, max_age=0.03):
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._frame = None
+        self._time = 0.0
+        self._inflight = None
+        self._lock = threading.Lock()
+
+    def peek(self):
+        """Return the cached frame if still fresh, else None (never captures)."""
+        with self._lock:
+            if self._frame is not None and time.monotonic() - self._time < self.max_age:
+                self.hits += 1
+                return self._frame
+        return None
+
+    def get(self, grab):
+        """Return a fresh frame, calling ``grab()`` at most once per concurrent miss."""
+        with self._lock:
+            if self._frame is not None and time.monotonic() - self._time < self.max_age:
+                self.hits += 1
+                return self._frame
+            capture = self._inflight
+            leader = capture is None
+            if leader:
+                capture = self._inflight = _Capture()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            capture.done.wait()
+            if capture.error is not None:
+                raise capture.error
+            return capture.frame
+
+        started = time.monotonic()
+        try:
+            capture.frame = grab()
+            return capture.frame
+        except BaseException as e:
+            capture.error = e
+            raise
+        finally:
+            with self._lock:
+                if capture.frame is not None:
+                    self._frame = capture.frame
+                    self._time = started
+                self._inflight = None
+            capture.done.set()
+
+    def invalidate(self):
+        """Drop the cached frame."""
+        with self._lock:
+            self._frame = None
+
+    def stats(self):
+        """Return hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "max_age_ms": round(self.max_age * 1000, 3),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.coalesced = 0
+
+
+frame_cache = FrameCache(config.FRAME_CACHE_MAX_AGE_MS / 1000)
+
+
+def _in_bounds(frame, region):
+    x, y, width, height = region
+    return x >= 0 and y >= 0 and x + width <= frame.width and y + height <= frame.height
+
+
+# ============================================================
+# Capture API
+# ============================================================
+
+def capture_frame(region=None, fresh=False):
+    """Capture the screen (or region) as a Frame without PIL conversion.
+
+    Goes through the shared frame cache unless it is disabled
+    (``FRAME_CACHE_MAX_AGE_MS = 0``) or ``fresh`` is set; regions are cropped
+    from the cached full frame.
+    """
+    backend = get_backend()
+    if fresh or frame_cache.max_age <= 0:
+        return backend.grab(region)
+
+    frame = frame_cache.get(backend.grab)
+    if region is None:
+        return frame
+    if _in_bounds(frame, region):
+        return frame.crop(*region)
+    return backend.grab(region)
+
+
+def capture_small(region):
+    """Capture a small region: crop the cached frame if it is still fresh,
+    otherwise grab only the region from the backend, never the full screen."""
+    frame = frame_cache.peek()
+    if frame is not None and _in_bounds(frame, region):
+        return frame.crop(*region)
+    return get_backend().grab(region)
+
+
+def capture_array(region=None):
+    """Capture the screen (or region) as an HxWx3 RGB uint8 array."""
+    return capture_frame(region).rgb()
+
 
 def capture_full():
     """Capture entire screen, return PIL Image."""
-    return pyautogui.screenshot()
+    return capture_frame().image()
 
 
 def capture_region(x, y, width, height):
     """Capture specific region of screen."""
-    return pyautogui.screenshot(region=(x, y, width, height))
+    return capture_frame((x, y, width, height)).image()
 
 
-def capture_to_base64(image=None, format="JPEG", quality=85):
-    """Capture screen and return as base64 string."""
+def capture_to_bytes(image=None, format="JPEG", quality=85, scale=1.0, compress_level=None):
+    """Capture screen and return the encoded image bytes (encoded on the worker pool)."""
     if image is None:
-        image = capture_full()
-    
-    buffer = io.BytesIO()
-    if format.upper() == "JPEG":
-        # Convert RGBA to RGB for JPEG
-        if image.mode == "RGBA":
-            image = image.convert("RGB")
-        image.save(buffer, format="JPEG", quality=quality)
-    else:
-        image.save(buffer, format=format)
-    
-    buffer.seek(0)
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+        with metrics.timer(STAGE_METRIC, STAGE_HELP, stage="capture"):
+            image = capture_frame()
+    with metrics.timer(STAGE_METRIC, STAGE_HELP, stage="encode", codec=encoder.normalize_codec(format)):
+        return encoder.encode_image(
+            image, codec=format, quality=quality, scale=scale, compress_level=compress_level
+        )
+
+
+def capture_to_base64(image=None, format="JPEG", quality=85, scale=1.0, compress_level=None):
+    """Capture screen and return as base64 string (encoded on the worker pool)."""
+    data = capture_to_bytes(image, format, quality, scale, compress_level)
+    with metrics.timer(STAGE_METRIC, STAGE_HELP, stage="base64"):
+        return base64.b64encode(data).decode("ascii")
+
+
+def capture_encoded(region=None, codec="jpeg", quality=85, scale=1.0, compress_level=None):
+    """Capture screen (or region) and return encoded bytes (encoded on the worker pool)."""
+    return encoder.encode_image(
+        capture_frame(region), codec=codec, quality=quality, scale=scale,
+        compress_level=compress_level,
+    )
 
 
 def capture_to_file(filepath, format="PNG"):
@@ -43,27 +408,103 @@ def capture_to_file(filepath, format="PNG"):
 
 
 def get_pixel_color(x, y):
-    """Get RGB color at coordinate."""
-    image = pyautogui.screenshot(region=(x, y, 1, 1))
-    pixel = image.getpixel((0, 0))
-    return {"r": pixel[0], "g": pixel[1], "b": pixel[2]}
+    """Get RGB color at coordinate (from the shared frame when one is fresh).
+
+    Raises ValueError for a point off the screen rather than letting the
+    backend wrap negative coordinates or fail on large ones.
+    """
+    frame = frame_cache.peek() if frame_cache.max_age > 0 else None
+    width, height = (frame.width, frame.height) if frame is not None else get_backend().size()
+    if not (0 <= x < width and 0 <= y < height):
+        raise ValueError(f"Point ({x}, {y}) is outside the {width}x{height} screen")
+    if frame is not None:
+        r, g, b = frame.pixel(x, y)
+    else:
+        r, g, b = get_backend().get_pixel(x, y)
+    return {"r": r, "g": g, "b": b}
+
+
+def parse_region(value):
+    """Parse {"x", "y", "width", "height"} or [x, y, width, height] into a tuple (None passes through)."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return (int(value.get("x", 0)), int(value.get("y", 0)),
+                int(value["width"]), int(value["height"]))
+    x, y, width, height = value
+    return int(x), int(y), int(width), int(height)
+
+
+def parse_color(value):
+    """Parse "#rrggbb", [r, g, b] or {"r", "g", "b"} into an (r, g, b) tuple."""
+    if isinstance(value, str):
+        value = value.lstrip("#")
+        return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    if isinstance(value, dict):
+        return int(value["r"]), int(value["g"]), int(value["b"])
+    return int(value[0]), int(value[1]), int(value[2])
+
+
+def sample_pixels(points, expected=None, tolerance=0, hex_colors=False, fresh=False):
+    """Read many pixels from a single capture.
+
+    ``points`` is a list of [x, y] pairs. ``expected`` optionally holds one
+    color (or None to skip) per point; ``tolerance`` is the max per-channel
+    difference, either one number or one per point. Malformed arguments
+    raise ValueError before anything is captured, points off the screen
+    right after.
+    """
+    try:
+        coords = np.asarray(points, dtype=np.intp).reshape(-1, 2)
+    except (TypeError, ValueError):
+        raise ValueError("points must be a list of [x, y] pairs")
+    if expected is not None:
+        if not isinstance(expected, (list, tuple)) or len(expected) != len(coords):
+            raise ValueError("expected must have one entry per point")
+        try:
+            targets = np.array(
+                [parse_color(color) if color is not None else (0, 0, 0) for color in expected],
+                dtype=np.int16,
+            ).reshape(-1, 3)
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError("expected colors must be \"#rrggbb\", [r, g, b] or null")
+        try:
+            limits = np.asarray(tolerance, dtype=np.int16)
+        except (TypeError, ValueError):
+            raise ValueError("tolerance must be a number or one number per point")
+        if limits.ndim > 1 or (limits.ndim == 1 and len(limits) != len(coords)):
+            raise ValueError("tolerance must be a number or one number per point")
+
+    frame = capture_frame(fresh=fresh)
+    xs, ys = coords[:, 0], coords[:, 1]
+
+    outside = (xs < 0) | (ys < 0) | (xs >= frame.width) | (ys >= frame.height)
+    if outside.any():
+        index = int(np.flatnonzero(outside)[0])
+        raise ValueError(f"Point {index} ({xs[index]}, {ys[index]}) is outside the "
+                         f"{frame.width}x{frame.height} screen")
+
+    colors = frame.rgb()[ys, xs]
+    if hex_colors:
+        packed = (colors[:, 0].astype(np.uint32) << 16) | (colors[:, 1].astype(np.uint32) << 8) | colors[:, 2]
+        result = {"success": True, "colors": [f"#{v:06x}" for v in packed.tolist()]}
+    else:
+        result = {"success": True, "colors": colors.tolist()}
+
+    if expected is not None:
+        checked = np.array([color is not None for color in expected], dtype=bool)
+        within = np.abs(colors.astype(np.int16) - targets).max(axis=1) <= limits
+        matches = [bool(m) if c else None for m, c in zip(within.tolist(), checked.tolist())]
+        result["matches"] = matches
+        result["all_match"] = bool(within[checked].all())
+    return result
 
 
 def locate_on_screen(image_path, confidence=0.9):
     """Find image on screen, return coordinates."""
+    import template_match
     try:
-        location = pyautogui.locateOnScreen(image_path, confidence=confidence)
-        if location:
-            center = pyautogui.center(location)
-            return {
-                "found": True,
-                "x": center[0],
-                "y": center[1],
-                "left": location.left,
-                "top": location.top,
-                "width": location.width,
-                "height": location.height,
-            }
-        return {"found": False}
+        template = template_match.registry.from_path(image_path)
+        return template_match.locate(template, confidence=confidence)
     except Exception as e:
         return {"found": False, "error": str(e)}
@@ -0,0 +1,133 @@
+"""Serializers module - JSON (orjson when installed), MessagePack and CBOR codecs.
+
+Payloads may hold raw ``bytes`` (encoded images). Binary formats carry them
+as native byte strings; JSON turns them into base64 text, so JSON clients
+see exactly what they did before and binary clients skip base64 entirely.
+"""
+
+import base64
+import json
+
+import config
+
+try:
+    import orjson
+except ImportError:  # Optional; stdlib json is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+JSON_MIMETYPE = "application/json"
+
+
+def _plain(value):
+    """Convert values the encoders don't know natively (numpy scalars/arrays, memoryviews)."""
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+    return _plain(value)
+
+
+# ============================================================
+# Codecs
+# ============================================================
+
+class Format:
+    """One wire format: how to encode/decode a payload and what to call it."""
+
+    def __init__(self, name, mimetype, dumps, loads, aliases=(), stream_mimetype=None, separator=b""):
+        self.name = name
+        self.mimetype = mimetype
+        self.mimetypes = (mimetype, *aliases)
+        self.dumps = dumps
+        self.loads = loads
+        # Streamed responses (NDJSON-style) are a sequence of encoded items
+        self.stream_mimetype = stream_mimetype or mimetype
+        self.separator = separator
+        self.binary = name != "json"
+
+    def __repr__(self):
+        return f"<Format {self.name} {self.mimetype}>"
+
+
+def _json_codec():
+    use_orjson = orjson is not None and config.JSON_LIBRARY in ("auto", "orjson")
+    if use_orjson:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        return "orjson", lambda obj: orjson.dumps(obj, default=_json_default, option=options), orjson.loads
+
+    def dumps(obj):
+        return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return "json", dumps, json.loads
+
+
+JSON_LIBRARY, _json_dumps, _json_loads = _json_codec()
+
+FORMATS = {
+    "json": Format("json", JSON_MIMETYPE, _json_dumps, _json_loads,
+                   stream_mimetype="application/x-ndjson", separator=b"\n"),
+}
+if msgpack is not None:
+    FORMATS["msgpack"] = Format(
+        "msgpack", "application/msgpack",
+        lambda obj: msgpack.packb(obj, use_bin_type=True, default=_plain),
+        lambda data: msgpack.unpackb(data, raw=False),
+        aliases=("application/x-msgpack", "application/vnd.msgpack"),
+    )
+if cbor2 is not None:
+    FORMATS["cbor"] = Format(
+        "cbor", "application/cbor",
+        lambda obj: cbor2.dumps(obj, default=lambda encoder, value: encoder.encode(_plain(value))),
+        cbor2.loads,
+        stream_mimetype="application/cbor-seq",
+    )
+
+# Formats whose optional package isn't installed: mimetype -> package name
+UNAVAILABLE = {}
+if msgpack is None:
+    UNAVAILABLE.update(dict.fromkeys(
+        ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack"), "msgpack"))
+if cbor2 is None:
+    UNAVAILABLE["application/cbor"] = "cbor2"
+
+# Server preference order for content negotiation: JSON first, so "*/*" gets JSON
+MIMETYPES = [mimetype for fmt in FORMATS.values() for mimetype in fmt.mimetypes]
+_by_mimetype = {mimetype: fmt for fmt in FORMATS.values() for mimetype in fmt.mimetypes}
+
+
+def for_mimetype(mimetype):
+    """Format for a (parameter-free) mimetype, or None if it isn't supported."""
+    return _by_mimetype.get(mimetype)
+
+
+def dumps(obj, fmt="json"):
+    """Encode ``obj`` as bytes in format ``fmt`` (a name or Format)."""
+    return (FORMATS[fmt] if isinstance(fmt, str) else fmt).dumps(obj)
+
+
+def loads(data, fmt="json"):
+    return (FORMATS[fmt] if isinstance(fmt, str) else fmt).loads(data)
+
+
+def binary_field(value):
+    """Bytes from a request field: binary formats send them as-is, JSON as base64."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return base64.b64decode(value)
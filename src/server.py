@@ -5,15 +5,17 @@ Binds to 127.0.0.1 only (localhost). No external network access.
 Designed to be compiled to EXE and run at Windows startup.
 """
 
-import json
 import logging
 import os
+import re
 import sys
+import threading
 import time
 from functools import wraps
-from logging.handlers import RotatingFileHandler
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, has_request_context, jsonify, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 
 # Add parent dir to path for imports
 if getattr(sys, 'frozen', False):
@@ -37,8 +39,23 @@ import config
 import mouse_control
 import keyboard_control
 import screenshot
+import screen_stream
+import screen_wait
+import template_match
 import window_manager
+import actions
 import clipboard
+import clipboard_history
+import dib
+import encoder
+import events
+import input_queue
+import input_stream
+import log_pipeline
+import macros
+import metrics
+import profiler
+import serializers
 
 # ============================================================
 # App Setup
@@ -56,39 +73,56 @@ pyautogui.PAUSE = config.PAUSE
 # ============================================================
 
 def setup_logging():
-    """Configure logging to file and console."""
-    log_dir = os.path.join(BASE_DIR, "logs")
-    os.makedirs(log_dir, exist_ok=True)
-    log_file = os.path.join(log_dir, "server.log")
-
-    formatter = logging.Formatter(
-        "%(asctime)s [%(levelname)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    """Queue log records to a background writer (JSON lines file + console)."""
+    log_file = config.LOG_FILE
+    if not os.path.isabs(log_file):
+        log_file = os.path.join(BASE_DIR, log_file)
+    log_pipeline.configure(
+        log_file,
+        level=config.LOG_LEVEL,
+        console_level=config.LOG_CONSOLE_LEVEL,
+        max_bytes=config.LOG_MAX_BYTES,
+        backups=config.LOG_BACKUP_COUNT,
+        queue_size=config.LOG_QUEUE_SIZE,
+        flush_every=config.LOG_FLUSH_RECORDS,
     )
 
-    # File handler (rotating, max 5MB, keep 3 backups)
-    file_handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=3)
-    file_handler.setFormatter(formatter)
-    file_handler.setLevel(logging.DEBUG)
-
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
-
-    logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-
     # Reduce Flask's default logging noise
     logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
-    return logger
+    return logging.getLogger("server")
 
 
 logger = setup_logging()
 
+macro_library = macros.MacroLibrary(os.path.join(BASE_DIR, "macros"))
+for load_error in macro_library.load():
+    logger.warning("Macro not loaded: %s", load_error)
+
+clipboard_log = None  # ClipboardHistory, created by start_clipboard_history()
+
+
+def start_clipboard_history():
+    """Record every clipboard change from the shared monitor into the history."""
+    global clipboard_log
+    spill = None
+    if config.CLIPBOARD_HISTORY_SPILL_MB:
+        spill = clipboard_history.SpillStore(
+            os.path.join(BASE_DIR, "cache", "clipboard_history.bin"),
+            config.CLIPBOARD_HISTORY_SPILL_MB * 1024 * 1024,
+        )
+    history = clipboard_history.ClipboardHistory(
+        max_entries=config.CLIPBOARD_HISTORY_SIZE,
+        max_bytes=config.CLIPBOARD_HISTORY_MAX_MB * 1024 * 1024,
+        spill=spill,
+    )
+    monitor = clipboard.get_monitor()
+    if monitor.last is not None:
+        history.record(monitor.last)
+    monitor.add_listener(history.record)
+    clipboard_log = history
+    return history
+
 # ============================================================
 # Auth Middleware (optional)
 # ============================================================
@@ -104,6 +138,69 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated
 
+# ============================================================
+# Long-lived Requests (streams and blocking waits)
+# ============================================================
+
+# Each open stream or wait holds a worker thread for its whole lifetime, so
+# cap them below SERVER_THREADS and keep the rest for short calls
+LONG_REQUEST_LIMIT = max(1, min(config.SERVER_LONG_REQUESTS, config.SERVER_THREADS - 2))
+_long_requests = 0
+_long_requests_lock = threading.Lock()
+
+
+def _release_long_request():
+    global _long_requests
+    with _long_requests_lock:
+        _long_requests -= 1
+
+
+def long_request(f):
+    """Decorator for routes that stream or block: takes one of
+    LONG_REQUEST_LIMIT slots until the response is closed, or answers 503."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        global _long_requests
+        with _long_requests_lock:
+            full = _long_requests >= LONG_REQUEST_LIMIT
+            if not full:
+                _long_requests += 1
+        if full:
+            response = jsonify({"success": False, "error": "Too many open streams and waits"})
+            response.status_code = 503
+            response.headers["Retry-After"] = "1"
+            return response
+        try:
+            response = app.make_response(f(*args, **kwargs))
+        except BaseException:
+            _release_long_request()
+            raise
+        # Streams hold the slot until the client disconnects and the body is closed
+        response.call_on_close(_release_long_request)
+        return response
+    return decorated
+
+
+def wait_timeout(data, default=10):
+    """The request's wait timeout in seconds, capped at WAIT_MAX_TIMEOUT_S."""
+    try:
+        timeout = float(data.get("timeout", default))
+    except (TypeError, ValueError):
+        raise BadRequest("timeout must be a number")
+    return max(0.0, min(timeout, config.WAIT_MAX_TIMEOUT_S))
+
+
+def wait_intervals(data):
+    """The request's (min_interval_ms, max_interval_ms) poll bounds; 0 < min <= max."""
+    try:
+        low = float(data.get("min_interval_ms", config.WAIT_MIN_INTERVAL_MS))
+        high = float(data.get("max_interval_ms", config.WAIT_MAX_INTERVAL_MS))
+    except (TypeError, ValueError):
+        raise BadRequest("min_interval_ms and max_interval_ms must be numbers")
+    if not 0 < low <= high < float("inf"):
+        raise BadRequest("Poll intervals must satisfy 0 < min_interval_ms <= max_interval_ms")
+    return low, high
+
 # ============================================================
 # Error Handler
 # ============================================================
@@ -111,7 +208,7 @@ def require_api_key(f):
 @app.errorhandler(Exception)
 def handle_error(e):
     """Return JSON error responses."""
-    logger.error(f"Unhandled error: {e}", exc_info=True)
+    logger.error("Unhandled error: %s", e, exc_info=True)
     return jsonify({"success": False, "error": str(e)}), 500
 
 
@@ -124,20 +221,244 @@ def not_found(e):
 def method_not_allowed(e):
     return jsonify({"success": False, "error": "Method not allowed"}), 405
 
+
+@app.errorhandler(400)
+def bad_request(e):
+    return jsonify({"success": False, "error": e.description}), 400
+
+
+@app.errorhandler(415)
+def unsupported_media_type(e):
+    return jsonify({"success": False, "error": e.description}), 415
+
 # ============================================================
-# Helper
+# Serialization (JSON / MessagePack / CBOR)
 # ============================================================
 
+def response_format():
+    """Serializer for this request's responses: the best `Accept` match,
+    defaulting to the request body's own format, then JSON."""
+    if not has_request_context():
+        return serializers.FORMATS["json"]
+    fmt = g.get("response_format")
+    if fmt is None:
+        body = serializers.for_mimetype(request.mimetype)
+        default = body.mimetype if body else serializers.JSON_MIMETYPE
+        # Ties go to the first candidate, so "*/*" keeps the body's format
+        chosen = request.accept_mimetypes.best_match([default, *serializers.MIMETYPES], default)
+        fmt = g.response_format = serializers.for_mimetype(chosen)
+    return fmt
+
+
+class SerializerProvider(DefaultJSONProvider):
+    """Routes `jsonify` through serializers: orjson when installed, and
+    MessagePack/CBOR when the client asks for them."""
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return serializers.dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return serializers.loads(s)
+
+    def response(self, *args, **kwargs):
+        fmt = response_format()
+        response = self._app.response_class(
+            fmt.dumps(self._prepare_response_obj(args, kwargs)), mimetype=fmt.mimetype
+        )
+        response.vary.add("Accept")
+        return response
+
+
+app.json = SerializerProvider(app)
+
+
 def get_json():
-    """Get JSON body from request, handle empty body."""
+    """Get the request body (JSON, MessagePack or CBOR) as a dict, handle empty body."""
     if request.is_json:
         return request.get_json()
-    return {}
+    fmt = serializers.for_mimetype(request.mimetype)
+    if fmt is None:
+        if request.mimetype in serializers.UNAVAILABLE:
+            raise UnsupportedMediaType(
+                f"{request.mimetype} needs the {serializers.UNAVAILABLE[request.mimetype]} package"
+            )
+        return {}
+    data = request.get_data(cache=False)
+    if not data:
+        return {}
+    try:
+        return fmt.loads(data)
+    except Exception as e:
+        raise BadRequest(f"Invalid {fmt.name} body: {str(e) or type(e).__name__}")
+
+# ============================================================
+# Request Metrics
+# ============================================================
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    # Clients may pass their own id to correlate logs; it is echoed back
+    g.request_id = request.headers.get("X-Request-Id") or log_pipeline.new_request_id()
+    log_pipeline.set_request_id(g.request_id)
+
+
+@app.after_request
+def record_request_time(response):
+    """Per-route latency (until the response is handed to the server)."""
+    start = g.pop("request_start", None)
+    if start is not None:
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe(
+            "pcc_http_request_duration_seconds",
+            elapsed,
+            "HTTP request latency by route",
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        if config.LOG_REQUESTS:
+            logger.info(
+                "%s %s %d %.1fms", request.method, request.path, response.status_code, elapsed * 1000,
+                extra={"method": request.method, "route": route, "status": response.status_code,
+                       "duration_ms": round(elapsed * 1000, 2)},
+            )
+    if "request_id" in g:
+        response.headers["X-Request-Id"] = g.request_id
+    return response
+
+
+@app.teardown_request
+def clear_request_id(exc):
+    log_pipeline.set_request_id(None)
+
+
+metrics.registry.gauge(
+    "pcc_input_queue_pending", "Input calls waiting to run", input_queue.scheduler.pending
+)
+metrics.registry.counter(
+    "pcc_input_executed_total", "Input calls executed", lambda: input_queue.scheduler.executed
+)
+metrics.registry.counter(
+    "pcc_frame_cache_requests_total", "Frame cache lookups by result",
+    lambda: {(("result", k),): v for k, v in screenshot.frame_cache.stats().items()
+             if k in ("hits", "misses", "coalesced")},
+)
+metrics.registry.counter(
+    "pcc_log_dropped_total", "Log records dropped because the log queue was full",
+    lambda: log_pipeline.stats().get("dropped", 0),
+)
+metrics.registry.gauge(
+    "pcc_long_requests_open", "Open streams and blocking waits (capped at SERVER_LONG_REQUESTS)",
+    lambda: _long_requests,
+)
+metrics.registry.gauge(
+    "pcc_event_subscribers", "Open /api/events streams",
+    lambda: len(events.bus.stats()["subscribers"]),
+)
+
+# ============================================================
+# Profiling (only available when config.API_KEY is set)
+# ============================================================
+
+def profiling_allowed():
+    """Profiling exposes code paths and timing, so it needs a configured and matching key."""
+    key = request.headers.get("X-API-Key") or request.args.get("api_key")
+    return bool(config.API_KEY) and key == config.API_KEY
+
+
+@app.before_request
+def start_request_profile():
+    """`?profile=1` on any route: run it under cProfile and return the stats instead."""
+    if request.args.get("profile") != "1":
+        return None
+    if not profiling_allowed():
+        return jsonify({"success": False, "error": "Profiling requires a configured API key"}), 403
+    try:
+        g.request_profile = profiler.RequestProfile()
+    except RuntimeError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return None
+
+
+@app.after_request
+def finish_request_profile(response):
+    request_profile = g.pop("request_profile", None)
+    if request_profile is None:
+        return response
+    stats = request_profile.stop(sort=request.args.get("sort", "cumulative"))
+    logger.info("Profiled %s %s", request.method, request.path)
+    profiled = Response(stats, mimetype="text/plain")
+    profiled.headers["X-Profiled-Status"] = str(response.status_code)
+    return profiled
+
+
+@app.route("/api/debug/profile", methods=["GET"])
+@require_api_key
+@long_request
+def debug_profile():
+    """Sample every thread for N seconds `?seconds=5&interval_ms=5&idle=0&format=collapsed|json`.
+
+    Collapsed output loads directly into flamegraph.pl or speedscope.
+    """
+    if not profiling_allowed():
+        return jsonify({"success": False, "error": "Profiling requires a configured API key"}), 403
+    seconds = min(request.args.get("seconds", 5, type=float), config.PROFILE_MAX_SECONDS)
+    interval = max(request.args.get("interval_ms", 5, type=float), 1) / 1000
+    try:
+        stacks, samples = profiler.sample(
+            seconds, interval, include_idle=request.args.get("idle", "0") in ("1", "true")
+        )
+    except RuntimeError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    logger.info("Sampling profile: %ss, %d samples", seconds, samples)
+    if request.args.get("format") == "json":
+        return jsonify({
+            "success": True,
+            "seconds": seconds,
+            "samples": samples,
+            "stacks": dict(stacks.most_common()),
+        })
+    return Response(profiler.collapsed(stacks), mimetype="text/plain")
+
+# ============================================================
+# Input Sessions (X-Session-Id / X-Priority headers)
+# ============================================================
+
+# Endpoints whose input is queued as bulk unless the client says otherwise
+BULK_ENDPOINTS = {"combo_batch", "macros_run"}
+
+
+@app.before_request
+def enter_input_session():
+    """Attribute this request's input calls to its session and priority class."""
+    default = "bulk" if request.endpoint in BULK_ENDPOINTS else "interactive"
+    priority = request.headers.get("X-Priority", default)
+    if priority not in input_queue.PRIORITIES:
+        return jsonify({"success": False, "error": f"Unknown priority: {priority}"}), 400
+    input_queue.scheduler.enter(request.headers.get("X-Session-Id"), priority)
+
+
+@app.teardown_request
+def leave_input_session(exc):
+    input_queue.scheduler.leave()
 
 # ============================================================
 # System Routes
 # ============================================================
 
+@app.route("/api/metrics", methods=["GET"])
+@require_api_key
+def metrics_export():
+    """Latency histograms and gauges in Prometheus text format (`?format=json` for percentiles)."""
+    if request.args.get("format") == "json":
+        return jsonify({"success": True, "metrics": metrics.registry.summaries()})
+    return Response(metrics.registry.prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 @app.route("/api/health", methods=["GET"])
 def health():
     """Health check endpoint."""
@@ -145,6 +466,7 @@ def health():
         "status": "ok",
         "uptime": round(time.time() - START_TIME, 1),
         "version": "1.0.0",
+        "formats": list(serializers.FORMATS),
     })
 
 
@@ -172,11 +494,8 @@ def mouse_position():
 def mouse_move():
     """Move mouse to absolute coordinates."""
     data = get_json()
-    x = data.get("x", 0)
-    y = data.get("y", 0)
-    duration = data.get("duration", 0)
-    result = mouse_control.move_to(x, y, duration)
-    logger.debug(f"Mouse move to ({x}, {y})")
+    result = actions.run("move", data)
+    logger.debug("Mouse move to (%s, %s)", data.get("x", 0), data.get("y", 0))
     return jsonify(result)
 
 
@@ -185,11 +504,8 @@ def mouse_move():
 def mouse_move_relative():
     """Move mouse relative to current position."""
     data = get_json()
-    dx = data.get("dx", 0)
-    dy = data.get("dy", 0)
-    duration = data.get("duration", 0)
-    result = mouse_control.move_relative(dx, dy, duration)
-    logger.debug(f"Mouse move relative ({dx}, {dy})")
+    result = actions.run("move_relative", data)
+    logger.debug("Mouse move relative (%s, %s)", data.get("dx", 0), data.get("dy", 0))
     return jsonify(result)
 
 
@@ -198,12 +514,9 @@ def mouse_move_relative():
 def mouse_click():
     """Click at position."""
     data = get_json()
-    x = data.get("x")
-    y = data.get("y")
-    button = data.get("button", "left")
-    clicks = data.get("clicks", 1)
-    result = mouse_control.click(x, y, button, clicks)
-    logger.debug(f"Mouse click at ({x}, {y}) button={button} clicks={clicks}")
+    result = actions.run("click", data)
+    logger.debug("Mouse click at (%s, %s) button=%s clicks=%s", data.get("x"), data.get("y"),
+                 data.get("button", "left"), data.get("clicks", 1))
     return jsonify(result)
 
 
@@ -212,10 +525,8 @@ def mouse_click():
 def mouse_double_click():
     """Double click at position."""
     data = get_json()
-    x = data.get("x")
-    y = data.get("y")
-    result = mouse_control.double_click(x, y)
-    logger.debug(f"Mouse double click at ({x}, {y})")
+    result = actions.run("double_click", data)
+    logger.debug("Mouse double click at (%s, %s)", data.get("x"), data.get("y"))
     return jsonify(result)
 
 
@@ -224,10 +535,8 @@ def mouse_double_click():
 def mouse_right_click():
     """Right click at position."""
     data = get_json()
-    x = data.get("x")
-    y = data.get("y")
-    result = mouse_control.right_click(x, y)
-    logger.debug(f"Mouse right click at ({x}, {y})")
+    result = actions.run("right_click", data)
+    logger.debug("Mouse right click at (%s, %s)", data.get("x"), data.get("y"))
     return jsonify(result)
 
 
@@ -236,16 +545,9 @@ def mouse_right_click():
 def mouse_drag():
     """Drag from start to end position."""
     data = get_json()
-    start_x = data.get("start_x", 0)
-    start_y = data.get("start_y", 0)
-    end_x = data.get("end_x", 0)
-    end_y = data.get("end_y", 0)
-    duration = data.get("duration", 0.2)
-    button = data.get("button", "left")
-    # Move to start first
-    mouse_control.move_to(start_x, start_y)
-    result = mouse_control.drag_to(end_x, end_y, duration, button)
-    logger.debug(f"Mouse drag ({start_x},{start_y}) -> ({end_x},{end_y})")
+    result = actions.run("drag", data)
+    logger.debug("Mouse drag (%s,%s) -> (%s,%s)", data.get("start_x", 0), data.get("start_y", 0),
+                 data.get("end_x", 0), data.get("end_y", 0))
     return jsonify(result)
 
 
@@ -254,11 +556,28 @@ def mouse_drag():
 def mouse_scroll():
     """Scroll wheel."""
     data = get_json()
-    clicks = data.get("clicks", 0)
-    x = data.get("x")
-    y = data.get("y")
-    result = mouse_control.scroll(clicks, x, y)
-    logger.debug(f"Mouse scroll {clicks} at ({x}, {y})")
+    result = actions.run("scroll", data)
+    logger.debug("Mouse scroll %s at (%s, %s)", data.get("clicks", 0), data.get("x"), data.get("y"))
+    return jsonify(result)
+
+
+@app.route("/api/mouse/down", methods=["POST"])
+@require_api_key
+def mouse_down():
+    """Press and hold a mouse button."""
+    data = get_json()
+    result = actions.run("mouse_down", data)
+    logger.debug("Mouse down %s", data.get("button", "left"))
+    return jsonify(result)
+
+
+@app.route("/api/mouse/up", methods=["POST"])
+@require_api_key
+def mouse_up():
+    """Release a mouse button."""
+    data = get_json()
+    result = actions.run("mouse_up", data)
+    logger.debug("Mouse up %s", data.get("button", "left"))
     return jsonify(result)
 
 # ============================================================
@@ -270,10 +589,8 @@ def mouse_scroll():
 def keyboard_type():
     """Type text string."""
     data = get_json()
-    text = data.get("text", "")
-    interval = data.get("interval", 0)
-    result = keyboard_control.type_text(text, interval)
-    logger.debug(f"Keyboard type: {text[:50]}...")
+    result = actions.run("type", data)
+    logger.debug("Keyboard type: %.50s...", data.get("text", ""))
     return jsonify(result)
 
 
@@ -282,9 +599,8 @@ def keyboard_type():
 def keyboard_press():
     """Press a single key."""
     data = get_json()
-    key = data.get("key", "")
-    result = keyboard_control.press_key(key)
-    logger.debug(f"Keyboard press: {key}")
+    result = actions.run("press", data)
+    logger.debug("Keyboard press: %s", data.get("key", ""))
     return jsonify(result)
 
 
@@ -293,9 +609,8 @@ def keyboard_press():
 def keyboard_hotkey():
     """Press key combination."""
     data = get_json()
-    keys = data.get("keys", [])
-    result = keyboard_control.hotkey(*keys)
-    logger.debug(f"Keyboard hotkey: {'+'.join(keys)}")
+    result = actions.run("hotkey", data)
+    logger.debug("Keyboard hotkey: %s", data.get("keys", []))
     return jsonify(result)
 
 
@@ -304,9 +619,8 @@ def keyboard_hotkey():
 def keyboard_key_down():
     """Hold key down."""
     data = get_json()
-    key = data.get("key", "")
-    result = keyboard_control.key_down(key)
-    logger.debug(f"Keyboard key down: {key}")
+    result = actions.run("key_down", data)
+    logger.debug("Keyboard key down: %s", data.get("key", ""))
     return jsonify(result)
 
 
@@ -315,9 +629,8 @@ def keyboard_key_down():
 def keyboard_key_up():
     """Release key."""
     data = get_json()
-    key = data.get("key", "")
-    result = keyboard_control.key_up(key)
-    logger.debug(f"Keyboard key up: {key}")
+    result = actions.run("key_up", data)
+    logger.debug("Keyboard key up: %s", data.get("key", ""))
     return jsonify(result)
 
 
@@ -326,43 +639,153 @@ def keyboard_key_up():
 def keyboard_write_instant():
     """Paste text via clipboard (fast)."""
     data = get_json()
-    text = data.get("text", "")
-    result = keyboard_control.write_instant(text)
-    logger.debug(f"Keyboard write instant: {text[:50]}...")
+    result = actions.run("write_instant", data)
+    logger.debug("Keyboard write instant: %.50s...", data.get("text", ""))
     return jsonify(result)
 
 # ============================================================
 # Screenshot Routes
 # ============================================================
 
+def image_response(image_bytes, codec, size=None):
+    """Return encoded image bytes as a binary response (raw adds dimension headers)."""
+    response = Response(image_bytes, mimetype=encoder.MIME_TYPES[codec])
+    if codec == "raw" and size:
+        response.headers["X-Image-Width"] = str(size[0])
+        response.headers["X-Image-Height"] = str(size[1])
+        response.headers["X-Image-Mode"] = "RGB"
+    return response
+
+
+STAGE = screenshot.STAGE_METRIC
+STAGE_HELP = screenshot.STAGE_HELP
+
+
+def send_screenshot(region, fmt, codec, quality, scale, compress_level):
+    """Capture and reply as base64 JSON (fmt=base64) or a binary body (fmt=raw|jpeg|png|webp)."""
+    try:
+        codec = encoder.normalize_codec(codec if fmt in ("base64", "json") else fmt)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)})
+
+    with metrics.timer(STAGE, STAGE_HELP, stage="capture"):
+        frame = screenshot.capture_frame(region)
+    with metrics.timer(STAGE, STAGE_HELP, stage="encode", codec=codec):
+        image_bytes = encoder.encode_image(
+            frame, codec=codec, quality=quality, scale=scale, compress_level=compress_level
+        )
+    if fmt in ("base64", "json"):
+        with metrics.timer(STAGE, STAGE_HELP, stage="serialize"):
+            # Bytes go out as base64 in JSON and as a binary field in MessagePack/CBOR
+            return jsonify({"success": True, "image": image_bytes, "format": codec})
+
+    size = encoder.output_size((frame.width, frame.height), scale) if codec == "raw" else None
+    return image_response(image_bytes, codec, size)
+
+
 @app.route("/api/screenshot", methods=["GET"])
 @require_api_key
 def screenshot_full():
-    """Capture full screenshot as base64."""
+    """Capture full screenshot as base64 JSON or a binary image body.
+
+    Query: format=base64|raw|jpeg|png|webp, codec (for base64), quality,
+    compress_level (PNG), scale (e.g. 0.5).
+    """
+    return send_screenshot(
+        None,
+        request.args.get("format", "base64").lower(),
+        request.args.get("codec", config.SCREENSHOT_FORMAT),
+        request.args.get("quality", config.SCREENSHOT_QUALITY, type=int),
+        request.args.get("scale", 1.0, type=float),
+        request.args.get("compress_level", type=int),
+    )
+
+
+@app.route("/api/screenshot/stream", methods=["GET"])
+@require_api_key
+@long_request
+def screenshot_stream():
+    """Stream the screen as multipart JPEG dirty rectangles with periodic keyframes."""
+    fps = request.args.get("fps", config.STREAM_FPS, type=float)
     quality = request.args.get("quality", config.SCREENSHOT_QUALITY, type=int)
-    fmt = request.args.get("format", "base64")
-    
-    if fmt == "base64":
-        image_data = screenshot.capture_to_base64(quality=quality)
-        return jsonify({"success": True, "image": image_data, "format": "jpeg"})
-    else:
-        return jsonify({"success": False, "error": "Use format=base64"})
+    tile = request.args.get("tile", config.STREAM_TILE_SIZE, type=int)
+    keyframe = request.args.get("keyframe", config.STREAM_KEYFRAME_INTERVAL, type=int)
+    threshold = request.args.get("threshold", 0, type=int)
+    frames = request.args.get("frames", 0, type=int)
+    for name, value in (("fps", fps), ("tile", tile), ("keyframe", keyframe)):
+        if value <= 0:
+            return jsonify({"success": False, "error": f"{name} must be positive"}), 400
+
+    region = None
+    if "width" in request.args and "height" in request.args:
+        region = (
+            request.args.get("x", 0, type=int),
+            request.args.get("y", 0, type=int),
+            request.args.get("width", type=int),
+            request.args.get("height", type=int),
+        )
+
+    diff_encoder = screen_stream.FrameDiffEncoder(
+        tile_size=tile, keyframe_interval=keyframe, quality=quality, threshold=threshold
+    )
+    chunks = screen_stream.stream_frames(
+        source=lambda: screen_stream.grab_frame(region),
+        fps=fps,
+        max_frames=frames,
+        diff_encoder=diff_encoder,
+    )
+    logger.debug("Screenshot stream started fps=%s tile=%s region=%s", fps, tile, region)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=f"multipart/x-mixed-replace; boundary={screen_stream.BOUNDARY}",
+    )
 
 
 @app.route("/api/screenshot/region", methods=["POST"])
 @require_api_key
 def screenshot_region():
-    """Capture region screenshot as base64."""
+    """Capture region screenshot as base64 JSON or a binary image body."""
     data = get_json()
     x = data.get("x", 0)
     y = data.get("y", 0)
     width = data.get("width", 500)
     height = data.get("height", 500)
-    quality = data.get("quality", config.SCREENSHOT_QUALITY)
+    return send_screenshot(
+        (x, y, width, height),
+        data.get("format", "base64").lower(),
+        data.get("codec", config.SCREENSHOT_FORMAT),
+        data.get("quality", config.SCREENSHOT_QUALITY),
+        data.get("scale", 1.0),
+        data.get("compress_level"),
+    )
 
-    image = screenshot.capture_region(x, y, width, height)
-    image_data = screenshot.capture_to_base64(image, quality=quality)
-    return jsonify({"success": True, "image": image_data, "format": "jpeg"})
+
+@app.route("/api/screenshot/cache", methods=["GET"])
+@require_api_key
+def screenshot_cache_stats():
+    """Get shared frame cache hit/miss counters."""
+    return jsonify({"success": True, **screenshot.frame_cache.stats()})
+
+
+@app.route("/api/screenshot/cache", methods=["POST"])
+@require_api_key
+def screenshot_cache_configure():
+    """Tune the frame cache max age and optionally reset its counters."""
+    data = get_json()
+    if "max_age_ms" in data:
+        try:
+            max_age_ms = float(data["max_age_ms"])
+            if not 0 <= max_age_ms < float("inf"):
+                raise ValueError
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "max_age_ms must be a number >= 0 (0 = off)"}), 400
+        screenshot.frame_cache.max_age = max_age_ms / 1000
+        screenshot.frame_cache.invalidate()
+    if data.get("reset", False):
+        screenshot.frame_cache.reset_stats()
+    stats = screenshot.frame_cache.stats()
+    logger.info("Frame cache configured: %s", stats)
+    return jsonify({"success": True, **stats})
 
 
 @app.route("/api/screenshot/file", methods=["POST"])
@@ -381,7 +804,139 @@ def pixel_color():
     """Get pixel color at coordinate."""
     x = request.args.get("x", 0, type=int)
     y = request.args.get("y", 0, type=int)
-    result = screenshot.get_pixel_color(x, y)
+    try:
+        result = screenshot.get_pixel_color(x, y)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify(result)
+
+@app.route("/api/pixel/batch", methods=["POST"])
+@require_api_key
+def pixel_batch():
+    """Sample many pixels from one capture, optionally checking expected colors.
+
+    Body: {"points": [[x, y], ...], "expected": ["#rrggbb" | [r, g, b] | null, ...],
+           "tolerance": 0, "hex": false, "fresh": false}
+    Points may also be objects {"x", "y", "color", "tolerance"}.
+    """
+    data = get_json()
+    points = data.get("points", [])
+    expected = data.get("expected")
+    tolerance = data.get("tolerance", 0)
+
+    try:
+        if points and isinstance(points[0], dict):
+            if any("color" in p for p in points):
+                expected = [p.get("color") for p in points]
+                tolerance = [p.get("tolerance", tolerance) for p in points]
+            points = [(p["x"], p["y"]) for p in points]
+        result = screenshot.sample_pixels(
+            points,
+            expected=expected,
+            tolerance=tolerance,
+            hex_colors=data.get("hex", False),
+            fresh=data.get("fresh", False),
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        return jsonify({"success": False, "error": f"Invalid point: {e}"}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify(result)
+
+@app.route("/api/screen/templates", methods=["GET"])
+@require_api_key
+def templates_list():
+    """List cached templates."""
+    templates = template_match.registry.list()
+    return jsonify({"success": True, "templates": templates, "count": len(templates)})
+
+
+@app.route("/api/screen/templates", methods=["POST"])
+@require_api_key
+def templates_add():
+    """Upload a template once: {name, image (base64 PNG/JPEG)}."""
+    data = get_json()
+    name = data.get("name")
+    image = data.get("image")
+    if not name or not image:
+        return jsonify({"success": False, "error": "name and image are required"})
+    template = template_match.registry.add(name, serializers.binary_field(image))
+    logger.debug("Template added: %s %dx%d", name, template.width, template.height)
+    return jsonify({"success": True, **template.info()})
+
+
+@app.route("/api/screen/templates/<name>", methods=["DELETE"])
+@require_api_key
+def templates_remove(name):
+    """Remove a cached template."""
+    return jsonify({"success": template_match.registry.remove(name)})
+
+
+@app.route("/api/screen/locate", methods=["POST"])
+@require_api_key
+def screen_locate():
+    """Locate a template on screen.
+
+    Body: {"template": name | "image": base64 | "path": file,
+           "region": {x, y, width, height}, "confidence": 0.9,
+           "scales": [1.0], "all": false, "max_results": 20, "coarse": true, "exhaustive": false}
+
+    ``exhaustive`` runs the full-resolution search when the coarse pass finds
+    nothing (slower, but catches textures that block averaging washes out).
+    """
+    data = get_json()
+    if data.get("template"):
+        template = template_match.registry.get(data["template"])
+        if template is None:
+            return jsonify({"found": False, "error": f"Unknown template: {data['template']}"})
+    elif data.get("image"):
+        template = template_match.registry.from_base64(data["image"])
+    elif data.get("path"):
+        template = template_match.registry.from_path(data["path"])
+    else:
+        return jsonify({"found": False, "error": "template, image or path is required"})
+
+    result = template_match.locate(
+        template,
+        region=screenshot.parse_region(data.get("region")),
+        confidence=data.get("confidence", 0.9),
+        scales=data.get("scales", [1.0]),
+        find_all=data.get("all", False),
+        max_results=data.get("max_results", 20),
+        coarse=data.get("coarse", True),
+        fresh=data.get("fresh", False),
+        exhaustive=data.get("exhaustive", False),
+    )
+    return jsonify(result)
+
+@app.route("/api/screen/wait", methods=["POST"])
+@require_api_key
+@long_request
+def screen_wait_route():
+    """Block until a screen condition holds or the timeout expires.
+
+    Body: {"condition": {"type": "pixel", "x", "y", "color", "tolerance", "match"}
+                      | {"type": "changed", "region", "threshold", "min_fraction"}
+                      | {"type": "stable", "region", "duration_ms", "threshold"}
+                      | {"type": "template_appears" | "template_disappears",
+                         "template" | "image" | "path", "region", "confidence"},
+           "timeout": 10, "min_interval_ms": 15, "max_interval_ms": 200}
+    """
+    data = get_json()
+    try:
+        condition = screen_wait.build_condition(data.get("condition", {}))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": f"Invalid condition: {e}"}), 400
+    timeout = wait_timeout(data)
+    min_interval_ms, max_interval_ms = wait_intervals(data)
+
+    result = screen_wait.wait_for(
+        condition,
+        timeout=timeout,
+        min_interval_ms=min_interval_ms,
+        max_interval_ms=max_interval_ms,
+    )
+    logger.debug("Screen wait %s: %s", type(condition).__name__, result.get("success"))
     return jsonify(result)
 
 # ============================================================
@@ -412,7 +967,7 @@ def windows_focus():
     hwnd = data.get("hwnd")
     title = data.get("title")
     result = window_manager.focus_window(hwnd=hwnd, title=title)
-    logger.debug(f"Window focus: hwnd={hwnd} title={title}")
+    logger.debug("Window focus: hwnd=%s title=%s", hwnd, title)
     return jsonify(result)
 
 
@@ -457,7 +1012,7 @@ def windows_close():
     hwnd = data.get("hwnd")
     title = data.get("title")
     result = window_manager.close_window(hwnd=hwnd, title=title)
-    logger.info(f"Window close: hwnd={hwnd} title={title}")
+    logger.info("Window close: hwnd=%s title=%s", hwnd, title)
     return jsonify(result)
 
 
@@ -488,20 +1043,60 @@ def windows_resize():
 @app.route("/api/windows/find", methods=["GET"])
 @require_api_key
 def windows_find():
-    """Find window by title substring."""
-    title = request.args.get("title", "")
-    result = window_manager.find_window_by_title(title)
-    return jsonify(result)
+    """Find windows by title, ranked best first.
+
+    Query: title, mode=exact|prefix|substring|regex|fuzzy (default substring),
+    pid, process (e.g. chrome.exe), class, limit, min_score (fuzzy).
+    The best match is returned at the top level for compatibility.
+    """
+    try:
+        matches = window_manager.find_windows(
+            request.args.get("title", ""),
+            mode=request.args.get("mode", "substring"),
+            pid=request.args.get("pid", type=int),
+            process=request.args.get("process"),
+            class_name=request.args.get("class"),
+            limit=request.args.get("limit", type=int),
+            min_score=request.args.get("min_score", 0.3, type=float),
+        )
+    except (ValueError, re.error) as e:
+        return jsonify({"found": False, "error": str(e)})
+    if not matches:
+        return jsonify({"found": False, "matches": [], "count": 0})
+    best = matches[0]
+    return jsonify({
+        "found": True,
+        "hwnd": best["hwnd"],
+        "title": best["title"],
+        "rect": best["rect"],
+        "matches": matches,
+        "count": len(matches),
+    })
 
 
 @app.route("/api/windows/wait", methods=["POST"])
 @require_api_key
+@long_request
 def windows_wait():
-    """Wait for window to appear."""
+    """Wait for window to appear, disappear or gain focus.
+
+    Body: {title, timeout, condition: appear|disappear|focus, mode, pid, process, class}
+    """
     data = get_json()
     title = data.get("title", "")
-    timeout = data.get("timeout", 10)
-    result = window_manager.wait_for_window(title, timeout)
+    timeout = wait_timeout(data)
+    try:
+        result = window_manager.wait_for_window(
+            title,
+            timeout,
+            condition=data.get("condition", "appear"),
+            mode=data.get("mode", "substring"),
+            pid=data.get("pid"),
+            process=data.get("process"),
+            class_name=data.get("class"),
+        )
+    except (ValueError, re.error) as e:
+        return jsonify({"success": False, "error": str(e)})
     return jsonify(result)
 
 # ============================================================
@@ -537,9 +1132,179 @@ def clipboard_clear():
 @app.route("/api/clipboard/image", methods=["GET"])
 @require_api_key
 def clipboard_image():
-    """Get clipboard image as base64."""
-    result = clipboard.get_image()
-    return jsonify(result)
+    """Get clipboard image as base64 JSON or, with `binary=1`, as the image body.
+
+    Query: format=png|jpeg|webp|raw, quality, compress_level, scale, max_width, max_height.
+    """
+    options = dict(
+        format=request.args.get("format", "png"),
+        quality=request.args.get("quality", type=int),
+        compress_level=request.args.get("compress_level", type=int),
+        scale=request.args.get("scale", 1.0, type=float),
+        max_width=request.args.get("max_width", type=int),
+        max_height=request.args.get("max_height", type=int),
+    )
+    if request.args.get("binary", "0") not in ("1", "true"):
+        return jsonify(clipboard.get_image(**options))
+
+    result = clipboard.encode_image(**options)
+    if not result["success"]:
+        return jsonify(result)
+    response = image_response(result["data"], result["format"], (result["width"], result["height"]))
+    # Same clipboard content + options -> same bytes, so clients can revalidate cheaply
+    response.set_etag("-".join(str(v) for v in (result["sequence"], *options.values())))
+    return response.make_conditional(request)
+
+@app.route("/api/clipboard/history", methods=["GET"])
+@require_api_key
+def clipboard_history_list():
+    """Recent clipboard entries, newest first `?start=&end=&limit=50&kind=text|image`.
+
+    start/end are entry ids; a negative start counts back from the newest.
+    """
+    if clipboard_log is None:
+        return jsonify({"success": False, "error": "Clipboard history is disabled"})
+    entries = clipboard_log.query(
+        start=request.args.get("start", type=int),
+        end=request.args.get("end", type=int),
+        limit=request.args.get("limit", 50, type=int),
+        kind=request.args.get("kind"),
+    )
+    return jsonify({"success": True, "entries": entries, "stats": clipboard_log.stats()})
+
+
+@app.route("/api/clipboard/history/<int:entry_id>", methods=["GET"])
+@require_api_key
+def clipboard_history_entry(entry_id):
+    """Content of one entry: text as JSON, images as a binary body `?format=png`."""
+    if clipboard_log is None:
+        return jsonify({"success": False, "error": "Clipboard history is disabled"})
+    entry = clipboard_log.get(entry_id)
+    if entry is None:
+        return jsonify({"success": False, "error": f"No history entry {entry_id}"}), 404
+    data = clipboard_log.content(entry["hash"]) if entry["hash"] else None
+    if data is None:
+        return jsonify({"success": False, "error": "Content was evicted", "entry": entry})
+
+    if entry["kind"] == "text":
+        return jsonify({"success": True, "entry": entry, "text": bytes(data).decode("utf-8")})
+    if entry["kind"] == "image":
+        try:
+            codec = encoder.normalize_codec(request.args.get("format", "png"))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)})
+        frame = dib.parse(bytes(data))
+        image_bytes = encoder.encode_image(
+            frame, codec=codec, quality=request.args.get("quality", type=int),
+            max_width=request.args.get("max_width", type=int),
+            max_height=request.args.get("max_height", type=int),
+        )
+        return image_response(image_bytes, codec)
+    return jsonify({"success": False, "error": f"Unsupported entry kind: {entry['kind']}"})
+
+# ============================================================
+# Event Stream Routes (push instead of polling)
+# ============================================================
+
+_event_sources = set()
+_event_sources_lock = threading.Lock()
+
+
+def attach_event_sources(subscription):
+    """Hook the window registry / clipboard monitor into the bus the first
+    time a subscriber needs them."""
+    with _event_sources_lock:
+        if "window" not in _event_sources and any(
+            subscription.wants(topic) for topic in set(events.WINDOW_TOPICS.values())
+        ):
+            window_manager.get_registry().add_listener(events.window_publisher(events.bus))
+            _event_sources.add("window")
+        if "clipboard" not in _event_sources and subscription.wants("clipboard"):
+            clipboard.get_monitor().add_listener(events.clipboard_publisher(events.bus))
+            _event_sources.add("clipboard")
+
+
+@app.route("/api/events", methods=["GET"])
+@require_api_key
+@long_request
+def event_stream():
+    """Server-Sent Events stream of focus, window and clipboard changes.
+
+    `?topics=focus,window,clipboard&payload=1&queue=256&policy=drop_oldest`
+    """
+    topics = [t.strip() for t in request.args.get("topics", "").split(",") if t.strip()]
+    try:
+        subscription = events.bus.subscribe(
+            topics=topics or None,
+            maxsize=request.args.get("queue", type=int),
+            policy=request.args.get("policy"),
+            payload=request.args.get("payload", "0") in ("1", "true"),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)})
+    attach_event_sources(subscription)
+    logger.debug("Event stream opened topics=%s", topics or "all")
+    return Response(
+        stream_with_context(events.stream(events.bus, subscription)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/events/stats", methods=["GET"])
+@require_api_key
+def event_stats():
+    """Subscriber queue depths and drop counts."""
+    return jsonify({"success": True, **events.bus.stats()})
+
+# ============================================================
+# Input Queue Routes
+# ============================================================
+
+def session_id():
+    return request.headers.get("X-Session-Id") or input_queue.DEFAULT_SESSION
+
+
+@app.route("/api/input/queue", methods=["GET"])
+@require_api_key
+def input_queue_stats():
+    """Queue depth per session and priority, wait latency percentiles and the lease."""
+    return jsonify({"success": True, **input_queue.scheduler.stats()})
+
+
+@app.route("/api/input/cancel", methods=["POST"])
+@require_api_key
+def input_cancel():
+    """Cancel queued and in-flight input of a session `{session}` (default: caller's)."""
+    data = get_json()
+    session = data.get("session") or session_id()
+    dropped = input_queue.scheduler.cancel(session)
+    logger.info("Input cancelled for session %s: %d queued", session, dropped)
+    return jsonify({"success": True, "session": session, "dropped": dropped})
+
+
+@app.route("/api/input/lease", methods=["POST"])
+@require_api_key
+def input_lease_acquire():
+    """Take or renew exclusive input for the caller's session `{ttl}`."""
+    data = get_json()
+    session = session_id()
+    try:
+        ttl = input_queue.scheduler.acquire_lease(session, data.get("ttl"))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    if ttl is None:
+        holder = input_queue.scheduler.stats()["lease"]
+        return jsonify({"success": False, "error": "Input is leased by another session", "lease": holder})
+    return jsonify({"success": True, "session": session, "ttl": ttl})
+
+
+@app.route("/api/input/lease", methods=["DELETE"])
+@require_api_key
+def input_lease_release():
+    """Release the caller's lease."""
+    released = input_queue.scheduler.release_lease(session_id())
+    return jsonify({"success": released} if released else {"success": False, "error": "No lease held"})
 
 # ============================================================
 # Combo Routes (efficiency - multiple actions in one call)
@@ -556,15 +1321,19 @@ def combo_click_and_type():
     interval = data.get("interval", 0)
     clear_first = data.get("clear_first", False)
 
-    if x is not None and y is not None:
-        mouse_control.click(x, y)
-    
-    if clear_first:
-        keyboard_control.hotkey("ctrl", "a")
-        time.sleep(0.02)
+    def click_and_type():
+        if x is not None and y is not None:
+            mouse_control.click(x, y)
+
+        if clear_first:
+            keyboard_control.hotkey("ctrl", "a")
+            time.sleep(0.02)
 
-    keyboard_control.type_text(text, interval)
-    logger.debug(f"Combo click+type at ({x},{y}): {text[:50]}...")
+        keyboard_control.type_text(text, interval)
+
+    # One queue entry so other clients' input can't land between the steps
+    input_queue.scheduler.run(click_and_type)
+    logger.debug("Combo click+type at (%s,%s): %.50s...", x, y, text)
     return jsonify({"success": True})
 
 
@@ -572,7 +1341,7 @@ def combo_click_and_type():
 @require_api_key
 def combo_batch():
     """Execute multiple actions in sequence.
-    
+
     Body: {"actions": [
         {"type": "click", "x": 100, "y": 200},
         {"type": "type", "text": "hello"},
@@ -581,85 +1350,143 @@ def combo_batch():
         {"type": "hotkey", "keys": ["ctrl", "s"]},
         {"type": "move", "x": 300, "y": 400},
         {"type": "screenshot"},
-    ]}
+    ], "stop_on_error": false, "errors_only": false, "stream": false, "dry_run": false}
+
+    The whole batch is validated before anything runs. With "stream" results
+    are sent as NDJSON lines as each action completes, followed by a summary.
     """
     data = get_json()
-    actions = data.get("actions", [])
-    results = []
+    try:
+        steps = actions.compile_batch(data.get("actions", []))
+    except actions.BatchError as e:
+        return jsonify({"success": False, "error": str(e), "errors": e.errors})
+    if data.get("dry_run", False):
+        return jsonify({"success": True, "valid": True, "count": len(steps)})
+    return batch_response(steps, data)
+
+
+def batch_response(steps, data):
+    """Execute compiled steps and reply with all results or an NDJSON stream."""
+    results = actions.execute(
+        steps,
+        stop_on_error=data.get("stop_on_error", False),
+        errors_only=data.get("errors_only", False),
+    )
 
-    for i, action in enumerate(actions):
-        try:
-            action_type = action.get("type", "")
-
-            if action_type == "click":
-                r = mouse_control.click(
-                    action.get("x"), action.get("y"),
-                    action.get("button", "left"), action.get("clicks", 1)
-                )
-            elif action_type == "double_click":
-                r = mouse_control.double_click(action.get("x"), action.get("y"))
-            elif action_type == "right_click":
-                r = mouse_control.right_click(action.get("x"), action.get("y"))
-            elif action_type == "move":
-                r = mouse_control.move_to(
-                    action.get("x", 0), action.get("y", 0),
-                    action.get("duration", 0)
-                )
-            elif action_type == "scroll":
-                r = mouse_control.scroll(
-                    action.get("clicks", 0), action.get("x"), action.get("y")
-                )
-            elif action_type == "type":
-                r = keyboard_control.type_text(
-                    action.get("text", ""), action.get("interval", 0)
-                )
-            elif action_type == "write_instant":
-                r = keyboard_control.write_instant(action.get("text", ""))
-            elif action_type == "press":
-                r = keyboard_control.press_key(action.get("key", ""))
-            elif action_type == "hotkey":
-                r = keyboard_control.hotkey(*action.get("keys", []))
-            elif action_type == "key_down":
-                r = keyboard_control.key_down(action.get("key", ""))
-            elif action_type == "key_up":
-                r = keyboard_control.key_up(action.get("key", ""))
-            elif action_type == "sleep":
-                ms = action.get("ms", 100)
-                time.sleep(ms / 1000)
-                r = {"success": True, "slept_ms": ms}
-            elif action_type == "screenshot":
-                quality = action.get("quality", config.SCREENSHOT_QUALITY)
-                image_data = screenshot.capture_to_base64(quality=quality)
-                r = {"success": True, "image": image_data}
-            elif action_type == "focus":
-                r = window_manager.focus_window(
-                    hwnd=action.get("hwnd"), title=action.get("title")
-                )
-            else:
-                r = {"success": False, "error": f"Unknown action type: {action_type}"}
-
-            results.append({"index": i, **r})
-
-        except Exception as e:
-            results.append({"index": i, "success": False, "error": str(e)})
-
-    logger.debug(f"Batch executed {len(actions)} actions")
-    return jsonify({"success": True, "results": results})
+    if data.get("stream", False):
+        # NDJSON, or a sequence of MessagePack/CBOR items when negotiated
+        fmt = response_format()
+
+        def generate():
+            started = time.perf_counter()
+            failed = 0
+            for result in results:
+                failed += result.get("success") is False
+                yield fmt.dumps(result) + fmt.separator
+            elapsed = round((time.perf_counter() - started) * 1000, 2)
+            yield fmt.dumps({"done": True, "failed": failed, "elapsed_ms": elapsed}) + fmt.separator
+            logger.debug("Batch streamed %d actions", len(steps))
+        return Response(stream_with_context(generate()), mimetype=fmt.stream_mimetype,
+                        headers={"Vary": "Accept"})
+
+    results = list(results)
+    failed = sum(1 for r in results if r.get("success") is False)
+    logger.debug("Batch executed %d actions", len(steps))
+    return jsonify({"success": True, "results": results, "failed": failed})
+
+# ============================================================
+# Macro Routes (upload once, run many times)
+# ============================================================
+
+@app.route("/api/macros", methods=["GET"])
+@require_api_key
+def macros_list():
+    """List stored macros."""
+    items = macro_library.list()
+    return jsonify({"success": True, "macros": items, "count": len(items)})
+
+
+@app.route("/api/macros", methods=["POST"])
+@require_api_key
+def macros_save():
+    """Validate, compile and store a macro: {name, actions, params: {name: default}}."""
+    data = get_json()
+    try:
+        macro = macro_library.save(data.get("name"), data.get("actions"), data.get("params"))
+    except actions.BatchError as e:
+        return jsonify({"success": False, "error": str(e), "errors": e.errors})
+    except macros.MacroError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    logger.info("Macro saved: %s (%d actions)", macro.name, len(macro.steps))
+    return jsonify({"success": True, **macro.info()})
+
+
+@app.route("/api/macros/<name>", methods=["GET"])
+@require_api_key
+def macros_get(name):
+    """Get a macro definition."""
+    macro = macro_library.get(name)
+    if macro is None:
+        return jsonify({"success": False, "error": f"Macro not found: {name}"}), 404
+    return jsonify({"success": True, **macro.to_dict()})
+
+
+@app.route("/api/macros/<name>", methods=["DELETE"])
+@require_api_key
+def macros_delete(name):
+    """Delete a macro."""
+    if not macro_library.delete(name):
+        return jsonify({"success": False, "error": f"Macro not found: {name}"}), 404
+    logger.info("Macro deleted: %s", name)
+    return jsonify({"success": True})
+
+
+@app.route("/api/macros/<name>/run", methods=["POST"])
+@require_api_key
+def macros_run(name):
+    """Run a macro: {params: {...}, stop_on_error, errors_only, stream}."""
+    macro = macro_library.get(name)
+    if macro is None:
+        return jsonify({"success": False, "error": f"Macro not found: {name}"}), 404
+    data = get_json()
+    try:
+        steps = macro.bind(data.get("params"))
+    except macros.MacroError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    logger.debug("Macro run: %s", name)
+    return batch_response(steps, data)
 
 # ============================================================
 # Main
 # ============================================================
 
-if __name__ == "__main__":
-    logger.info("=" * 60)
-    logger.info("PC Control Server starting...")
-    logger.info(f"Base directory: {BASE_DIR}")
-    logger.info(f"Listening on: http://{config.HOST}:{config.PORT}")
-    logger.info(f"Auth: {'enabled' if config.API_KEY else 'disabled'}")
-    
-    screen = pyautogui.size()
-    logger.info(f"Screen size: {screen[0]}x{screen[1]}")
-    logger.info("=" * 60)
+def serve():
+    """Run the app under waitress (production mode) or Flask's dev server.
+
+    Waitress handles sockets asynchronously and feeds requests to a fixed
+    thread pool, so a burst of connections queues instead of spawning a
+    thread each. Streams and waits may hold at most LONG_REQUEST_LIMIT of
+    those threads (see long_request). Input calls are serialized by
+    input_queue either way.
+    """
+    if config.SERVER_MODE == "waitress":
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            logger.warning("waitress not installed, falling back to the Flask dev server")
+        else:
+            logger.info("Serving with waitress (%d threads, %d for streams and waits)",
+                        config.SERVER_THREADS, LONG_REQUEST_LIMIT)
+            waitress_serve(
+                app,
+                host=config.HOST,
+                port=config.PORT,
+                threads=config.SERVER_THREADS,
+                connection_limit=config.SERVER_CONNECTION_LIMIT,
+                channel_timeout=config.SERVER_CHANNEL_TIMEOUT,
+                ident="pc-control-server",
+            )
+            return
 
     app.run(
         host=config.HOST,
@@ -668,3 +1495,22 @@ if __name__ == "__main__":
         threaded=True,
         use_reloader=False,
     )
+
+
+if __name__ == "__main__":
+    logger.info("=" * 60)
+    logger.info("PC Control Server starting...")
+    logger.info("Base directory: %s", BASE_DIR)
+    logger.info("Listening on: http://%s:%s", config.HOST, config.PORT)
+    logger.info("Auth: %s", "enabled" if config.API_KEY else "disabled")
+    
+    screen = pyautogui.size()
+    logger.info("Screen size: %dx%d", screen[0], screen[1])
+    if config.CLIPBOARD_HISTORY_SIZE:
+        start_clipboard_history()
+        logger.info("Clipboard history: %d entries", config.CLIPBOARD_HISTORY_SIZE)
+    if config.INPUT_STREAM_PORT:
+        input_stream.start()
+        logger.info("Input stream on: tcp://%s:%s", config.HOST, config.INPUT_STREAM_PORT)
+    logger.info("=" * 60)
+    serve()
@@ -0,0 +1,313 @@
+"""Template matching module - cached templates and fast on-screen image search."""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+import config
+import screenshot
+import serializers
+
+try:
+    import cv2
+except ImportError:  # OpenCV is optional; fall back to NumPy FFT correlation
+    cv2 = None
+
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+COARSE_MARGIN = 0.15  # Coarse scores are blurrier, so accept candidates below the target
+# Variances below this fraction of the mean square are rounding noise (flat areas)
+VARIANCE_FLOOR = 1e-6
+# Coarse candidates refined per wanted match; repetitive content (text) has many near-ties
+COARSE_CANDIDATES = 16
+
+
+# ============================================================
+# Template Registry
+# ============================================================
+
+class Template:
+    """A decoded grayscale template with per-scale resized copies."""
+
+    def __init__(self, name, gray):
+        self.name = name
+        self.gray = gray
+        self.mtime = None
+        self._scaled = {1.0: gray}
+
+    @property
+    def width(self):
+        return self.gray.shape[1]
+
+    @property
+    def height(self):
+        return self.gray.shape[0]
+
+    def scaled(self, scale):
+        """Return the template resized by ``scale`` (cached)."""
+        scale = round(float(scale), 3)
+        if scale not in self._scaled:
+            width = max(1, round(self.width * scale))
+            height = max(1, round(self.height * scale))
+            image = Image.fromarray(self.gray.astype(np.uint8))
+            resized = image.resize((width, height), Image.BILINEAR)
+            self._scaled[scale] = np.asarray(resized, dtype=np.float32)
+        return self._scaled[scale]
+
+    def info(self):
+        return {"name": self.name, "width": self.width, "height": self.height}
+
+
+def decode_gray(data):
+    """Decode encoded image bytes into a float32 grayscale array."""
+    image = Image.open(io.BytesIO(data))
+    return np.asarray(image.convert("L"), dtype=np.float32)
+
+
+class TemplateRegistry:
+    """LRU-capped store of decoded templates, keyed by name."""
+
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _put(self, template):
+        with self._lock:
+            self._templates[template.name] = template
+            self._templates.move_to_end(template.name)
+            while len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def add(self, name, data):
+        """Decode and store encoded image bytes under ``name``."""
+        return self._put(Template(name, decode_gray(data)))
+
+    def get(self, name):
+        """Return the template or None, marking it recently used."""
+        with self._lock:
+            template = self._templates.get(name)
+            if template is not None:
+                self._templates.move_to_end(name)
+            return template
+
+    def from_base64(self, b64):
+        """Return a template for inline image data, cached by content hash.
+
+        Accepts base64 text (JSON bodies) or raw bytes (MessagePack/CBOR bodies).
+        """
+        data = serializers.binary_field(b64)
+        name = "sha1:" + hashlib.sha1(data).hexdigest()
+        return self.get(name) or self.add(name, data)
+
+    def from_path(self, path):
+        """Return a template loaded from disk, reloading only if the file changed."""
+        name = "file:" + os.path.abspath(path)
+        mtime = os.path.getmtime(path)
+        template = self.get(name)
+        if template is None or template.mtime != mtime:
+            with open(path, "rb") as f:
+                template = Template(name, decode_gray(f.read()))
+            template.mtime = mtime
+            self._put(template)
+        return template
+
+    def remove(self, name):
+        with self._lock:
+            return self._templates.pop(name, None) is not None
+
+    def list(self):
+        with self._lock:
+            return [t.info() for t in self._templates.values()]
+
+
+registry = TemplateRegistry(config.TEMPLATE_CACHE_SIZE)
+
+
+# ============================================================
+# Matching
+# ============================================================
+
+def to_gray(rgb):
+    """Convert an HxWx3 RGB array to float32 grayscale."""
+    return rgb @ GRAY_WEIGHTS
+
+
+def _downscale(image, factor):
+    """Block-average downscale by an integer factor."""
+    height = image.shape[0] // factor
+    width = image.shape[1] // factor
+    trimmed = image[:height * factor, :width * factor]
+    return trimmed.reshape(height, factor, width, factor).mean(axis=(1, 3))
+
+
+def _window_sums(image, h, w):
+    """Sum of every h x w window via an integral image."""
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    integral[1:, 1:] = image.cumsum(axis=0).cumsum(axis=1)
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+def ncc(image, template):
+    """Normalized cross-correlation score map (valid positions only)."""
+    height, width = image.shape
+    h, w = template.shape
+    if h > height or w > width:
+        return np.zeros((0, 0))
+
+    if cv2 is not None:
+        scores = cv2.matchTemplate(
+            image.astype(np.float32), template.astype(np.float32), cv2.TM_CCOEFF_NORMED
+        )
+        return np.clip(scores, -1.0, 1.0, out=scores)
+
+    n = h * w
+    template = template.astype(np.float64)
+    centered = template - template.mean()
+    template_var = (centered * centered).sum()
+    # A (near-)flat template correlates with nothing meaningfully
+    if template_var <= VARIANCE_FLOOR * n * (template.mean() ** 2 + 1):
+        return np.zeros((height - h + 1, width - w + 1))
+
+    # Mean-subtracted data keeps the running sums small, so Σx² - (Σx)²/n
+    # doesn't cancel down to rounding error on flat areas
+    image = image.astype(np.float64)
+    image_mean = image.mean()
+    image = image - image_mean
+    spectrum = np.fft.rfft2(image) * np.conj(np.fft.rfft2(centered, s=image.shape))
+    corr = np.fft.irfft2(spectrum, s=image.shape)[:height - h + 1, :width - w + 1]
+
+    sums = _window_sums(image, h, w)
+    squares = _window_sums(image * image, h, w)
+    variance = squares - sums * sums / n
+    # Relative floor: windows whose variance is within rounding of their
+    # (absolute) energy are flat and score 0
+    floor = VARIANCE_FLOOR * (squares + n * (image_mean ** 2 + 1))
+    flat = variance <= floor
+    denom = np.sqrt(np.where(flat, 1.0, variance) * template_var)
+    scores = np.where(flat, 0.0, corr / denom)
+    return np.clip(scores, -1.0, 1.0, out=scores)
+
+
+def _peaks(scores, threshold, h, w, limit):
+    """Return up to ``limit`` (y, x, score) peaks, suppressing overlapping ones."""
+    if scores.size == 0:
+        return []
+    flat = scores.ravel()
+    candidates = np.flatnonzero(flat >= threshold)
+    if candidates.size > limit * 64:
+        top = np.argpartition(flat[candidates], -limit * 64)[-limit * 64:]
+        candidates = candidates[top]
+    candidates = candidates[np.argsort(-flat[candidates])]
+
+    picked = []
+    for index in candidates.tolist():
+        y, x = divmod(index, scores.shape[1])
+        if any(abs(y - py) < h and abs(x - px) < w for py, px, _ in picked):
+            continue
+        picked.append((y, x, float(flat[index])))
+        if len(picked) >= limit:
+            break
+    return picked
+
+
+def _coarse_factor(h, w):
+    return max(1, min(config.TEMPLATE_COARSE_FACTOR, min(h, w) // 12))
+
+
+def search(gray, template, confidence, limit=1, coarse=True, exhaustive=False):
+    """Find up to ``limit`` matches of ``template`` in ``gray`` at or above ``confidence``.
+
+    With ``coarse`` the search first runs on block-averaged copies and then
+    refines each candidate at full resolution in a small neighbourhood. Block
+    averaging can rank look-alikes (repeated text) above the real match; when
+    candidates exist but none refines to at least its coarse score, the
+    full-resolution search runs instead. No coarse candidate at all means the
+    template is not on screen, so that (common, polled) case stays cheap
+    unless ``exhaustive`` asks for the full search anyway.
+    """
+    h, w = template.shape
+    factor = _coarse_factor(h, w) if coarse else 1
+    if factor == 1:
+        return _peaks(ncc(gray, template), confidence, h, w, limit)
+
+    coarse_scores = ncc(_downscale(gray, factor), _downscale(template, factor))
+    candidates = _peaks(
+        coarse_scores, confidence - COARSE_MARGIN, h // factor, w // factor, limit * COARSE_CANDIDATES
+    )
+
+    if not candidates and not exhaustive:
+        return []
+
+    refined = []
+    for cy, cx, coarse_score in candidates:
+        y0 = max(cy * factor - factor, 0)
+        x0 = max(cx * factor - factor, 0)
+        y1 = min(cy * factor + 2 * factor + h, gray.shape[0])
+        x1 = min(cx * factor + 2 * factor + w, gray.shape[1])
+        scores = ncc(gray[y0:y1, x0:x1], template)
+        if scores.size == 0:
+            continue
+        iy, ix = np.unravel_index(int(np.argmax(scores)), scores.shape)
+        score = float(scores[iy, ix])
+        if score >= confidence:
+            refined.append((y0 + int(iy), x0 + int(ix), score, score >= coarse_score - 1e-6))
+
+    if not any(confirmed for *_, confirmed in refined):
+        return _peaks(ncc(gray, template), confidence, h, w, limit)
+
+    refined.sort(key=lambda m: -m[2])
+    picked = []
+    for y, x, score, _ in refined:
+        if any(abs(y - py) < h and abs(x - px) < w for py, px, _ in picked):
+            continue
+        picked.append((y, x, score))
+    return picked[:limit]
+
+
+def locate(template, region=None, confidence=0.9, scales=(1.0,), find_all=False,
+           max_results=20, coarse=True, fresh=False, exhaustive=False):
+    """Locate a Template on screen (optionally inside an (x, y, width, height) region)."""
+    frame = screenshot.capture_frame(tuple(region) if region else None, fresh=fresh)
+    gray = to_gray(frame.rgb())
+    offset_x, offset_y = (region[0], region[1]) if region else (0, 0)
+    limit = max_results if find_all else 1
+
+    matches = []
+    for scale in scales:
+        scaled = template.scaled(scale)
+        h, w = scaled.shape
+        for y, x, score in search(gray, scaled, confidence, limit, coarse, exhaustive):
+            matches.append({
+                "x": offset_x + x + w // 2,
+                "y": offset_y + y + h // 2,
+                "left": offset_x + x,
+                "top": offset_y + y,
+                "width": w,
+                "height": h,
+                "confidence": round(score, 4),
+                "scale": scale,
+            })
+
+    matches.sort(key=lambda m: -m["confidence"])
+    picked = []
+    for m in matches:
+        overlaps = any(
+            abs(m["left"] - p["left"]) < min(m["width"], p["width"])
+            and abs(m["top"] - p["top"]) < min(m["height"], p["height"])
+            for p in picked
+        )
+        if not overlaps:
+            picked.append(m)
+    picked = picked[:limit]
+
+    if find_all:
+        return {"found": bool(picked), "matches": picked, "count": len(picked)}
+    if picked:
+        return {"found": True, **picked[0]}
+    return {"found": False}
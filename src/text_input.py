@@ -0,0 +1,185 @@
+"""Text input module - types whole strings as batched Unicode key events.
+
+Every character becomes a KEYEVENTF_UNICODE down/up pair (UTF-16 code
+units, so emoji and other astral characters work), and events are handed to
+the injector in large batches - one SendInput call per batch instead of
+one call per key. No clipboard is touched, so non-ASCII text is as fast as
+ASCII and the user's clipboard survives.
+
+The injector is pluggable: ``SendInputInjector`` talks to Windows, and
+``RecordingInjector`` records events for tests and benchmarks.
+"""
+
+import abc
+import ctypes
+import sys
+import time
+
+import config
+
+INPUT_KEYBOARD = 1
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+VK_RETURN = 0x0D
+VK_TAB = 0x09
+
+# Characters most apps only accept as real virtual keys
+VIRTUAL_KEYS = {"\n": VK_RETURN, "\r": VK_RETURN, "\t": VK_TAB}
+
+
+def encode_events(text):
+    """Convert text to a list of (vk, scan, flags) key events (down/up per unit)."""
+    events = []
+    previous = None
+    for char in text:
+        vk = VIRTUAL_KEYS.get(char)
+        if vk is not None:
+            if char == "\n" and previous == "\r":
+                continue  # "\r\n" is one Enter
+            events.append((vk, 0, 0))
+            events.append((vk, 0, KEYEVENTF_KEYUP))
+        else:
+            data = char.encode("utf-16-le")
+            for i in range(0, len(data), 2):
+                unit = data[i] | data[i + 1] << 8
+                events.append((0, unit, KEYEVENTF_UNICODE))
+                events.append((0, unit, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP))
+        previous = char
+    return events
+
+
+def decode_events(events):
+    """Inverse of encode_events for key-down events (used by tests/benchmarks)."""
+    units = bytearray()
+    for vk, scan, flags in events:
+        if flags & KEYEVENTF_KEYUP:
+            continue
+        if flags & KEYEVENTF_UNICODE:
+            units += scan.to_bytes(2, "little")
+        else:
+            units += {VK_RETURN: "\n", VK_TAB: "\t"}.get(vk, "").encode("utf-16-le")
+    return units.decode("utf-16-le", errors="replace")
+
+
+# ============================================================
+# Injectors
+# ============================================================
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ("wVk", ctypes.c_ushort),
+        ("wScan", ctypes.c_ushort),
+        ("dwFlags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ("dx", ctypes.c_int32),
+        ("dy", ctypes.c_int32),
+        ("mouseData", ctypes.c_uint32),
+        ("dwFlags", ctypes.c_uint32),
+        ("time", ctypes.c_uint32),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    # MOUSEINPUT is the largest member; it sets sizeof(INPUT) to what SendInput expects
+    _fields_ = [("ki", KEYBDINPUT), ("mi", MOUSEINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _fields_ = [("type", ctypes.c_uint32), ("u", _INPUTUNION)]
+
+
+class Injector(abc.ABC):
+    """Receives batches of (vk, scan, flags) key events."""
+
+    @abc.abstractmethod
+    def send(self, events):
+        """Deliver one batch of events and return how many were delivered."""
+
+
+class SendInputInjector(Injector):
+    """Injects events with one user32.SendInput call per batch."""
+
+    def __init__(self):
+        self._send_input = ctypes.windll.user32.SendInput
+
+    def send(self, events):
+        inputs = (INPUT * len(events))()
+        for item, (vk, scan, flags) in zip(inputs, events):
+            item.type = INPUT_KEYBOARD
+            item.u.ki.wVk = vk
+            item.u.ki.wScan = scan
+            item.u.ki.dwFlags = flags
+        sent = self._send_input(len(events), inputs, ctypes.sizeof(INPUT))
+        if sent != len(events):
+            # Blocked by UIPI (elevated target window) or the desktop is locked
+            raise OSError(f"SendInput injected {sent} of {len(events)} events")
+        return sent
+
+
+class RecordingInjector(Injector):
+    """Records batches instead of injecting them (tests and benchmarks)."""
+
+    def __init__(self, cost_per_call=0.0):
+        self.cost_per_call = cost_per_call
+        self.batches = []
+
+    def send(self, events):
+        if self.cost_per_call:
+            time.sleep(self.cost_per_call)
+        self.batches.append(list(events))
+        return len(events)
+
+    @property
+    def events(self):
+        return [event for batch in self.batches for event in batch]
+
+    def text(self):
+        return decode_events(self.events)
+
+
+# ============================================================
+# Engine
+# ============================================================
+
+class TypingEngine:
+    """Types text through an injector in batches with optional pacing."""
+
+    def __init__(self, injector, batch_size=None, batch_delay=None):
+        self.injector = injector
+        self.batch_size = max(2, batch_size or config.TEXT_INPUT_BATCH)
+        self.batch_delay = config.TEXT_INPUT_BATCH_DELAY_MS / 1000 if batch_delay is None else batch_delay
+
+    def type(self, text, interval=0):
+        """Type ``text``. ``interval`` > 0 paces per character like pyautogui."""
+        events = encode_events(text)
+        if interval > 0:
+            # One key (down/up pair) per send, paced like pyautogui
+            for start in range(0, len(events), 2):
+                self.injector.send(events[start:start + 2])
+                time.sleep(interval)
+            return len(text)
+
+        size = self.batch_size - self.batch_size % 2  # Never split a down/up pair
+        for start in range(0, len(events), size):
+            if start and self.batch_delay:
+                time.sleep(self.batch_delay)
+            self.injector.send(events[start:start + size])
+        return len(text)
+
+
+_engine = None
+
+
+def get_engine():
+    """Return the shared SendInput engine, or None where it isn't available."""
+    global _engine
+    if _engine is None and config.TEXT_INPUT_ENGINE == "sendinput" and sys.platform == "win32":
+        _engine = TypingEngine(SendInputInjector())
+    return _engine
@@ -2,50 +2,243 @@
 
 import ctypes
 import ctypes.wintypes
-import time
+import logging
+import threading
 
 import win32gui
 import win32con
 import win32process
 
+import config
+from window_registry import PollingEventSource, WindowQuery, WindowRegistry
+
+logger = logging.getLogger(__name__)
+
+# WinEvent constants (winuser.h)
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+
+
+# ============================================================
+# Window Registry (snapshot + WinEvent invalidation)
+# ============================================================
+
+def _enum_hwnds():
+    """Internal: all top-level window handles in z-order."""
+    hwnds = []
+    win32gui.EnumWindows(lambda hwnd, _: hwnds.append(hwnd), None)
+    return hwnds
+
+
+_process_names = {}
+
+
+def _process_name(pid):
+    """Internal: executable name for a pid (cached; None if access is denied)."""
+    if pid in _process_names:
+        return _process_names[pid]
+    name = None
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+    if handle:
+        try:
+            buffer = ctypes.create_unicode_buffer(1024)
+            size = ctypes.wintypes.DWORD(len(buffer))
+            if kernel32.QueryFullProcessImageNameW(handle, 0, buffer, ctypes.byref(size)):
+                name = buffer.value.rsplit("\\", 1)[-1]
+        finally:
+            kernel32.CloseHandle(handle)
+    if len(_process_names) > 4096:
+        _process_names.clear()
+    _process_names[pid] = name
+    return name
+
+
+def _window_info(hwnd):
+    """Internal: snapshot one window, or None if it is gone, hidden or untitled."""
+    try:
+        if not win32gui.IsWindowVisible(hwnd):
+            return None
+        title = win32gui.GetWindowText(hwnd)
+        if not title:  # Skip windows with no title
+            return None
+        rect = win32gui.GetWindowRect(hwnd)
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        placement = win32gui.GetWindowPlacement(hwnd)
+        class_name = win32gui.GetClassName(hwnd)
+    except Exception:
+        return None  # Window destroyed mid-query
+    return {
+        "hwnd": hwnd,
+        "title": title,
+        "pid": pid,
+        "process": _process_name(pid),
+        "class_name": class_name,
+        "rect": {
+            "left": rect[0],
+            "top": rect[1],
+            "right": rect[2],
+            "bottom": rect[3],
+            "width": rect[2] - rect[0],
+            "height": rect[3] - rect[1],
+        },
+        "minimized": placement[1] == win32con.SW_SHOWMINIMIZED,
+        "maximized": placement[1] == win32con.SW_SHOWMAXIMIZED,
+    }
+
+
+class WinEventSource:
+    """Feeds window create/destroy/show/hide/name/move/foreground events into a
+    registry via SetWinEventHook, on a dedicated message-loop thread."""
+
+    EVENTS = {
+        EVENT_SYSTEM_FOREGROUND: "foreground",
+        EVENT_SYSTEM_MINIMIZESTART: "minimize",
+        EVENT_SYSTEM_MINIMIZEEND: "restore",
+        EVENT_OBJECT_CREATE: "create",
+        EVENT_OBJECT_DESTROY: "destroy",
+        EVENT_OBJECT_SHOW: "show",
+        EVENT_OBJECT_HIDE: "hide",
+        EVENT_OBJECT_LOCATIONCHANGE: "move",
+        EVENT_OBJECT_NAMECHANGE: "name",
+    }
+    RANGES = [
+        (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+        (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND),
+        (EVENT_OBJECT_CREATE, EVENT_OBJECT_NAMECHANGE),
+    ]
+
+    def __init__(self):
+        self._thread_id = None
+        self._proc = None
+
+    def start(self, registry):
+        """Install hooks. Returns False if hooks could not be installed."""
+        ready = threading.Event()
+        result = [False]
+        thread = threading.Thread(
+            target=self._run, args=(registry, ready, result), name="window-events", daemon=True
+        )
+        thread.start()
+        ready.wait(2)
+        return result[0]
+
+    def _run(self, registry, ready, result):
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None,
+            ctypes.wintypes.HANDLE,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.HWND,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.LONG,
+            ctypes.wintypes.DWORD,
+            ctypes.wintypes.DWORD,
+        )
+        user32.SetWinEventHook.restype = ctypes.wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            ctypes.wintypes.DWORD, ctypes.wintypes.DWORD, ctypes.wintypes.HMODULE,
+            WinEventProc, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD, ctypes.wintypes.DWORD,
+        ]
+        user32.GetAncestor.restype = ctypes.wintypes.HWND
+        user32.GetAncestor.argtypes = [ctypes.wintypes.HWND, ctypes.wintypes.UINT]
+
+        def callback(hook, event, hwnd, id_object, id_child, thread_id, time_ms):
+            if not hwnd or id_object != OBJID_WINDOW or id_child != CHILDID_SELF:
+                return
+            name = self.EVENTS.get(event)
+            if name is None:
+                return
+            # Only top-level windows (destroyed handles can no longer be checked)
+            if name != "destroy" and user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+                return
+            try:
+                registry.handle_event(name, hwnd)
+            except Exception:
+                logger.exception("Window event handling failed")
+
+        self._proc = WinEventProc(callback)  # Must stay referenced while hooked
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        hooks = [user32.SetWinEventHook(lo, hi, 0, self._proc, 0, 0, flags) for lo, hi in self.RANGES]
+        if not all(hooks):
+            for hook in hooks:
+                if hook:
+                    user32.UnhookWinEvent(hook)
+            ready.set()
+            return
+
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        result[0] = True
+        ready.set()
+
+        msg = ctypes.wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+
+    def stop(self):
+        if self._thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the shared window registry, starting its event sources on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = WindowRegistry(_enum_hwnds, _window_info, win32gui.GetForegroundWindow)
+                registry.resync()
+                hooked = config.WINDOW_EVENTS and WinEventSource().start(registry)
+                if not hooked:
+                    logger.warning("Window event hooks unavailable, polling for changes")
+                interval = config.WINDOW_RESYNC_INTERVAL_MS if hooked else config.WINDOW_POLL_INTERVAL_MS
+                PollingEventSource(interval / 1000).start(registry)
+                _registry = registry
+    return _registry
+
+
+def _refresh(hwnd):
+    """Internal: update the snapshot right after we changed a window ourselves."""
+    get_registry().refresh(hwnd)
+
+
+# ============================================================
+# Queries
+# ============================================================
 
 def list_windows():
     """Return list of all visible windows with details."""
-    windows = []
-
-    def enum_callback(hwnd, _):
-        if win32gui.IsWindowVisible(hwnd):
-            title = win32gui.GetWindowText(hwnd)
-            if title:  # Skip windows with no title
-                rect = win32gui.GetWindowRect(hwnd)
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                placement = win32gui.GetWindowPlacement(hwnd)
-                is_minimized = placement[1] == win32con.SW_SHOWMINIMIZED
-                is_maximized = placement[1] == win32con.SW_SHOWMAXIMIZED
-                windows.append({
-                    "hwnd": hwnd,
-                    "title": title,
-                    "pid": pid,
-                    "rect": {
-                        "left": rect[0],
-                        "top": rect[1],
-                        "right": rect[2],
-                        "bottom": rect[3],
-                        "width": rect[2] - rect[0],
-                        "height": rect[3] - rect[1],
-                    },
-                    "minimized": is_minimized,
-                    "maximized": is_maximized,
-                })
-
-    win32gui.EnumWindows(enum_callback, None)
-    return windows
+    return get_registry().list()
 
 
 def get_active_window():
     """Return currently focused window info."""
     hwnd = win32gui.GetForegroundWindow()
     if hwnd:
+        info = get_registry().get(hwnd)
+        if info is not None:
+            return {"hwnd": hwnd, "title": info["title"], "rect": info["rect"]}
         title = win32gui.GetWindowText(hwnd)
         rect = win32gui.GetWindowRect(hwnd)
         return {
@@ -108,6 +301,7 @@ def minimize_window(hwnd=None, title=None):
     if not hwnd:
         return {"success": False, "error": "Window not found"}
     win32gui.ShowWindow(hwnd, win32con.SW_MINIMIZE)
+    _refresh(hwnd)
     return {"success": True}
 
 
@@ -118,6 +312,7 @@ def maximize_window(hwnd=None, title=None):
     if not hwnd:
         return {"success": False, "error": "Window not found"}
     win32gui.ShowWindow(hwnd, win32con.SW_MAXIMIZE)
+    _refresh(hwnd)
     return {"success": True}
 
 
@@ -128,6 +323,7 @@ def restore_window(hwnd=None, title=None):
     if not hwnd:
         return {"success": False, "error": "Window not found"}
     win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
+    _refresh(hwnd)
     return {"success": True}
 
 
@@ -147,6 +343,7 @@ def move_window(hwnd, x, y):
     width = rect[2] - rect[0]
     height = rect[3] - rect[1]
     win32gui.MoveWindow(hwnd, x, y, width, height, True)
+    _refresh(hwnd)
     return {"success": True}
 
 
@@ -154,62 +351,59 @@ def resize_window(hwnd, width, height):
     """Resize window (keeps current position)."""
     rect = win32gui.GetWindowRect(hwnd)
     win32gui.MoveWindow(hwnd, rect[0], rect[1], width, height, True)
+    _refresh(hwnd)
     return {"success": True}
 
 
 def set_window_rect(hwnd, x, y, width, height):
     """Move and resize window in one call."""
     win32gui.MoveWindow(hwnd, x, y, width, height, True)
+    _refresh(hwnd)
     return {"success": True}
 
 
+def find_windows(query="", mode="substring", pid=None, process=None, class_name=None,
+                 limit=None, min_score=0.3):
+    """Return all matching windows ranked best first, each with a "score"."""
+    matches = get_registry().search(
+        query, mode, pid=pid, process=process, class_name=class_name,
+        limit=limit, min_score=min_score,
+    )
+    return [{**info, "score": round(score, 4)} for score, info in matches]
+
+
 def find_window_by_title(title_substring):
     """Find first window containing text in title."""
-    hwnd = _find_hwnd_by_title(title_substring)
-    if hwnd:
-        title = win32gui.GetWindowText(hwnd)
-        rect = win32gui.GetWindowRect(hwnd)
+    info = get_registry().find_first(title_substring)
+    if info:
         return {
             "found": True,
-            "hwnd": hwnd,
-            "title": title,
-            "rect": {
-                "left": rect[0],
-                "top": rect[1],
-                "right": rect[2],
-                "bottom": rect[3],
-            },
+            "hwnd": info["hwnd"],
+            "title": info["title"],
+            "rect": info["rect"],
         }
     return {"found": False}
 
 
-def wait_for_window(title_substring, timeout=10):
-    """Wait until window appears, return its info."""
-    start = time.time()
-    while time.time() - start < timeout:
-        hwnd = _find_hwnd_by_title(title_substring)
-        if hwnd:
-            title = win32gui.GetWindowText(hwnd)
-            return {"success": True, "hwnd": hwnd, "title": title}
-        time.sleep(0.2)
-    return {"success": False, "error": f"Window '{title_substring}' not found within {timeout}s"}
+def wait_for_window(title_substring, timeout=10, condition="appear", mode="substring",
+                    pid=None, process=None, class_name=None):
+    """Wait until a matching window appears (or disappears / gains focus).
+
+    Completes the moment the window event arrives instead of polling.
+    """
+    query = WindowQuery(title_substring, mode, pid, process, class_name)
+    wait = get_registry().wait_for(condition, query, timeout)
+    if wait is None:
+        verb = {"appear": "found", "disappear": "closed", "focus": "focused"}[condition]
+        return {"success": False, "error": f"Window '{title_substring}' not {verb} within {timeout}s"}
+    result = {"success": True, "elapsed_ms": round(wait.elapsed * 1000, 1)}
+    if wait.result is not None and condition != "disappear":
+        result["hwnd"] = wait.result["hwnd"]
+        result["title"] = wait.result["title"]
+    return result
 
 
 def _find_hwnd_by_title(title_substring):
     """Internal: find window handle by title substring (case-insensitive)."""
-    result = [None]
-    title_lower = title_substring.lower()
-
-    def enum_callback(hwnd, _):
-        if win32gui.IsWindowVisible(hwnd):
-            title = win32gui.GetWindowText(hwnd)
-            if title_lower in title.lower():
-                result[0] = hwnd
-                return False  # Stop enumeration
-        return True
-
-    try:
-        win32gui.EnumWindows(enum_callback, None)
-    except:
-        pass  # EnumWindows raises when callback returns False
-    return result[0]
+    info = get_registry().find_first(title_substring)
+    return info["hwnd"] if info else None
@@ -0,0 +1,540 @@
+"""Window registry module - in-memory snapshot of top-level windows kept current by events.
+
+The registry is platform-neutral: it is given functions to enumerate window
+handles, inspect one window and read the foreground window, plus an event
+source that reports changes. ``window_manager`` wires it to Win32; tests can
+drive it with plain functions and ``FakeEventSource``.
+
+Event names: "create", "destroy", "show", "hide", "name", "move",
+"minimize", "restore", "foreground" and "resync".
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+
+MATCH_MODES = ("exact", "prefix", "substring", "regex", "fuzzy")
+
+
+def trigrams(text):
+    """Distinct 3-character substrings of ``text``."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@lru_cache(maxsize=128)
+def _compile(pattern):
+    return re.compile(pattern, re.IGNORECASE)
+
+
+class TitleIndex:
+    """Trigram index over lowercase window titles.
+
+    Substring and prefix queries of 3+ characters only verify windows sharing
+    all of the query's trigrams; fuzzy queries rank by trigram (Dice) overlap.
+    """
+
+    def __init__(self):
+        self._grams = defaultdict(set)
+        self._titles = {}
+        self._gram_counts = {}
+
+    def add(self, hwnd, title):
+        lower = title.lower()
+        if self._titles.get(hwnd) == lower:
+            return
+        self.remove(hwnd)
+        grams = trigrams(lower)
+        for gram in grams:
+            self._grams[gram].add(hwnd)
+        self._titles[hwnd] = lower
+        self._gram_counts[hwnd] = len(grams)
+
+    def remove(self, hwnd):
+        lower = self._titles.pop(hwnd, None)
+        if lower is None:
+            return
+        self._gram_counts.pop(hwnd, None)
+        for gram in trigrams(lower):
+            bucket = self._grams.get(gram)
+            if bucket is not None:
+                bucket.discard(hwnd)
+                if not bucket:
+                    del self._grams[gram]
+
+    def clear(self):
+        self._grams.clear()
+        self._titles.clear()
+        self._gram_counts.clear()
+
+    def _candidates(self, text):
+        """Windows containing every trigram of ``text`` (all windows if it is too short)."""
+        grams = trigrams(text)
+        if not grams:
+            return self._titles.keys()
+        buckets = sorted((self._grams.get(g, set()) for g in grams), key=len)
+        return set.intersection(*buckets) if buckets[0] else set()
+
+    def search(self, query, mode="substring", min_score=0.3):
+        """Return [(hwnd, score)] for titles matching ``query`` in ``mode``.
+
+        Scores are in (0, 1]: exact matches score 1, prefix matches rank above
+        other substring matches, and shorter titles rank higher.
+        """
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        if mode == "regex":
+            pattern = _compile(query)
+            results = []
+            for hwnd, title in self._titles.items():
+                match = pattern.search(title)
+                if match:
+                    results.append((hwnd, 0.5 + 0.5 * (match.end() - match.start()) / max(len(title), 1)))
+            return results
+
+        q = query.lower()
+        if mode == "fuzzy":
+            return self._fuzzy(q, min_score)
+
+        results = []
+        for hwnd in self._candidates(q):
+            title = self._titles[hwnd]
+            ratio = len(q) / max(len(title), 1)
+            if title == q:
+                results.append((hwnd, 1.0))
+            elif mode == "exact":
+                continue
+            elif title.startswith(q):
+                results.append((hwnd, 0.75 + 0.24 * ratio))
+            elif mode == "substring" and q in title:
+                results.append((hwnd, 0.25 + 0.49 * ratio))
+        return results
+
+    def _fuzzy(self, q, min_score):
+        grams = trigrams(q)
+        if grams:
+            shared = defaultdict(int)
+            for gram in grams:
+                for hwnd in self._grams.get(gram, ()):
+                    shared[hwnd] += 1
+        else:  # Too short for trigrams: only substring hits can score
+            shared = {hwnd: 0 for hwnd, title in self._titles.items() if q in title}
+        results = []
+        for hwnd, common in shared.items():
+            score = fuzzy_score(q, self._titles[hwnd], common, len(grams), self._gram_counts[hwnd])
+            if score >= min_score:
+                results.append((hwnd, score))
+        return results
+
+
+def fuzzy_score(q, title, common, q_grams, title_grams):
+    """Trigram Dice score of lowercased ``q`` against ``title``; substring hits score at least 0.25."""
+    total = q_grams + title_grams
+    score = 2 * common / total if total else 0.0
+    if q in title:
+        score = max(score, 0.25 + 0.75 * len(q) / max(len(title), 1))
+    return score
+
+
+def title_matches(title, query, mode="substring", min_score=0.3):
+    """Check one title against a query (same semantics as TitleIndex.search)."""
+    if not query:
+        return True
+    if mode == "regex":
+        return _compile(query).search(title) is not None
+    t, q = title.lower(), query.lower()
+    if mode == "exact":
+        return t == q
+    if mode == "prefix":
+        return t.startswith(q)
+    if mode == "fuzzy":
+        grams, title_grams = trigrams(q), trigrams(t)
+        common = len(grams & title_grams)
+        if not common and q not in t:
+            return False
+        return fuzzy_score(q, t, common, len(grams), len(title_grams)) >= min_score
+    return q in t
+
+
+class WindowQuery:
+    """A title query plus optional pid / process / class filters."""
+
+    def __init__(self, query="", mode="substring", pid=None, process=None,
+                 class_name=None, min_score=0.3):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        if mode == "regex" and query:
+            _compile(query)  # Raise re.error early
+        if process:
+            process = process.lower()
+            if not process.endswith(".exe"):
+                process += ".exe"
+        self.query = query
+        self.mode = mode
+        self.pid = pid
+        self.process = process
+        self.class_name = class_name
+        self.min_score = min_score
+
+    def accepts(self, info):
+        """Check the non-title filters."""
+        if self.pid is not None and info.get("pid") != self.pid:
+            return False
+        if self.process and (info.get("process") or "").lower() != self.process:
+            return False
+        if self.class_name and info.get("class_name") != self.class_name:
+            return False
+        return True
+
+    def matches(self, info):
+        return self.accepts(info) and title_matches(
+            info["title"], self.query, self.mode, self.min_score
+        )
+
+
+class WindowWait:
+    """A pending wait for a matching window to appear, disappear or gain focus.
+
+    Waits are checked by the registry as events arrive, so no thread polls;
+    the caller blocks on ``wait()`` until the event completes it.
+    """
+
+    CONDITIONS = ("appear", "disappear", "focus")
+
+    def __init__(self, condition, query):
+        if condition not in self.CONDITIONS:
+            raise ValueError(f"Unknown wait condition: {condition}")
+        self.condition = condition
+        self.query = query
+        self.result = None
+        self.started = time.monotonic()
+        self.elapsed = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def complete(self, info):
+        """Mark the wait satisfied. Returns False if it already was."""
+        with self._lock:
+            if self._done.is_set():
+                return False
+            self.result = info
+            self.elapsed = time.monotonic() - self.started
+            self._done.set()
+        return True
+
+    def wait(self, timeout=None):
+        """Block until completed or timeout. Returns True if completed."""
+        return self._done.wait(timeout)
+
+
+class WindowRegistry:
+    """Snapshot of visible, titled top-level windows keyed by hwnd."""
+
+    def __init__(self, enumerate_windows, inspect_window, get_foreground):
+        self._enumerate = enumerate_windows
+        self._inspect = inspect_window
+        self._get_foreground = get_foreground
+        self._windows = {}
+        self._index = TitleIndex()
+        # hwnd -> stacking rank, lower is nearer the top (EnumWindows order)
+        self._zorder = {}
+        self._top = 0
+        self._active = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._waits = []
+        self.synced_at = 0.0
+        self.events = 0
+
+    # -------------------------------------------------------- updates
+
+    def add_listener(self, callback):
+        """Call ``callback(event, hwnd, info)`` after each applied change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        try:
+            self._listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def _notify(self, event, hwnd, info):
+        if self._waits:
+            self._check_waits(event, info)
+        for callback in list(self._listeners):
+            try:
+                callback(event, hwnd, info)
+            except Exception:
+                logger.exception("Window listener failed")
+
+    def resync(self):
+        """Re-enumerate every window, emitting events for whatever changed."""
+        fresh = {}
+        for hwnd in self._enumerate():
+            info = self._inspect(hwnd)
+            if info is not None:
+                fresh[hwnd] = info
+        active = self._get_foreground()
+
+        changes = []
+        with self._lock:
+            old = self._windows
+            for hwnd in old.keys() - fresh.keys():
+                changes.append(("destroy", hwnd, old[hwnd]))
+            for hwnd, info in fresh.items():
+                previous = old.get(hwnd)
+                if previous is None:
+                    changes.append(("create", hwnd, info))
+                elif previous != info:
+                    changes.append(("name" if previous["title"] != info["title"] else "move", hwnd, info))
+            for change, hwnd, info in changes:
+                if change == "destroy":
+                    self._index.remove(hwnd)
+                else:
+                    self._index.add(hwnd, info["title"])
+            self._windows = fresh
+            self._zorder = {hwnd: rank for rank, hwnd in enumerate(fresh)}
+            self._top = 0
+            if active != self._active:
+                self._active = active
+                changes.append(("foreground", active, fresh.get(active)))
+            self.synced_at = time.monotonic()
+
+        for change in changes:
+            self._notify(*change)
+        return len(changes)
+
+    def refresh(self, hwnd, event="move"):
+        """Re-inspect a single window and apply the result."""
+        info = self._inspect(hwnd)
+        with self._lock:
+            previous = self._windows.get(hwnd)
+            if info is None:
+                if previous is None:
+                    return
+                del self._windows[hwnd]
+                self._zorder.pop(hwnd, None)
+                self._index.remove(hwnd)
+                event = "destroy"
+            else:
+                if info == previous:
+                    return
+                if previous is None:
+                    event = "create"
+                    self._raise(hwnd)  # New windows open on top
+                self._windows[hwnd] = info
+                self._index.add(hwnd, info["title"])
+        self._notify(event, hwnd, info if info is not None else previous)
+
+    def handle_event(self, event, hwnd=None):
+        """Apply one event from an event source."""
+        self.events += 1
+        if event == "resync":
+            self.resync()
+        elif event == "destroy":
+            with self._lock:
+                info = self._windows.pop(hwnd, None)
+                self._zorder.pop(hwnd, None)
+                self._index.remove(hwnd)
+            if info is not None:
+                self._notify("destroy", hwnd, info)
+        elif event == "foreground":
+            with self._lock:
+                changed = hwnd != self._active
+                self._active = hwnd
+            self.refresh(hwnd)
+            with self._lock:
+                if hwnd in self._windows:
+                    self._raise(hwnd)
+            if changed:
+                self._notify("foreground", hwnd, self.get(hwnd))
+        else:
+            self.refresh(hwnd, event)
+
+    def _raise(self, hwnd):
+        """Move a window to the top of the stacking order (call with the lock held)."""
+        self._top -= 1
+        self._zorder[hwnd] = self._top
+
+    # -------------------------------------------------------- waits
+
+    def subscribe(self, condition, query):
+        """Register a WindowWait for ``condition`` ("appear", "disappear" or
+        "focus") on a WindowQuery. It completes immediately if already true."""
+        wait = WindowWait(condition, query)
+        with self._lock:
+            self._waits.append(wait)
+        # Check after registering so an event between the two can't be missed
+        self._check_current(wait)
+        if wait.done:
+            self.unsubscribe(wait)
+        return wait
+
+    def unsubscribe(self, wait):
+        with self._lock:
+            try:
+                self._waits.remove(wait)
+            except ValueError:
+                pass
+
+    def _first_match(self, query):
+        with self._lock:
+            for info in self._windows.values():
+                if query.matches(info):
+                    return info
+        return None
+
+    def _check_current(self, wait):
+        if wait.condition == "appear":
+            info = self._first_match(wait.query)
+            if info is not None:
+                wait.complete(info)
+        elif wait.condition == "disappear":
+            if self._first_match(wait.query) is None:
+                wait.complete(None)
+        else:
+            info = self.get(self._active) if self._active else None
+            if info is not None and wait.query.matches(info):
+                wait.complete(info)
+
+    def _check_waits(self, event, info):
+        finished = []
+        for wait in list(self._waits):
+            if wait.condition == "appear":
+                if event not in ("destroy", "foreground") and info and wait.query.matches(info):
+                    wait.complete(info)
+            elif wait.condition == "focus":
+                if event == "foreground" and info and wait.query.matches(info):
+                    wait.complete(info)
+            elif event in ("destroy", "name"):
+                if self._first_match(wait.query) is None:
+                    wait.complete(info)
+            if wait.done:
+                finished.append(wait)
+        for wait in finished:
+            self.unsubscribe(wait)
+
+    def wait_for(self, condition, query, timeout):
+        """Block until the condition holds. Returns the completed WindowWait or None.
+
+        WSGI handlers are synchronous, so each waiter parks its request thread
+        on an Event (no polling, no CPU) rather than sharing one event loop.
+        The server bounds how many can do so at once (``long_request``) and
+        caps ``timeout``.
+        """
+        wait = self.subscribe(condition, query)
+        try:
+            return wait if wait.wait(timeout) else None
+        finally:
+            self.unsubscribe(wait)
+
+    # -------------------------------------------------------- queries
+
+    def list(self):
+        """Return all windows (info dicts must be treated as read-only)."""
+        with self._lock:
+            return list(self._windows.values())
+
+    def get(self, hwnd):
+        with self._lock:
+            return self._windows.get(hwnd)
+
+    @property
+    def active(self):
+        return self._active
+
+    def find_first(self, title_substring):
+        """Return the topmost window whose title contains the text (case-insensitive).
+
+        This is the window EnumWindows would reach first, which is what the
+        title-based window actions have always acted on; use ``search`` for
+        matches ranked by how well they fit.
+        """
+        with self._lock:
+            hits = self._index.search(title_substring)
+            if not hits:
+                return None
+            hwnd = min((hwnd for hwnd, _ in hits), key=lambda hwnd: self._zorder.get(hwnd, 0))
+            return self._windows[hwnd]
+
+    def search(self, query="", mode="substring", pid=None, process=None,
+               class_name=None, limit=None, min_score=0.3):
+        """Return ranked [(score, info)] matches, optionally filtered.
+
+        ``mode`` is one of exact, prefix, substring, regex or fuzzy. An empty
+        query matches every window (useful with the pid/process/class filters).
+        """
+        filters = WindowQuery(query, mode, pid, process, class_name, min_score)
+        with self._lock:
+            if query:
+                hits = self._index.search(query, mode, min_score)
+            else:
+                hits = [(hwnd, 1.0) for hwnd in self._windows]
+            results = []
+            for hwnd, score in hits:
+                info = self._windows[hwnd]
+                if filters.accepts(info):
+                    results.append((score, info))
+        results.sort(key=lambda r: (-r[0], len(r[1]["title"]), r[1]["hwnd"]))
+        return results[:limit] if limit else results
+
+
+# ============================================================
+# Event Sources
+# ============================================================
+
+class FakeEventSource:
+    """Event source driven by hand, for tests."""
+
+    def __init__(self):
+        self.registry = None
+
+    def start(self, registry):
+        self.registry = registry
+        return True
+
+    def stop(self):
+        self.registry = None
+
+    def emit(self, event, hwnd=None):
+        self.registry.handle_event(event, hwnd)
+
+
+class PollingEventSource:
+    """Periodically re-enumerates windows; diffs become events.
+
+    Used as the primary source when event hooks are unavailable and as a slow
+    safety net alongside them.
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, registry):
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(registry,), name="window-poll", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _run(self, registry):
+        while not self._stop.wait(self.interval):
+            try:
+                registry.resync()
+            except Exception:
+                logger.exception("Window poll failed")
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,36 @@
+"""Shared test setup.
+
+``bench/fakes`` goes first on ``sys.path`` so pyautogui, pyperclip and the
+pywin32 modules resolve to the in-memory fakes the benchmarks use, on any
+OS. Tests run without a display and never touch the real mouse, keyboard
+or clipboard.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path[:0] = [os.path.join(ROOT, "bench", "fakes"), os.path.join(ROOT, "src")]
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """The Flask server module, imported against the fakes with its log file
+    and macro directory in a temp dir and the synthetic capture backend."""
+    import config
+    workdir = tmp_path_factory.mktemp("server")
+    config.LOG_FILE = str(workdir / "server.log")
+    config.LOG_CONSOLE_LEVEL = "CRITICAL"
+    config.CAPTURE_BACKEND = "synthetic"
+    import server
+    server.macro_library = server.macros.MacroLibrary(str(workdir / "macros"))
+    yield server
+    server.log_pipeline.stop()  # Before pytest closes the captured stderr the console handler holds
+
+
+@pytest.fixture
+def client(server):
+    return server.app.test_client()
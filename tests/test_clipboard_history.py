@@ -0,0 +1,107 @@
+"""Tests for the clipboard history ring buffer (src/clipboard_history.py)."""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from clipboard_history import ClipboardHistory, SpillStore  # noqa: E402
+
+
+def _summary(content, kind="text"):
+    return {"hash": hashlib.sha1(content).hexdigest(), "content": content, "kind": kind,
+            "size": len(content), "formats": [13]}
+
+
+def _digest(content):
+    return hashlib.sha1(content).hexdigest()
+
+
+@pytest.fixture
+def spill(tmp_path):
+    store = SpillStore(str(tmp_path / "spill.bin"), 64)
+    yield store
+    store.close()
+
+
+def test_same_content_is_stored_once():
+    history = ClipboardHistory(max_entries=10, max_bytes=1000)
+    assert history.record(_summary(b"alpha"))["id"] == 1
+    assert history.record(_summary(b"alpha")) is None  # Written again: no new entry
+    history.record(_summary(b"beta"))
+    history.record(_summary(b"alpha"))  # Seen before: new entry, shared blob
+    assert [e["id"] for e in history.query()] == [3, 2, 1]
+    stats = history.stats()
+    assert stats["entries"] == 3 and stats["blobs"] == 2 and stats["memory_bytes"] == 9
+
+
+def test_ring_keeps_the_newest_entries():
+    history = ClipboardHistory(max_entries=3, max_bytes=1000)
+    for n in range(5):
+        history.record(_summary(b"item %d" % n))
+    assert [e["id"] for e in history.query()] == [5, 4, 3]
+    assert history.get(1) is None and history.get(4)["available"]
+
+
+def test_lru_eviction_at_the_byte_cap():
+    history = ClipboardHistory(max_bytes=20)
+    for content in (b"a" * 8, b"b" * 8):
+        history.record(_summary(content))
+    assert history.content(_digest(b"a" * 8)) == b"a" * 8  # Touch "a": "b" is now oldest
+    history.record(_summary(b"c" * 8))
+    assert history.content(_digest(b"b" * 8)) is None
+    assert history.content(_digest(b"a" * 8)) == b"a" * 8
+    assert history.stats()["memory_bytes"] == 16 and history.evicted == 1
+    assert [e["available"] for e in history.query()] == [True, False, True]
+
+
+def test_evicted_blobs_spill_and_reload(spill):
+    history = ClipboardHistory(max_bytes=10, spill=spill)
+    history.record(_summary(b"first-blob"))
+    history.record(_summary(b"second-one"))
+    assert history.stats()["memory_bytes"] == 10
+    assert bytes(history.content(_digest(b"first-blob"))) == b"first-blob"  # From the mmap
+    assert all(e["available"] for e in history.query())
+    assert spill.used() == 10
+
+
+def test_spill_ring_overwrites_oldest(spill):
+    for n in range(3):
+        assert spill.put(f"h{n}", bytes([n]) * 30)
+    assert "h0" not in spill  # Wrapped over by h2
+    assert spill.get("h2") == bytes([2]) * 30 and spill.get("h1") == bytes([1]) * 30
+    assert not spill.put("huge", b"x" * 65)
+
+
+def test_blob_larger_than_the_cap_never_stays_in_memory(spill):
+    history = ClipboardHistory(max_bytes=16, spill=spill)
+    history.record(_summary(b"small"))
+    history.record(_summary(b"L" * 40))
+    stats = history.stats()
+    assert stats["memory_bytes"] == 5 and stats["blobs"] == 1  # "small" was not pushed out
+    assert bytes(history.content(_digest(b"L" * 40))) == b"L" * 40
+
+    without_spill = ClipboardHistory(max_bytes=16)
+    without_spill.record(_summary(b"L" * 40))
+    assert without_spill.stats()["memory_bytes"] == 0
+    assert without_spill.query()[0]["available"] is False
+
+
+def test_query_slicing():
+    history = ClipboardHistory(max_entries=100, max_bytes=1000)
+    for n in range(1, 11):
+        history.record(_summary(b"entry %d" % n, kind="image" if n % 3 == 0 else "text"))
+
+    def ids(**kwargs):
+        return [e["id"] for e in history.query(**kwargs)]
+
+    assert ids(start=4, end=6) == [6, 5, 4]
+    assert ids(start=-3) == [10, 9, 8]
+    assert ids(end=3) == [3, 2, 1]
+    assert ids(limit=2) == [10, 9]
+    assert ids(kind="image") == [9, 6, 3]
+    assert ids(start=-100) == list(range(10, 0, -1))
+    assert ids(start=20) == []
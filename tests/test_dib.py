@@ -0,0 +1,112 @@
+"""Tests for the clipboard DIB decoder (src/dib.py)."""
+
+import io
+import os
+import struct
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import dib  # noqa: E402
+
+
+def _pixels(width=7, height=5, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def _from_pil(image):
+    """CF_DIB bytes as PIL writes them: a BMP file without its 14-byte file header."""
+    buffer = io.BytesIO()
+    image.save(buffer, "BMP")
+    return buffer.getvalue()[14:]
+
+
+def _header(width, height, bitcount, compression=dib.BI_RGB, colors_used=0):
+    return struct.pack("<IiiHHIIiiII", 40, width, height, 1, bitcount, compression, 0, 0, 0, colors_used, 0)
+
+
+def _rows(packed_rows):
+    """Pad each row to a 4-byte boundary."""
+    return b"".join(row + b"\0" * (-len(row) % 4) for row in packed_rows)
+
+
+def test_24_bit():
+    pixels = _pixels()
+    frame = dib.parse(_from_pil(Image.fromarray(pixels, "RGB")))
+    assert frame.mode == "RGB" and (frame.width, frame.height) == (7, 5)
+    assert np.array_equal(frame.rgb(), pixels)
+
+
+def test_32_bit_is_a_bgra_view():
+    pixels = _pixels()
+    data = _from_pil(Image.fromarray(pixels, "RGB").convert("RGBA"))
+    frame = dib.parse(data)
+    assert frame.mode == "BGRA"
+    assert np.array_equal(frame.rgb(), pixels)
+    assert np.shares_memory(frame.pixels, np.frombuffer(data, np.uint8))
+
+
+def test_8_bit_palette():
+    image = Image.fromarray(_pixels()).quantize(16)
+    frame = dib.parse(_from_pil(image))
+    assert np.array_equal(frame.rgb(), np.asarray(image.convert("RGB")))
+
+
+def test_1_bit_palette():
+    mask = _pixels(13, 4)[..., 0] > 127  # Width not a multiple of 8
+    image = Image.fromarray(mask)
+    frame = dib.parse(_from_pil(image))
+    assert np.array_equal(frame.rgb(), np.asarray(image.convert("RGB")))
+
+
+def test_4_bit_palette():
+    palette = _pixels(16, 1)[0]
+    indices = _pixels(5, 3)[..., 0] % 16
+    rows = []
+    for row in indices[::-1]:  # Bottom-up
+        padded = np.append(row, 0) if len(row) % 2 else row
+        rows.append(bytes((padded[0::2] << 4 | padded[1::2]).astype(np.uint8)))
+    rgbquad = np.zeros((16, 4), np.uint8)
+    rgbquad[:, :3] = palette[:, ::-1]
+    data = _header(5, 3, 4) + rgbquad.tobytes() + _rows(rows)
+    assert np.array_equal(dib.parse(data).rgb(), palette[indices])
+
+
+def test_top_down_rows():
+    pixels = _pixels()
+    bgr = pixels[..., ::-1]
+    data = _header(7, -5, 24) + _rows([row.tobytes() for row in bgr])
+    assert np.array_equal(dib.parse(data).rgb(), pixels)
+
+
+def test_bitfields_565():
+    rgb = np.array([[(255, 0, 0), (0, 255, 0), (0, 0, 255)],
+                    [(255, 255, 255), (0, 0, 0), (132, 130, 132)]], np.uint8)
+    packed = ((rgb[..., 0].astype(np.uint16) >> 3) << 11) | ((rgb[..., 1] >> 2).astype(np.uint16) << 5) \
+        | (rgb[..., 2] >> 3)
+    masks = struct.pack("<III", 0xF800, 0x07E0, 0x001F)
+    data = _header(3, 2, 16, dib.BI_BITFIELDS) + masks + _rows([row.astype("<u2").tobytes() for row in packed[::-1]])
+    frame = dib.parse(data)
+    # 5/6-bit channels are scaled back to 0-255, so allow the quantization error
+    assert np.abs(frame.rgb().astype(int) - rgb).max() <= 8
+    assert frame.rgb()[0].tolist() == [[255, 0, 0], [0, 255, 0], [0, 0, 255]]
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"BM" + b"\0" * 30,  # Too short for a header
+    b"\xff" * 64,  # Garbage header
+    _header(7, 5, 24)[:-4],
+    _header(7, 5, 24) + b"\0" * 20,  # Pixel rows truncated
+    _header(0, 5, 24) + b"\0" * 100,
+    _header(7, 5, 24, compression=1) + b"\0" * 200,  # RLE8
+    _header(4, 4, 8, colors_used=256) + b"\0" * 100,  # Palette runs past the data
+    _header(2, 2, 12) + b"\0" * 64,  # Unsupported depth
+])
+def test_bad_data_raises_dib_error(data):
+    with pytest.raises(dib.DibError):
+        dib.parse(data)
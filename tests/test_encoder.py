@@ -0,0 +1,24 @@
+"""Tests for image encoding (src/encoder.py)."""
+
+import pytest
+from PIL import Image
+
+import encoder
+
+
+@pytest.mark.parametrize("mode, color, rgb", [
+    ("RGB", (10, 20, 30), (10, 20, 30)),
+    ("L", 128, (128, 128, 128)),
+    ("RGBA", (10, 20, 30, 40), (10, 20, 30)),
+    ("P", 0, (0, 0, 0)),
+])
+def test_raw_is_always_packed_rgb(mode, color, rgb):
+    data = encoder.encode(Image.new(mode, (5, 3), color), codec="raw")
+    assert len(data) == 5 * 3 * 3
+    assert tuple(data[:3]) == rgb
+
+
+def test_raw_size_matches_output_size():
+    data = encoder.encode(Image.new("L", (10, 7)), codec="raw", scale=0.5)
+    width, height = encoder.output_size((10, 7), 0.5)
+    assert len(data) == width * height * 3
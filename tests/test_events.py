@@ -0,0 +1,76 @@
+"""Tests for the event bus and its drop policies (src/events.py)."""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import events  # noqa: E402
+from events import EventBus  # noqa: E402
+
+
+def _ids(subscription):
+    ids = []
+    while len(subscription):
+        ids.append(subscription.get(0)["id"])
+    return ids
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_oldest", [3, 4]), ("drop_newest", [1, 2])])
+def test_full_queue_drops_by_policy(policy, kept):
+    bus = EventBus()
+    subscription = bus.subscribe(maxsize=2, policy=policy)
+    for n in range(4):
+        bus.publish("focus", {"n": n})
+    assert subscription.take_dropped() == 2
+    assert subscription.take_dropped() == 0
+    assert _ids(subscription) == kept
+    assert not subscription.closed
+
+
+def test_disconnect_policy_closes_the_subscription():
+    bus = EventBus()
+    subscription = bus.subscribe(maxsize=1, policy="disconnect")
+    bus.publish("focus", {})
+    bus.publish("focus", {})
+    bus.publish("focus", {})  # Ignored once closed
+    assert subscription.closed and subscription.dropped == 1
+    assert subscription.get(0)["id"] == 1
+    assert subscription.get(0) is None
+
+    messages = list(events.stream(bus, subscription, heartbeat=0.01))
+    assert messages[1:] == [events.format_sse("dropped", {"count": 1}),
+                            events.format_sse("overflow", {"policy": "disconnect"})]
+    assert bus.stats()["subscribers"] == []
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EventBus().subscribe(policy="block")
+
+
+def test_topics_match_exactly_or_by_prefix():
+    bus = EventBus()
+    windows = bus.subscribe(topics=["window"])
+    focus = bus.subscribe(topics=["focus", "window.title"])
+    for topic in ("focus", "window.open", "window.title", "windows", "clipboard"):
+        bus.publish(topic, {})
+    assert [windows.get(0)["topic"] for _ in range(len(windows))] == ["window.open", "window.title"]
+    assert [focus.get(0)["topic"] for _ in range(len(focus))] == ["focus", "window.title"]
+
+
+@pytest.mark.parametrize("payload", [False, True])
+def test_stream_strips_payload_unless_requested(payload):
+    bus = EventBus()
+    subscription = bus.subscribe(payload=payload)
+    bus.publish("clipboard", {"hash": "abc", "payload": "secret"})
+    messages = events.stream(bus, subscription, heartbeat=0.01)
+    retry, message, keepalive = itertools.islice(messages, 3)
+    messages.close()
+    assert retry == "retry: 1000\n\n" and keepalive == ": keepalive\n\n"
+    expected = {"hash": "abc", "payload": "secret"} if payload else {"hash": "abc"}
+    assert message == events.format_sse("clipboard", expected, 1)
+    assert bus.stats()["subscribers"] == []
@@ -0,0 +1,139 @@
+"""Tests for the shared single-flight frame cache (src/screenshot.py FrameCache)."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import screenshot
+
+CALLERS = 8
+
+
+class CountingBackend(screenshot.CaptureBackend):
+    """Counts full-screen grabs; each one blocks until the test releases it."""
+
+    name = "counting"
+
+    def __init__(self):
+        self.grabs = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = None
+        self._lock = threading.Lock()
+
+    def grab(self, region=None):
+        with self._lock:
+            self.grabs += 1
+            number = self.grabs
+        self.started.set()
+        assert self.release.wait(5), "grab never released"
+        if self.fail is not None:
+            raise self.fail
+        pixels = np.full((4, 6, 3), number, dtype=np.uint8)
+        if region:
+            x, y, width, height = region
+            pixels = pixels[y:y + height, x:x + width]
+        return screenshot.Frame(pixels)
+
+
+@pytest.fixture
+def backend():
+    counting = CountingBackend()
+    previous = screenshot.get_backend()
+    max_age = screenshot.frame_cache.max_age
+    screenshot.set_backend(counting)
+    screenshot.frame_cache.reset_stats()
+    yield counting
+    screenshot.frame_cache.max_age = max_age
+    screenshot.set_backend(previous)
+
+
+def _capture_concurrently(backend, call):
+    """Hold the first grab open until every caller is waiting on it, then release it."""
+    backend.release.clear()
+    results = [None] * CALLERS
+    errors = [None] * CALLERS
+
+    def worker(index):
+        try:
+            results[index] = call()
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(CALLERS)]
+    threads[0].start()
+    assert backend.started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while screenshot.frame_cache.stats()["coalesced"] < CALLERS - 1:
+        assert time.monotonic() < deadline, "callers never joined the in-flight capture"
+        time.sleep(0.001)
+    backend.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+def test_concurrent_callers_share_one_capture(backend):
+    screenshot.frame_cache.max_age = 60
+    results, errors = _capture_concurrently(backend, screenshot.capture_frame)
+
+    assert errors == [None] * CALLERS
+    assert backend.grabs == 1
+    assert all(frame is results[0] for frame in results)
+    stats = screenshot.frame_cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, CALLERS - 1, 0)
+
+    assert screenshot.capture_frame() is results[0]  # Later callers hit the cache
+    assert screenshot.frame_cache.stats()["hits"] == 1
+
+
+def test_waiters_get_the_in_flight_result_even_when_stale(backend):
+    """Waiters get the frame their leader captured, even if it outlived max_age while they waited."""
+    screenshot.frame_cache.max_age = 0.001
+    results, errors = _capture_concurrently(backend, screenshot.capture_frame)
+
+    assert errors == [None] * CALLERS
+    assert backend.grabs == 1
+    assert {int(frame.pixels[0, 0, 0]) for frame in results} == {1}
+
+
+def test_waiters_get_the_in_flight_error(backend):
+    screenshot.frame_cache.max_age = 60
+    backend.fail = OSError("display went away")
+    results, errors = _capture_concurrently(backend, screenshot.capture_frame)
+
+    assert backend.grabs == 1
+    assert results == [None] * CALLERS
+    assert all(error is backend.fail for error in errors)
+
+    backend.fail = None
+    assert int(screenshot.capture_frame().pixels[0, 0, 0]) == 2  # Errors aren't cached
+
+
+def test_expiry_follows_max_age_ms(backend, client):
+    def configure(max_age_ms):
+        response = client.post("/api/screenshot/cache", json={"max_age_ms": max_age_ms, "reset": True})
+        assert response.get_json()["max_age_ms"] == max_age_ms
+
+    configure(60000)
+    first = screenshot.capture_frame()
+    assert screenshot.capture_frame() is first
+    assert backend.grabs == 1
+
+    configure(100)
+    first = screenshot.capture_frame()
+    assert screenshot.capture_frame() is first
+    time.sleep(0.15)
+    assert screenshot.capture_frame() is not first
+    assert backend.grabs == 3
+    assert client.get("/api/screenshot/cache").get_json()["misses"] == 2
+
+    configure(0)  # Off: every capture grabs
+    screenshot.capture_frame()
+    screenshot.capture_frame()
+    assert backend.grabs == 5
@@ -0,0 +1,101 @@
+"""Tests for the per-session input scheduler (src/input_queue.py)."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import config  # noqa: E402
+from input_queue import InputCancelled, InputScheduler  # noqa: E402
+
+
+def _blocked(scheduler):
+    """Occupy the worker until the returned event is set, so submissions queue up."""
+    gate, running = threading.Event(), threading.Event()
+
+    def block():
+        running.set()
+        gate.wait(5)
+
+    with scheduler.context("blocker", "bulk"):
+        scheduler.submit(block)
+    assert running.wait(5)
+    return gate
+
+
+def _submit(scheduler, order, session, priority, label):
+    with scheduler.context(session, priority):
+        return scheduler.submit(order.append, label)
+
+
+def _drain(scheduler, futures):
+    for future in futures:
+        future.result(timeout=5)
+
+
+def test_interactive_first_but_bulk_not_starved():
+    scheduler, order = InputScheduler(bulk_every=2), []
+    gate = _blocked(scheduler)
+    futures = [_submit(scheduler, order, "s", "bulk", f"b{i}") for i in (1, 2)]
+    futures += [_submit(scheduler, order, "s", "interactive", f"i{i}") for i in (1, 2, 3, 4)]
+    gate.set()
+    _drain(scheduler, futures)
+    assert order == ["i1", "i2", "b1", "i3", "i4", "b2"]
+
+
+def test_sessions_take_turns_within_a_class():
+    scheduler, order = InputScheduler(), []
+    gate = _blocked(scheduler)
+    futures = [_submit(scheduler, order, "a", "interactive", f"a{i}") for i in (1, 2, 3)]
+    futures += [_submit(scheduler, order, "b", "interactive", f"b{i}") for i in (1, 2)]
+    gate.set()
+    _drain(scheduler, futures)
+    assert order == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_lease_holds_other_sessions_back():
+    scheduler, order = InputScheduler(), []
+    assert scheduler.acquire_lease("a", 5) == 5
+    assert scheduler.acquire_lease("b", 5) is None
+    other = _submit(scheduler, order, "b", "interactive", "b1")
+    _submit(scheduler, order, "a", "interactive", "a1").result(timeout=5)
+    assert order == ["a1"] and not other.done()
+
+    assert not scheduler.release_lease("b")
+    assert scheduler.release_lease("a")
+    other.result(timeout=5)
+    assert order == ["a1", "b1"]
+
+
+@pytest.mark.parametrize("ttl", ["soon", [5], 0, -1, float("nan"), config.INPUT_LEASE_MAX_TTL_S + 1])
+def test_lease_rejects_bad_ttl(ttl):
+    scheduler = InputScheduler()
+    with pytest.raises(ValueError):
+        scheduler.acquire_lease("a", ttl)
+    assert scheduler.lease is None
+
+
+def test_lease_ttl_default_and_coercion():
+    scheduler = InputScheduler()
+    assert scheduler.acquire_lease("a") == config.INPUT_LEASE_TTL_S
+    assert scheduler.acquire_lease("a", "2.5") == 2.5
+
+
+def test_cancel_drops_queued_calls_and_stops_in_flight_work():
+    scheduler, order = InputScheduler(), []
+    gate = _blocked(scheduler)
+    with scheduler.context("a"):
+        queued = [scheduler.submit(order.append, i) for i in range(3)]
+        assert scheduler.cancel("a") == 3
+        assert scheduler.cancelled()
+        with pytest.raises(InputCancelled):
+            scheduler.run(order.append, "late")
+    survivor = _submit(scheduler, order, "b", "interactive", "b1")
+    gate.set()
+    survivor.result(timeout=5)
+    assert all(future.cancelled() for future in queued)
+    assert order == ["b1"]
+    assert scheduler.stats()["sessions"]["a"]["cancelled"] == 3
@@ -0,0 +1,69 @@
+"""Tests for the persistent TCP input channel (src/input_stream.py)."""
+
+import os
+import socket
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pyautogui  # noqa: E402  (the bench/fakes stand-in, see conftest.py)
+import input_stream  # noqa: E402
+
+
+@pytest.fixture
+def connect():
+    server = input_stream.InputStreamServer(("127.0.0.1", 0), input_stream.InputStreamHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    sockets = []
+
+    def open_connection():
+        sock = socket.create_connection(server.server_address, timeout=5)
+        sockets.append(sock)
+        return sock, sock.makefile("r", encoding="utf-8")
+
+    yield open_connection
+    for sock in sockets:
+        sock.close()
+    server.shutdown()
+    server.server_close()
+
+
+def _exchange(connection, payload, replies):
+    sock, lines = connection
+    sock.sendall(payload.encode("utf-8"))
+    return [lines.readline().rstrip("\n") for _ in range(replies)]
+
+
+def test_ack_on_acknowledges_every_move(connect):
+    before = pyautogui.calls["moveTo"]
+    replies = _exchange(connect(), "ack on\nm 1 1\nm 2 2\nm 3 3\nk a\n", 5)
+    assert replies == ["ok ack", "ok", "ok", "ok", "ok"]
+    assert pyautogui.calls["moveTo"] - before == 3
+    assert pyautogui.position() == (3, 3)
+
+
+def test_sequenced_moves_are_never_merged(connect):
+    replies = _exchange(connect(), "@1 m 10 10\n@2 m 20 20\nm 30 30\nm 40 40\nping\n", 3)
+    assert replies == ["ok 1", "ok 2", "pong"]
+    assert pyautogui.position() == (40, 40)
+
+
+@pytest.mark.parametrize("command, error", [
+    ("c 100", "need both x and y"),
+    ("dc 5", "need both x and y"),
+    ("s -3 100", "need both x and y"),
+    ("s", "need scroll clicks"),
+    ("m", "need x and y"),
+    ("r 5", "need both x and y"),
+    ("k", "need a key"),
+    ("kd", "need a key"),
+    ("ku", "need a key"),
+    ("h", "need a key"),
+])
+def test_bad_arguments_reply_err(connect, command, error):
+    clicks = pyautogui.calls["click"]
+    assert _exchange(connect(), f"@9 {command}\n", 1) == [f"err 9 {error}"]
+    assert pyautogui.calls["click"] == clicks
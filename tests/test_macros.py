@@ -0,0 +1,103 @@
+"""Tests for macro placeholder compilation and binding (src/macros.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import actions  # noqa: E402
+from macros import Macro, MacroError, MacroLibrary  # noqa: E402
+
+LOGIN = [
+    {"type": "click", "x": "${x}", "y": 200},
+    {"type": "type", "text": "Hello ${user}, ${user}!"},
+    {"type": "hotkey", "keys": ["ctrl", "${key}"]},
+    {"type": "sleep", "ms": "${delay}"},
+]
+
+
+def _params(steps):
+    return [params for _, _, params in steps]
+
+
+def test_bind_substitutes_placeholders():
+    macro = Macro("login", LOGIN, {"user": "admin", "delay": 100, "key": "s"})
+    assert macro.required == ["x"]
+    assert macro.param_names == ["delay", "key", "user", "x"]
+
+    steps = macro.bind({"x": 50, "key": "v"})
+    assert [index for index, _, _ in steps] == [0, 1, 2, 3]
+    assert _params(steps) == [
+        {"type": "click", "x": 50, "y": 200},  # Whole placeholder keeps the value's type
+        {"type": "type", "text": "Hello admin, admin!"},
+        {"type": "hotkey", "keys": ["ctrl", "v"]},
+        {"type": "sleep", "ms": 100},
+    ]
+    assert steps[0][1] is actions.ACTIONS["click"].handler
+    assert macro.actions[0]["x"] == "${x}"  # The stored definition is untouched
+
+
+def test_static_steps_are_shared_not_copied():
+    macro = Macro("static", [{"type": "press", "key": "enter"}])
+    assert macro.bind()[0][2] is macro.actions[0]
+
+
+def test_missing_and_badly_typed_params():
+    macro = Macro("login", LOGIN, {"user": "admin", "delay": 100, "key": "s"})
+    with pytest.raises(MacroError, match="Missing parameter"):
+        macro.bind({})
+    with pytest.raises(MacroError, match="Action 0"):
+        macro.bind({"x": "fifty"})
+    with pytest.raises(MacroError, match="Action 3"):
+        macro.bind({"x": 1, "delay": 10 ** 9})  # Beyond ACTION_SLEEP_MAX_MS
+
+
+@pytest.mark.parametrize("action_list, params", [
+    ([{"type": "${kind}", "x": 1}], {"kind": "click"}),  # Type can't be a parameter
+    ([{"type": "click", "x": "${x}"}], {"x": "left"}),  # Defaults are validated when saved
+    ([{"type": "fly"}], None),
+    ([], None),
+])
+def test_invalid_definitions_fail_when_compiled(action_list, params):
+    with pytest.raises(actions.BatchError):
+        Macro("bad", action_list, params)
+
+
+def test_invalid_names_and_params():
+    with pytest.raises(MacroError):
+        Macro("../escape", [{"type": "press", "key": "a"}])
+    with pytest.raises(MacroError):
+        Macro("ok", [{"type": "press", "key": "a"}], params=["a"])
+
+
+@pytest.mark.parametrize("name", [None, "", 42, ["a"], {"a": 1}])
+def test_non_string_names_are_rejected(name):
+    with pytest.raises(MacroError, match="Macro name"):
+        Macro(name, [{"type": "press", "key": "a"}])
+
+
+@pytest.mark.parametrize("body", [
+    {"name": 42, "actions": [{"type": "press", "key": "a"}]},
+    {"name": ["a"], "actions": [{"type": "press", "key": "a"}]},
+    {"name": "ok", "actions": [{"type": "press", "key": "a"}], "params": "a"},
+])
+def test_save_route_rejects_bad_input_with_400(client, body):
+    response = client.post("/api/macros", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_library_persists_compiled_macros(tmp_path):
+    library = MacroLibrary(str(tmp_path))
+    library.save("login", LOGIN, {"user": "admin", "delay": 100, "key": "s"})
+    assert os.listdir(tmp_path) == ["login.json"]
+
+    reloaded = MacroLibrary(str(tmp_path))
+    assert reloaded.load() == []
+    assert reloaded.list() == [{"name": "login", "params": ["delay", "key", "user", "x"],
+                                "required": ["x"], "count": 4}]
+    assert _params(reloaded.get("login").bind({"x": 5}))[0]["x"] == 5
+    assert reloaded.delete("login") and not reloaded.delete("login")
+    assert os.listdir(tmp_path) == []
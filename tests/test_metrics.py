@@ -0,0 +1,103 @@
+"""Tests for latency histograms and Prometheus export (src/metrics.py)."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import metrics  # noqa: E402
+from metrics import Histogram, Registry, bucket_index, bucket_upper  # noqa: E402
+
+
+def test_buckets_are_contiguous_and_within_an_eighth():
+    previous_upper = -1
+    for index in range(metrics.MAX_BUCKETS - 1):
+        upper = bucket_upper(index)
+        assert upper > previous_upper
+        assert bucket_index(previous_upper + 1) == index  # No gaps between buckets
+        assert bucket_index(upper) == index
+        previous_upper = upper
+    for value in [0, 1, 7, 8, 9, 15, 16, 100, 999, 12345, 10 ** 6, 10 ** 9, 2 ** 40 + 3]:
+        upper = bucket_upper(bucket_index(value))
+        assert value <= upper <= max(value * 1.125, value + 1)
+
+
+def test_quantiles_are_within_the_bucket_error():
+    histogram = Histogram("h")
+    for ms in range(1, 1001):  # 1..1000 ms, uniform
+        histogram.record(ms / 1000)
+    summary = histogram.summary(quantiles=(0.5, 0.99))
+    assert summary["count"] == 1000
+    assert summary["mean_ms"] == pytest.approx(500.5, abs=0.01)
+    assert 500 <= summary["p50_ms"] <= 500 * 1.125
+    assert 990 <= summary["p99_ms"] <= 990 * 1.125
+
+
+def test_empty_histogram():
+    assert Histogram("h").summary() == {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0,
+                                        "p90_ms": 0.0, "p99_ms": 0.0}
+
+
+def test_shards_from_many_threads_merge():
+    histogram = Histogram("h")
+    start = threading.Barrier(8)
+
+    def work(n):
+        start.wait()
+        for _ in range(1000):
+            histogram.record(n / 1000)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counts, total_us, count = histogram.snapshot()
+    assert count == sum(counts) == 8000
+    assert total_us == 1000 * sum(n * 1000 for n in range(1, 9))
+    assert len(histogram._shards) == 8
+
+
+def test_prometheus_exposition():
+    registry = Registry()
+    registry.observe("pcc_test_seconds", 0.0003, "Test latency", route="/a")
+    registry.observe("pcc_test_seconds", 0.002, "Test latency", route="/a")
+    registry.counter("pcc_things_total", "Things done", lambda: {(("result", "hit"),): 3})
+    registry.gauge("pcc_queue", "Queued", lambda: 2)
+    registry.gauge("pcc_broken", "Raises", lambda: 1 / 0)  # Skipped, never breaks the scrape
+
+    bucket = 'pcc_test_seconds_bucket{route="/a",le="%s"} %d'
+    expected = ["# HELP pcc_test_seconds Test latency", "# TYPE pcc_test_seconds histogram"]
+    expected += [bucket % (bound, 0 if bound < 0.0005 else 1 if bound < 0.0025 else 2)
+                 for bound in metrics.EXPORT_BOUNDS]
+    expected += [
+        bucket % ("+Inf", 2),
+        'pcc_test_seconds_sum{route="/a"} 0.002300',
+        'pcc_test_seconds_count{route="/a"} 2',
+        "# HELP pcc_things_total Things done",
+        "# TYPE pcc_things_total counter",
+        'pcc_things_total{result="hit"} 3',
+        "# HELP pcc_queue Queued",
+        "# TYPE pcc_queue gauge",
+        "pcc_queue 2",
+    ]
+    assert registry.prometheus() == "\n".join(expected) + "\n"
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.observe("h", 0.001, route='say "hi"\\\n')
+    assert 'h_count{route="say \\"hi\\"\\\\\\n"} 1' in registry.prometheus().splitlines()
+
+
+def test_summaries_group_by_name():
+    registry = Registry()
+    with registry.timer("t", route="/a"):
+        pass
+    registry.observe("t", 0.01, route="/b")
+    summaries = registry.summaries()["t"]
+    assert sorted(s["route"] for s in summaries) == ["/a", "/b"]
+    assert all(s["count"] == 1 for s in summaries)
@@ -0,0 +1,42 @@
+"""Tests for single and batched pixel reads (/api/pixel, /api/pixel/batch)."""
+
+import pytest
+
+import screenshot
+
+
+@pytest.fixture
+def desktop():
+    backend = screenshot.SyntheticBackend(64, 48, color=(0, 0, 255))
+    backend.fill(10, 5, 1, 1, (255, 0, 0))
+    previous = screenshot.get_backend()
+    screenshot.set_backend(backend)
+    yield backend
+    screenshot.set_backend(previous)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_pixel_reads_the_backend_or_cached_frame(client, desktop, cached):
+    if cached:
+        screenshot.capture_frame()
+    assert client.get("/api/pixel?x=10&y=5").get_json() == {"r": 255, "g": 0, "b": 0}
+    assert client.get("/api/pixel?x=63&y=47").get_json() == {"r": 0, "g": 0, "b": 255}
+
+
+@pytest.mark.parametrize("cached", [False, True])
+@pytest.mark.parametrize("x, y", [(-1, 0), (0, -1), (64, 0), (0, 48), (10 ** 6, 10 ** 6)])
+def test_pixel_off_screen_is_400(client, desktop, cached, x, y):
+    if cached:
+        screenshot.capture_frame()
+    response = client.get(f"/api/pixel?x={x}&y={y}")
+    assert response.status_code == 400
+    assert response.get_json() == {"success": False, "error": f"Point ({x}, {y}) is outside the 64x48 screen"}
+
+
+def test_batch_off_screen_is_400(client, desktop):
+    response = client.post("/api/pixel/batch", json={"points": [[10, 5], [-1, 5]]})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Point 1 (-1, 5) is outside the 64x48 screen"
+
+    response = client.post("/api/pixel/batch", json={"points": [[10, 5]], "expected": ["#ff0000"], "hex": True})
+    assert response.get_json() == {"success": True, "colors": ["#ff0000"], "matches": [True], "all_match": True}
@@ -0,0 +1,85 @@
+"""Tests for dirty-rectangle frame encoding (src/screen_stream.py)."""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import screen_stream  # noqa: E402
+from screenshot import SyntheticBackend  # noqa: E402
+
+
+def _blank(height=100, width=150):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+def test_dirty_tiles_pads_partial_tiles():
+    previous = _blank()
+    current = previous.copy()
+    current[99, 149] = 255  # Bottom-right pixel lives in a partial tile
+    tiles = screen_stream.dirty_tiles(previous, current, 32)
+    assert tiles.shape == (4, 5)
+    assert np.argwhere(tiles).tolist() == [[3, 4]]
+
+
+def test_dirty_tiles_threshold():
+    previous = _blank()
+    current = previous.copy()
+    current[10, 10] = 5
+    assert screen_stream.dirty_tiles(previous, current, 32).any()
+    assert not screen_stream.dirty_tiles(previous, current, 32, threshold=5).any()
+
+
+def test_tiles_to_rects_merges_and_clips():
+    tiles = np.zeros((4, 5), dtype=bool)
+    tiles[0:2, 1:3] = True  # 2x2 block merges into one rect
+    tiles[3, 4] = True  # Partial tile is clipped to the frame
+    rects = screen_stream.tiles_to_rects(tiles, 32, 150, 100)
+    assert rects == [(32, 0, 64, 64), (128, 96, 22, 4)]
+
+
+def test_encoder_sends_key_then_deltas():
+    source = SyntheticBackend(150, 100)
+    diff = screen_stream.FrameDiffEncoder(tile_size=32, keyframe_interval=3, quality=80)
+
+    kind, parts = diff.encode(source.grab().rgb())
+    assert kind == "key" and [rect for rect, _ in parts] == [(0, 0, 150, 100)]
+    assert Image.open(io.BytesIO(parts[0][1])).size == (150, 100)
+
+    assert diff.encode(source.grab().rgb()) == ("delta", [])
+
+    source.fill(40, 40, 10, 10, (255, 0, 0))
+    kind, parts = diff.encode(source.grab().rgb())
+    assert kind == "delta" and [rect for rect, _ in parts] == [(32, 32, 32, 32)]
+
+    diff.encode(source.grab().rgb())
+    assert diff.encode(source.grab().rgb())[0] == "key"  # keyframe_interval reached
+
+
+def test_encoder_keyframes_on_resize_and_mostly_dirty():
+    diff = screen_stream.FrameDiffEncoder(tile_size=32)
+    diff.encode(_blank())
+    assert diff.encode(_blank(50, 50))[0] == "key"
+    assert diff.encode(np.full((50, 50, 3), 255, dtype=np.uint8))[0] == "key"
+
+
+def test_stream_frames_from_synthetic_source():
+    source = SyntheticBackend(64, 64)
+    frames = iter([0, 0, 1])
+
+    def grab():
+        if next(frames):
+            source.fill(0, 0, 8, 8, (0, 255, 0))
+        return source.grab().rgb()
+
+    diff = screen_stream.FrameDiffEncoder(tile_size=32)
+    chunks = list(screen_stream.stream_frames(source=grab, fps=1000, max_frames=3, diff_encoder=diff))
+    assert len(chunks) == 2  # The unchanged middle frame sends nothing
+    assert b"X-Frame-Kind: key\r\n" in chunks[0] and b"X-Frame-Seq: 1\r\n" in chunks[0]
+    assert b"X-Frame-Kind: delta\r\n" in chunks[1] and b"X-Rect: 0,0,32,32\r\n" in chunks[1]
+    assert all(chunk.startswith(b"--frame\r\n") for chunk in chunks)
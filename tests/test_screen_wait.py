@@ -0,0 +1,74 @@
+"""Tests for screen condition parsing and waits (src/screen_wait.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import screen_wait  # noqa: E402
+import screenshot  # noqa: E402
+
+PIXEL = {"type": "pixel", "x": 5, "y": 5, "color": "#ff0000"}
+
+
+@pytest.fixture
+def desktop():
+    backend = screenshot.SyntheticBackend(64, 48, color=(255, 0, 0))
+    previous = screenshot.get_backend()
+    screenshot.set_backend(backend)
+    yield backend
+    screenshot.set_backend(previous)
+
+
+@pytest.mark.parametrize("spec", [
+    "pixel",
+    ["pixel"],
+    {**PIXEL, "tolerance": "lots"},
+    {**PIXEL, "tolerance": -1},
+    {"type": "changed", "threshold": "x"},
+    {"type": "changed", "min_fraction": [0.5]},
+    {"type": "stable", "duration_ms": -5},
+    {"type": "stable", "threshold": float("inf")},
+    {"type": "sparkle"},
+])
+def test_bad_specs_raise_value_error(spec):
+    with pytest.raises(ValueError):
+        screen_wait.build_condition(spec)
+
+
+def test_numbers_are_coerced():
+    condition = screen_wait.build_condition({"type": "stable", "duration_ms": "250", "threshold": 3})
+    assert condition.duration == 0.25 and condition.threshold == 3.0
+
+
+def test_wait_for_uses_explicit_intervals(desktop, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(screen_wait.time, "sleep", sleeps.append)
+    condition = screen_wait.build_condition({**PIXEL, "color": "#00ff00"})
+    result = screen_wait.wait_for(condition, timeout=0, min_interval_ms=1, max_interval_ms=1)
+    assert result["success"] is False and result["polls"] == 1
+    condition = screen_wait.build_condition(PIXEL)
+    assert screen_wait.wait_for(condition, timeout=1, min_interval_ms=1, max_interval_ms=2)["success"]
+
+
+@pytest.mark.parametrize("body", [
+    {"condition": "pixel"},
+    {"condition": [1, 2]},
+    {"condition": {**PIXEL, "tolerance": "lots"}},
+    {"condition": PIXEL, "min_interval_ms": -5},
+    {"condition": PIXEL, "min_interval_ms": 0},
+    {"condition": PIXEL, "min_interval_ms": 50, "max_interval_ms": 10},
+    {"condition": PIXEL, "max_interval_ms": "soon"},
+])
+def test_route_rejects_bad_input_with_400(client, desktop, body):
+    response = client.post("/api/screen/wait", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_route_waits(client, desktop):
+    body = {"condition": PIXEL, "timeout": 1, "min_interval_ms": 1, "max_interval_ms": 5}
+    response = client.post("/api/screen/wait", json=body)
+    assert response.status_code == 200 and response.get_json()["success"] is True
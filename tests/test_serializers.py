@@ -0,0 +1,121 @@
+"""Tests for response negotiation and request body decoding (src/serializers.py, server.py)."""
+
+import base64
+import importlib
+import io
+import sys
+
+import pytest
+from PIL import Image
+
+import serializers
+
+
+def _png(size=(4, 3), color=(255, 0, 0)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def without_binary_formats(monkeypatch):
+    """Reload serializers as if msgpack and cbor2 weren't installed."""
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+    monkeypatch.setitem(sys.modules, "cbor2", None)
+    importlib.reload(serializers)
+    yield
+    monkeypatch.undo()
+    importlib.reload(serializers)
+
+
+def test_json_bytes_become_base64():
+    payload = serializers.loads(serializers.dumps({"image": b"\x00\xffraw"}))
+    assert payload == {"image": base64.b64encode(b"\x00\xffraw").decode("ascii")}
+    assert serializers.binary_field(payload["image"]) == b"\x00\xffraw"
+
+
+@pytest.mark.parametrize("accept", [None, "*/*", "text/html", "application/json"])
+def test_json_is_the_default(client, accept):
+    headers = {"Accept": accept} if accept else {}
+    response = client.get("/api/health", headers=headers)
+    assert response.mimetype == "application/json"
+    assert "Accept" in response.vary
+    assert response.get_json()["status"] == "ok"
+
+
+@pytest.mark.parametrize("name, accept", [
+    ("msgpack", "application/msgpack"),
+    ("msgpack", "application/x-msgpack"),
+    ("cbor", "application/cbor"),
+    ("cbor", "application/json;q=0.5, application/cbor"),
+])
+def test_accept_picks_binary_format(client, name, accept):
+    pytest.importorskip("cbor2" if name == "cbor" else name)
+    response = client.get("/api/health", headers={"Accept": accept})
+    assert response.mimetype == serializers.FORMATS[name].mimetype
+    payload = serializers.loads(response.data, name)
+    assert payload["status"] == "ok"
+    assert name in payload["formats"]
+
+
+@pytest.mark.parametrize("name", ["msgpack", "cbor"])
+def test_binary_formats_carry_native_bytes(client, name):
+    pytest.importorskip("cbor2" if name == "cbor" else name)
+    mimetype = serializers.FORMATS[name].mimetype
+    response = client.get("/api/screenshot?codec=png", headers={"Accept": mimetype})
+    payload = serializers.loads(response.data, name)
+    assert isinstance(payload["image"], bytes)
+    assert payload["image"].startswith(b"\x89PNG")
+
+    json_payload = client.get("/api/screenshot?codec=png").get_json()
+    assert isinstance(json_payload["image"], str)
+    assert base64.b64decode(json_payload["image"]).startswith(b"\x89PNG")
+
+
+def test_falls_back_to_json_without_binary_packages(client, without_binary_formats):
+    assert list(serializers.FORMATS) == ["json"]
+    response = client.get("/api/health", headers={"Accept": "application/msgpack, application/cbor"})
+    assert response.mimetype == "application/json"
+    assert response.get_json()["formats"] == ["json"]
+
+
+@pytest.mark.parametrize("mimetype, package", [
+    ("application/msgpack", "msgpack"),
+    ("application/cbor", "cbor2"),
+])
+def test_binary_body_without_package_is_415(client, without_binary_formats, mimetype, package):
+    response = client.post("/api/screen/templates", data=b"\x80", content_type=mimetype)
+    assert response.status_code == 415
+    assert response.get_json() == {"success": False, "error": f"{mimetype} needs the {package} package"}
+
+
+def test_json_body_decodes_base64_field(client):
+    image = base64.b64encode(_png()).decode("ascii")
+    response = client.post("/api/screen/templates", json={"name": "json-red", "image": image})
+    assert response.get_json()["success"] is True
+    assert (response.get_json()["width"], response.get_json()["height"]) == (4, 3)
+    client.delete("/api/screen/templates/json-red")
+
+
+@pytest.mark.parametrize("name", ["msgpack", "cbor"])
+def test_binary_body_decodes_by_content_type(client, name):
+    pytest.importorskip("cbor2" if name == "cbor" else name)
+    fmt = serializers.FORMATS[name]
+    body = serializers.dumps({"name": f"{name}-red", "image": _png((5, 2))}, name)
+    response = client.post("/api/screen/templates", data=body, content_type=fmt.mimetype)
+    # With no Accept header the reply mirrors the request body's format
+    assert response.mimetype == fmt.mimetype
+    payload = serializers.loads(response.data, name)
+    assert payload["success"] is True
+    assert (payload["width"], payload["height"]) == (5, 2)
+    client.delete(f"/api/screen/templates/{name}-red")
+
+
+@pytest.mark.parametrize("name", ["msgpack", "cbor"])
+def test_malformed_binary_body_is_400(client, name):
+    pytest.importorskip("cbor2" if name == "cbor" else name)
+    response = client.post(
+        "/api/screen/templates", data=b"\xc1", content_type=serializers.FORMATS[name].mimetype
+    )
+    assert response.status_code == 400
+    assert serializers.loads(response.data, name)["error"].startswith(f"Invalid {name} body")
@@ -0,0 +1,54 @@
+"""Tests for the coarse-to-fine template search (src/template_match.py)."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import template_match  # noqa: E402
+
+
+def _frame(seed, shape=(240, 320)):
+    # Smooth-ish texture so the block-averaged coarse pass still sees structure
+    rng = np.random.default_rng(seed)
+    noise = rng.random((shape[0] // 4, shape[1] // 4)).astype(np.float32) * 255
+    return np.kron(noise, np.ones((4, 4), dtype=np.float32))
+
+
+@pytest.fixture
+def full_frame_calls(monkeypatch):
+    calls = []
+    real_ncc = template_match.ncc
+
+    def ncc(image, template):
+        calls.append(image.shape)
+        return real_ncc(image, template)
+
+    monkeypatch.setattr(template_match, "ncc", ncc)
+    return calls
+
+
+def test_finds_present_template(full_frame_calls):
+    gray = _frame(1)
+    template = gray[96:144, 160:224].copy()
+    matches = template_match.search(gray, template, 0.9)
+    assert [(y, x) for y, x, _ in matches] == [(96, 160)]
+    assert matches[0][2] > 0.99
+    assert gray.shape not in full_frame_calls
+
+
+def test_absent_template_skips_full_search(full_frame_calls):
+    gray = _frame(1)
+    template = _frame(2, (48, 64))
+    assert template_match.search(gray, template, 0.9) == []
+    assert gray.shape not in full_frame_calls
+
+
+def test_exhaustive_runs_full_search(full_frame_calls):
+    gray = _frame(1)
+    template = _frame(2, (48, 64))
+    assert template_match.search(gray, template, 0.9, exhaustive=True) == []
+    assert gray.shape in full_frame_calls
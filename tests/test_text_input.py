@@ -0,0 +1,73 @@
+"""Tests for the batched Unicode typing engine (src/text_input.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import text_input  # noqa: E402
+from text_input import (  # noqa: E402
+    KEYEVENTF_KEYUP,
+    KEYEVENTF_UNICODE,
+    VK_RETURN,
+    RecordingInjector,
+    TypingEngine,
+    decode_events,
+    encode_events,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "hello world",
+    "tab\tseparated",
+    "café 日本語 Ж",
+    "\U0001F600 grin",  # astral: one surrogate pair
+    "a\U0001F468\u200d\U0001F469b",  # ZWJ sequence with two surrogate pairs
+    "line one\nline two\n",
+])
+def test_round_trip(text):
+    assert decode_events(encode_events(text)) == text
+
+
+def test_crlf_is_one_enter():
+    events = encode_events("a\r\nb")
+    enters = [event for event in events if event[0] == VK_RETURN]
+    assert enters == [(VK_RETURN, 0, 0), (VK_RETURN, 0, KEYEVENTF_KEYUP)]
+    assert decode_events(events) == "a\nb"
+
+
+def test_lone_cr_is_enter():
+    assert decode_events(encode_events("a\rb\r\r\nc")) == "a\nb\n\nc"
+
+
+def test_surrogate_pair_is_two_units():
+    events = encode_events("\U0001F600")
+    downs = [scan for vk, scan, flags in events if not flags & KEYEVENTF_KEYUP]
+    assert downs == [0xD83D, 0xDE00]
+    assert all(flags & KEYEVENTF_UNICODE for _, _, flags in events)
+
+
+def test_events_come_in_down_up_pairs():
+    events = encode_events("x\U0001F600\r\n\t")
+    assert len(events) % 2 == 0
+    for down, up in zip(events[::2], events[1::2]):
+        assert down[:2] == up[:2]
+        assert not down[2] & KEYEVENTF_KEYUP
+        assert up[2] & KEYEVENTF_KEYUP
+
+
+@pytest.mark.parametrize("batch_size", [2, 3, 4, 64])
+def test_engine_never_splits_a_pair(batch_size):
+    injector = RecordingInjector()
+    text = "ab\U0001F600c\r\nd"
+    TypingEngine(injector, batch_size=batch_size, batch_delay=0).type(text)
+    assert all(len(batch) % 2 == 0 for batch in injector.batches)
+    assert injector.text() == "ab\U0001F600c\nd"
+
+
+def test_injector_is_abstract():
+    with pytest.raises(TypeError):
+        text_input.Injector()
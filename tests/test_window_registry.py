@@ -0,0 +1,116 @@
+"""Tests for the window registry and title index (src/window_registry.py)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from window_registry import FakeEventSource, TitleIndex, WindowRegistry, title_matches  # noqa: E402
+
+
+def _info(hwnd, title, pid=100, process="app.exe"):
+    return {"hwnd": hwnd, "title": title, "pid": pid, "process": process, "class_name": "Window"}
+
+
+def _registry(desktop, active=None):
+    """A registry over the ``desktop`` dict ({hwnd: info}), driven by a FakeEventSource."""
+    registry = WindowRegistry(
+        lambda: list(desktop),
+        lambda hwnd: dict(desktop[hwnd]) if hwnd in desktop else None,
+        lambda: active,
+    )
+    source = FakeEventSource()
+    source.start(registry)
+    return registry, source
+
+
+def _titles(results):
+    return [info["title"] for _, info in results]
+
+
+def test_events_keep_the_index_current():
+    desktop, seen = {}, []
+    registry, source = _registry(desktop)
+    registry.add_listener(lambda event, hwnd, info: seen.append((event, hwnd)))
+
+    desktop[1] = _info(1, "Untitled - Notepad")
+    source.emit("create", 1)
+    desktop[2] = _info(2, "Notes.txt - Notepad", pid=200)
+    source.emit("create", 2)
+    assert _titles(registry.search("notepad")) == ["Untitled - Notepad", "Notes.txt - Notepad"]
+    assert _titles(registry.search("untitled - notepad", "exact")) == ["Untitled - Notepad"]
+    assert _titles(registry.search("notepad", pid=200)) == ["Notes.txt - Notepad"]
+
+    desktop[1] = _info(1, "Report.docx - Word")
+    source.emit("name", 1)
+    assert _titles(registry.search("untitled")) == []
+    assert _titles(registry.search("report", "prefix")) == ["Report.docx - Word"]
+
+    del desktop[2]
+    source.emit("destroy", 2)
+    assert _titles(registry.search("notepad")) == []
+    assert [info["hwnd"] for info in registry.list()] == [1]
+    assert seen == [("create", 1), ("create", 2), ("name", 1), ("destroy", 2)]
+
+
+def test_fuzzy_lookup_ranks_and_honours_min_score():
+    desktop = {1: _info(1, "Untitled - Notepad"), 2: _info(2, "Notepad++"), 3: _info(3, "Calculator")}
+    registry, source = _registry(desktop)
+    source.emit("resync")
+
+    loose = registry.search("notpad", "fuzzy", min_score=0.2)
+    assert _titles(loose) == ["Notepad++", "Untitled - Notepad"]
+    assert all(0.2 <= score <= 1 for score, _ in loose)
+    assert _titles(registry.search("notpad", "fuzzy", min_score=0.3)) == ["Notepad++"]
+    assert _titles(registry.search("notpad", "fuzzy", min_score=0.5)) == []
+    assert _titles(registry.search("notepad", "substring")) == ["Notepad++", "Untitled - Notepad"]
+
+
+def test_find_first_follows_stacking_order_not_rank():
+    # Enumeration order is z-order: the long-titled window is on top
+    desktop = {1: _info(1, "Untitled - Notepad - Editing a long file"), 2: _info(2, "Notepad")}
+    registry, source = _registry(desktop)
+    source.emit("resync")
+    assert _titles(registry.search("notepad")) == ["Notepad", "Untitled - Notepad - Editing a long file"]
+    assert registry.find_first("NOTEPAD")["hwnd"] == 1
+
+    source.emit("foreground", 2)
+    assert registry.find_first("notepad")["hwnd"] == 2
+
+    desktop[3] = _info(3, "Notepad - new")
+    source.emit("create", 3)  # New windows open on top
+    assert registry.find_first("notepad")["hwnd"] == 3
+
+    del desktop[3]
+    source.emit("destroy", 3)
+    assert registry.find_first("notepad")["hwnd"] == 2
+    assert registry.find_first("calculator") is None
+
+
+def test_resync_diffs_the_desktop():
+    desktop = {1: _info(1, "One"), 2: _info(2, "Two")}
+    registry, source = _registry(desktop)
+    seen = []
+    registry.add_listener(lambda event, hwnd, info: seen.append((event, hwnd)))
+    source.emit("resync")
+    desktop[3] = _info(3, "Three")
+    del desktop[1]
+    desktop[2] = _info(2, "Two (edited)")
+    source.emit("resync")
+    assert sorted(seen) == [("create", 1), ("create", 2), ("create", 3), ("destroy", 1), ("name", 2)]
+    assert _titles(registry.search("two")) == ["Two (edited)"]
+    assert _titles(registry.search("one")) == []
+
+
+@pytest.mark.parametrize("min_score, expected", [(0.3, [1, 2]), (0.5, [1]), (0.9, [])])
+def test_short_fuzzy_query_honours_min_score(min_score, expected):
+    index = TitleIndex()
+    index.add(1, "vim")  # "vi" scores 0.25 + 0.75 * 2/3 = 0.75
+    index.add(2, "David's video notes")  # Long title: 0.25 + 0.75 * 2/19 ~ 0.33
+    index.add(3, "Terminal")
+    hits = sorted(hwnd for hwnd, _ in index.search("vi", "fuzzy", min_score))
+    assert hits == expected
+    titles = {1: "vim", 2: "David's video notes", 3: "Terminal"}
+    assert sorted(h for h, t in titles.items() if title_matches(t, "vi", "fuzzy", min_score)) == expected